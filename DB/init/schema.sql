@@ -50,6 +50,7 @@ CREATE TABLE documents (
     mime_type           VARCHAR(100),
     size_bytes          BIGINT,
     blob_path           TEXT NOT NULL,
+    content_hash        VARCHAR(64),
     source              VARCHAR(50) NOT NULL DEFAULT 'upload',
     status              document_status NOT NULL DEFAULT 'uploaded',
     chunk_count         INTEGER DEFAULT 0,
@@ -59,12 +60,16 @@ CREATE TABLE documents (
     error_message       TEXT
 );
 
-CREATE INDEX idx_documents_user_id_created_at
-    ON documents (user_id, created_at DESC);
+-- 목록 API keyset 페이지네이션 (created_at, id)
+CREATE INDEX idx_documents_user_id_created_at_id
+    ON documents (user_id, created_at DESC, id DESC);
 
 CREATE INDEX idx_documents_group_id
     ON documents (group_id);
 
+CREATE INDEX idx_documents_content_hash
+    ON documents (content_hash);
+
 ------------------------------------------------------------
 -- links (공유 링크)
 ------------------------------------------------------------
@@ -83,14 +88,16 @@ CREATE TABLE links (
     access_count     INTEGER NOT NULL DEFAULT 0
 );
 
-CREATE INDEX idx_links_user_id
-    ON links (user_id);
+CREATE INDEX idx_links_user_id_created_at_id
+    ON links (user_id, created_at DESC, id DESC);
 
 ------------------------------------------------------------
 -- qa_logs (질문/답변 로그)
+-- created_at 기준 월별 RANGE 파티션 (qa_logs_pYYYYMM, UTC 월 경계)
+-- 이후 달의 파티션은 앱이 미리 만들고, 보존 기간이 지난 달은 보관 후 떼어낸다. (app.services.qa_log_partitions)
 ------------------------------------------------------------
 CREATE TABLE qa_logs (
-    id                  UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    id                  UUID NOT NULL DEFAULT gen_random_uuid(),
     user_id             UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
     document_id         UUID REFERENCES documents(id) ON DELETE SET NULL,
     link_id             VARCHAR(64) REFERENCES links(id) ON DELETE SET NULL,
@@ -99,17 +106,29 @@ CREATE TABLE qa_logs (
     model               VARCHAR(100),
     prompt_tokens       INTEGER,
     completion_tokens   INTEGER,
+    -- 컨텍스트 압축으로 줄인 프롬프트 토큰 수
+    context_tokens_saved INTEGER,
     latency_ms          INTEGER,
     -- RAG 상태: SUCCESS / NO_ANSWER / ERROR
     status              VARCHAR(20) NOT NULL DEFAULT 'SUCCESS'
                         CHECK (status IN ('SUCCESS', 'NO_ANSWER', 'ERROR')),
     -- 유사 질문 묶기를 위한 정규화된 질문 문자열
     normalized_question TEXT,
-    created_at          TIMESTAMPTZ NOT NULL DEFAULT NOW()
-);
+    -- 링크 경유 질문이면 링크 소유자 (대시보드 주인)
+    owner_id            UUID REFERENCES users(id) ON DELETE SET NULL,
+    -- 답변 캐시에서 바로 돌려준 질문
+    cache_hit           BOOLEAN NOT NULL DEFAULT FALSE,
+    created_at          TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    -- 파티션 키는 PK에 들어가야 한다
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
 
-CREATE INDEX idx_qa_logs_user_id_created_at
-    ON qa_logs (user_id, created_at DESC);
+CREATE INDEX idx_qa_logs_user_id_created_at_id
+    ON qa_logs (user_id, created_at DESC, id DESC);
+
+CREATE INDEX idx_qa_logs_owner_id_created_at
+    ON qa_logs (owner_id, created_at DESC)
+    WHERE owner_id IS NOT NULL;
 
 CREATE INDEX idx_qa_logs_status
     ON qa_logs (status);
@@ -119,12 +138,195 @@ CREATE INDEX idx_qa_logs_normalized_question
 
 ------------------------------------------------------------
 -- (선택) qa_keywords: 질문에서 뽑은 키워드들
+-- 로그의 created_at을 같이 들고 qa_logs와 같은 달 파티션에 들어간다.
 ------------------------------------------------------------
 CREATE TABLE qa_keywords (
-    qa_log_id UUID REFERENCES qa_logs(id) ON DELETE CASCADE,
-    keyword   TEXT NOT NULL,
-    PRIMARY KEY (qa_log_id, keyword)
-);
+    qa_log_id  UUID NOT NULL,
+    keyword    TEXT NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL,
+    PRIMARY KEY (qa_log_id, keyword, created_at),
+    FOREIGN KEY (qa_log_id, created_at) REFERENCES qa_logs (id, created_at) ON DELETE CASCADE
+) PARTITION BY RANGE (created_at);
 
 CREATE INDEX idx_qa_keywords_keyword
     ON qa_keywords(keyword);
+
+-- 이번 달 ~ 두 달 뒤 파티션 (이후는 앱이 만든다)
+DO $$
+DECLARE
+    m DATE := date_trunc('month', NOW() AT TIME ZONE 'UTC')::date;
+BEGIN
+    FOR i IN 0..2 LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF qa_logs FOR VALUES FROM (%L) TO (%L)',
+            'qa_logs_p' || to_char(m, 'YYYYMM'),
+            m::timestamp AT TIME ZONE 'UTC',
+            (m + INTERVAL '1 month')::timestamp AT TIME ZONE 'UTC'
+        );
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF qa_keywords FOR VALUES FROM (%L) TO (%L)',
+            'qa_keywords_p' || to_char(m, 'YYYYMM'),
+            m::timestamp AT TIME ZONE 'UTC',
+            (m + INTERVAL '1 month')::timestamp AT TIME ZONE 'UTC'
+        );
+        m := (m + INTERVAL '1 month')::date;
+    END LOOP;
+END $$;
+
+------------------------------------------------------------
+-- query_embeddings: 질문 임베딩 캐시 (float32 bytes)
+------------------------------------------------------------
+CREATE TABLE query_embeddings (
+    question_hash   VARCHAR(64) NOT NULL,
+    model           VARCHAR(100) NOT NULL,
+    question        TEXT NOT NULL,
+    dims            INTEGER NOT NULL,
+    vector          BYTEA NOT NULL,
+    hit_count       INTEGER NOT NULL DEFAULT 0,
+    created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    last_used_at    TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (question_hash, model)
+);
+
+CREATE INDEX idx_query_embeddings_last_used_at
+    ON query_embeddings (last_used_at);
+
+------------------------------------------------------------
+-- index_jobs: 문서 인덱싱 작업 큐
+------------------------------------------------------------
+CREATE TABLE index_jobs (
+    id              UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    document_id     UUID NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    user_id         UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    -- queued / running / succeeded / failed
+    status          VARCHAR(20) NOT NULL DEFAULT 'queued',
+    -- 클수록 먼저 (10 = 사용자가 누른 재인덱싱, 0 = 업로드 직후 bulk)
+    priority        SMALLINT NOT NULL DEFAULT 0,
+    attempts        INTEGER NOT NULL DEFAULT 0,
+    max_attempts    INTEGER NOT NULL DEFAULT 5,
+    run_after       TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    -- visibility timeout: 이 시각까지 heartbeat가 없으면 다른 워커가 다시 가져간다
+    leased_until    TIMESTAMPTZ,
+    lease_owner     VARCHAR(100),
+    last_error      TEXT,
+    chunk_count     INTEGER,
+    created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    started_at      TIMESTAMPTZ,
+    finished_at     TIMESTAMPTZ
+);
+
+-- 문서당 대기/실행 중인 작업은 하나만
+CREATE UNIQUE INDEX uq_index_jobs_active_document
+    ON index_jobs (document_id)
+    WHERE status IN ('queued', 'running');
+
+CREATE INDEX idx_index_jobs_dequeue
+    ON index_jobs (priority DESC, run_after)
+    WHERE status = 'queued';
+
+CREATE INDEX idx_index_jobs_leased_until
+    ON index_jobs (leased_until)
+    WHERE status = 'running';
+
+------------------------------------------------------------
+-- document_chunks: 문서별 청크 manifest (증분 재인덱싱)
+------------------------------------------------------------
+CREATE TABLE document_chunks (
+    document_id     UUID NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    chunk_id        INTEGER NOT NULL,
+    -- sha256(청크 텍스트 + page/section), hex
+    content_hash    VARCHAR(64) NOT NULL,
+    -- 임베딩 배포/모델 이름 (바뀌면 전체 재임베딩)
+    embedding_model VARCHAR(200) NOT NULL,
+    indexed_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (document_id, chunk_id)
+);
+
+------------------------------------------------------------
+-- blob_objects: 내용 주소(sha256) 기반 원본 blob 공유
+------------------------------------------------------------
+CREATE TABLE blob_objects (
+    sha256          VARCHAR(64) PRIMARY KEY,
+    blob_path       TEXT NOT NULL,
+    size_bytes      BIGINT,
+    mime_type       VARCHAR(100),
+    ref_count       INTEGER NOT NULL DEFAULT 0,
+    created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at      TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+------------------------------------------------------------
+-- chunk_embeddings: 청크 텍스트 sha256 → 임베딩 (문서/사용자 간 재사용)
+------------------------------------------------------------
+CREATE TABLE chunk_embeddings (
+    content_hash    VARCHAR(64) NOT NULL,
+    model           VARCHAR(200) NOT NULL,
+    dims            INTEGER NOT NULL,
+    vector          BYTEA NOT NULL,
+    created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    last_used_at    TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (content_hash, model)
+);
+
+CREATE INDEX idx_chunk_embeddings_last_used_at
+    ON chunk_embeddings (last_used_at);
+
+------------------------------------------------------------
+-- 대시보드 집계 (QA 로그 저장 시 증분 갱신)
+------------------------------------------------------------
+CREATE TABLE qa_daily_counts (
+    owner_id        UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    day             DATE NOT NULL,
+    count           BIGINT NOT NULL DEFAULT 0,
+    -- 그중 답변 캐시 hit 수 (miss = count - cache_hits)
+    cache_hits      BIGINT NOT NULL DEFAULT 0,
+    -- 이 행을 마지막으로 바꾼 대시보드 버전
+    version         BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (owner_id, day)
+);
+
+CREATE TABLE qa_keyword_counts (
+    owner_id        UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    keyword         TEXT NOT NULL,
+    count           BIGINT NOT NULL DEFAULT 0,
+    version         BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (owner_id, keyword)
+);
+
+CREATE INDEX idx_qa_keyword_counts_owner_count
+    ON qa_keyword_counts (owner_id, count DESC);
+
+CREATE INDEX idx_qa_keyword_counts_owner_version
+    ON qa_keyword_counts (owner_id, version);
+
+-- normalized_question이 없으면 ''
+CREATE TABLE qa_failed_questions (
+    owner_id            UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    normalized_question TEXT NOT NULL,
+    fail_count          BIGINT NOT NULL DEFAULT 0,
+    sample_question     TEXT NOT NULL,
+    last_asked_at       TIMESTAMPTZ NOT NULL,
+    version             BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (owner_id, normalized_question)
+);
+
+CREATE INDEX idx_qa_failed_questions_owner_count
+    ON qa_failed_questions (owner_id, fail_count DESC);
+
+CREATE INDEX idx_qa_failed_questions_owner_version
+    ON qa_failed_questions (owner_id, version);
+
+-- 소유자의 QA 로그나 문서가 바뀔 때마다 +1 (대시보드 ETag / since 증분 응답)
+CREATE TABLE dashboard_versions (
+    owner_id        UUID PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    version         BIGINT NOT NULL DEFAULT 0,
+    updated_at      TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- 사용자별 검색 인덱스 버전 (답변 캐시 키). 문서 인덱싱/삭제/이동, 페르소나 변경 시 +1
+CREATE TABLE index_versions (
+    user_id         UUID PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    version         BIGINT NOT NULL DEFAULT 0,
+    updated_at      TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
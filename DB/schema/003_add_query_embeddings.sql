@@ -0,0 +1,17 @@
+-- 질문 임베딩 캐시 (정규화 질문 sha256 → float32 벡터 bytes)
+-- EMBEDDING_CACHE_PERSIST=true 일 때만 사용된다.
+
+CREATE TABLE IF NOT EXISTS query_embeddings (
+    question_hash   VARCHAR(64) NOT NULL,
+    model           VARCHAR(100) NOT NULL,
+    question        TEXT NOT NULL,
+    dims            INTEGER NOT NULL,
+    vector          BYTEA NOT NULL,
+    hit_count       INTEGER NOT NULL DEFAULT 0,
+    created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    last_used_at    TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (question_hash, model)
+);
+
+CREATE INDEX IF NOT EXISTS idx_query_embeddings_last_used_at
+    ON query_embeddings (last_used_at);
@@ -0,0 +1,4 @@
+-- 컨텍스트 압축(중복 제거/인접 청크 병합/토큰 예산)으로 줄인 프롬프트 토큰 수
+
+ALTER TABLE qa_logs
+    ADD COLUMN IF NOT EXISTS context_tokens_saved INTEGER;
@@ -0,0 +1,36 @@
+-- 문서 인덱싱 작업 큐 (워커가 SELECT ... FOR UPDATE SKIP LOCKED 로 lease)
+
+CREATE TABLE IF NOT EXISTS index_jobs (
+    id              UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    document_id     UUID NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    user_id         UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    -- queued / running / succeeded / failed
+    status          VARCHAR(20) NOT NULL DEFAULT 'queued',
+    -- 클수록 먼저 (10 = 사용자가 누른 재인덱싱, 0 = 업로드 직후 bulk)
+    priority        SMALLINT NOT NULL DEFAULT 0,
+    attempts        INTEGER NOT NULL DEFAULT 0,
+    max_attempts    INTEGER NOT NULL DEFAULT 5,
+    run_after       TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    -- visibility timeout: 이 시각까지 heartbeat가 없으면 다른 워커가 다시 가져간다
+    leased_until    TIMESTAMPTZ,
+    lease_owner     VARCHAR(100),
+    last_error      TEXT,
+    chunk_count     INTEGER,
+    created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    started_at      TIMESTAMPTZ,
+    finished_at     TIMESTAMPTZ
+);
+
+-- 문서당 대기/실행 중인 작업은 하나만
+CREATE UNIQUE INDEX IF NOT EXISTS uq_index_jobs_active_document
+    ON index_jobs (document_id)
+    WHERE status IN ('queued', 'running');
+
+CREATE INDEX IF NOT EXISTS idx_index_jobs_dequeue
+    ON index_jobs (priority DESC, run_after)
+    WHERE status = 'queued';
+
+CREATE INDEX IF NOT EXISTS idx_index_jobs_leased_until
+    ON index_jobs (leased_until)
+    WHERE status = 'running';
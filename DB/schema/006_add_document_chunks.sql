@@ -0,0 +1,12 @@
+-- 청크 manifest: 재인덱싱 때 내용 해시가 바뀐 청크만 다시 임베딩한다
+
+CREATE TABLE IF NOT EXISTS document_chunks (
+    document_id     UUID NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    chunk_id        INTEGER NOT NULL,
+    -- sha256(청크 텍스트 + page/section), hex
+    content_hash    VARCHAR(64) NOT NULL,
+    -- 임베딩 배포/모델 이름 (바뀌면 전체 재임베딩)
+    embedding_model VARCHAR(200) NOT NULL,
+    indexed_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (document_id, chunk_id)
+);
@@ -0,0 +1,32 @@
+-- 내용 주소 기반 원본 blob 공유 + 청크 임베딩 공유
+
+ALTER TABLE documents
+    ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64);
+
+CREATE INDEX IF NOT EXISTS idx_documents_content_hash
+    ON documents (content_hash);
+
+-- 같은 sha256의 원본은 blob 하나를 ref_count로 공유한다
+CREATE TABLE IF NOT EXISTS blob_objects (
+    sha256          VARCHAR(64) PRIMARY KEY,
+    blob_path       TEXT NOT NULL,
+    size_bytes      BIGINT,
+    mime_type       VARCHAR(100),
+    ref_count       INTEGER NOT NULL DEFAULT 0,
+    created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at      TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- 청크 텍스트 sha256 → float32 벡터 bytes (문서/사용자 간 재사용)
+CREATE TABLE IF NOT EXISTS chunk_embeddings (
+    content_hash    VARCHAR(64) NOT NULL,
+    model           VARCHAR(200) NOT NULL,
+    dims            INTEGER NOT NULL,
+    vector          BYTEA NOT NULL,
+    created_at      TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    last_used_at    TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (content_hash, model)
+);
+
+CREATE INDEX IF NOT EXISTS idx_chunk_embeddings_last_used_at
+    ON chunk_embeddings (last_used_at);
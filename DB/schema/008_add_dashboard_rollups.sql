@@ -0,0 +1,71 @@
+-- 대시보드 집계 테이블 (QA 로그 저장 시 증분 갱신)
+
+-- 링크 경유 질문이면 링크 소유자 (대시보드 주인). 최근 질문 조회를 links 조인 없이 인덱스로 끝낸다.
+ALTER TABLE qa_logs
+    ADD COLUMN IF NOT EXISTS owner_id UUID REFERENCES users(id) ON DELETE SET NULL;
+
+UPDATE qa_logs q
+SET owner_id = l.user_id
+FROM links l
+WHERE q.link_id = l.id
+  AND q.owner_id IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_qa_logs_owner_id_created_at
+    ON qa_logs (owner_id, created_at DESC)
+    WHERE owner_id IS NOT NULL;
+
+-- 소유자별 일별 질문 수
+CREATE TABLE IF NOT EXISTS qa_daily_counts (
+    owner_id        UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    day             DATE NOT NULL,
+    count           BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (owner_id, day)
+);
+
+-- 소유자별 키워드 수
+CREATE TABLE IF NOT EXISTS qa_keyword_counts (
+    owner_id        UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    keyword         TEXT NOT NULL,
+    count           BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (owner_id, keyword)
+);
+
+CREATE INDEX IF NOT EXISTS idx_qa_keyword_counts_owner_count
+    ON qa_keyword_counts (owner_id, count DESC);
+
+-- 소유자별 답변 실패(NO_ANSWER) 질문 수 (normalized_question이 없으면 '')
+CREATE TABLE IF NOT EXISTS qa_failed_questions (
+    owner_id            UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    normalized_question TEXT NOT NULL,
+    fail_count          BIGINT NOT NULL DEFAULT 0,
+    sample_question     TEXT NOT NULL,
+    last_asked_at       TIMESTAMPTZ NOT NULL,
+    PRIMARY KEY (owner_id, normalized_question)
+);
+
+CREATE INDEX IF NOT EXISTS idx_qa_failed_questions_owner_count
+    ON qa_failed_questions (owner_id, fail_count DESC);
+
+-- 기존 로그로 채운다. (다시 실행해도 이미 있는 행은 건드리지 않는다)
+INSERT INTO qa_daily_counts (owner_id, day, count)
+SELECT owner_id, created_at::date, COUNT(*)
+FROM qa_logs
+WHERE owner_id IS NOT NULL
+GROUP BY owner_id, created_at::date
+ON CONFLICT DO NOTHING;
+
+INSERT INTO qa_keyword_counts (owner_id, keyword, count)
+SELECT q.owner_id, k.keyword, COUNT(*)
+FROM qa_keywords k
+JOIN qa_logs q ON q.id = k.qa_log_id
+WHERE q.owner_id IS NOT NULL
+GROUP BY q.owner_id, k.keyword
+ON CONFLICT DO NOTHING;
+
+INSERT INTO qa_failed_questions (owner_id, normalized_question, fail_count, sample_question, last_asked_at)
+SELECT owner_id, COALESCE(normalized_question, ''), COUNT(*), MIN(question), MAX(created_at)
+FROM qa_logs
+WHERE owner_id IS NOT NULL
+  AND status = 'NO_ANSWER'
+GROUP BY owner_id, COALESCE(normalized_question, '')
+ON CONFLICT DO NOTHING;
@@ -0,0 +1,22 @@
+-- 대시보드 버전 카운터 (ETag / since 증분 응답)
+
+-- 소유자의 QA 로그나 문서가 바뀔 때마다 같은 트랜잭션에서 +1
+CREATE TABLE IF NOT EXISTS dashboard_versions (
+    owner_id        UUID PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    version         BIGINT NOT NULL DEFAULT 0,
+    updated_at      TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- 집계 행을 마지막으로 바꾼 대시보드 버전 (since 이후 바뀐 행만 돌려준다)
+ALTER TABLE qa_daily_counts
+    ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT 0;
+ALTER TABLE qa_keyword_counts
+    ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT 0;
+ALTER TABLE qa_failed_questions
+    ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT 0;
+
+CREATE INDEX IF NOT EXISTS idx_qa_keyword_counts_owner_version
+    ON qa_keyword_counts (owner_id, version);
+
+CREATE INDEX IF NOT EXISTS idx_qa_failed_questions_owner_version
+    ON qa_failed_questions (owner_id, version);
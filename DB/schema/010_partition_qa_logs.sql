@@ -0,0 +1,109 @@
+-- qa_logs / qa_keywords 월별 RANGE 파티셔닝 (created_at, UTC 월 경계)
+--
+-- 파티션 이름: qa_logs_pYYYYMM / qa_keywords_pYYYYMM
+-- qa_keywords는 로그의 created_at을 같이 들고 같은 달 파티션에 들어간다. (복합 FK)
+-- 이후 달의 파티션은 앱(app.services.qa_log_partitions)이 미리 만들고,
+-- 보존 기간(QA_LOG_RETENTION_MONTHS)이 지난 달은 blob에 gzip JSONL로 보관한 뒤 떼어내고 지운다.
+-- DELETE로 지우지 않으므로 큰 VACUUM/인덱스 bloat가 생기지 않는다.
+--
+-- 기존 테이블은 이름을 바꿔 두고 새 파티션 테이블로 복사한 뒤 지운다. (한 트랜잭션)
+
+DO $$
+DECLARE
+    first_month DATE;
+    last_month  DATE := (date_trunc('month', NOW() AT TIME ZONE 'UTC') + INTERVAL '2 months')::date;
+    m           DATE;
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'qa_logs'::regclass) THEN
+        RETURN;
+    END IF;
+
+    ALTER TABLE qa_keywords RENAME TO qa_keywords_unpartitioned;
+    ALTER TABLE qa_logs RENAME TO qa_logs_unpartitioned;
+    ALTER INDEX qa_logs_pkey RENAME TO qa_logs_unpartitioned_pkey;
+    ALTER INDEX qa_keywords_pkey RENAME TO qa_keywords_unpartitioned_pkey;
+    DROP INDEX IF EXISTS
+        idx_qa_logs_user_id_created_at,
+        idx_qa_logs_owner_id_created_at,
+        idx_qa_logs_status,
+        idx_qa_logs_normalized_question,
+        idx_qa_keywords_keyword;
+
+    CREATE TABLE qa_logs (
+        id                  UUID NOT NULL DEFAULT gen_random_uuid(),
+        user_id             UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+        document_id         UUID REFERENCES documents(id) ON DELETE SET NULL,
+        link_id             VARCHAR(64) REFERENCES links(id) ON DELETE SET NULL,
+        question            TEXT NOT NULL,
+        answer              TEXT NOT NULL,
+        model               VARCHAR(100),
+        prompt_tokens       INTEGER,
+        completion_tokens   INTEGER,
+        context_tokens_saved INTEGER,
+        latency_ms          INTEGER,
+        status              VARCHAR(20) NOT NULL DEFAULT 'SUCCESS'
+                            CHECK (status IN ('SUCCESS', 'NO_ANSWER', 'ERROR')),
+        normalized_question TEXT,
+        owner_id            UUID REFERENCES users(id) ON DELETE SET NULL,
+        created_at          TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+        PRIMARY KEY (id, created_at)
+    ) PARTITION BY RANGE (created_at);
+
+    CREATE INDEX idx_qa_logs_user_id_created_at
+        ON qa_logs (user_id, created_at DESC);
+    CREATE INDEX idx_qa_logs_owner_id_created_at
+        ON qa_logs (owner_id, created_at DESC)
+        WHERE owner_id IS NOT NULL;
+    CREATE INDEX idx_qa_logs_normalized_question
+        ON qa_logs (normalized_question);
+
+    CREATE TABLE qa_keywords (
+        qa_log_id  UUID NOT NULL,
+        keyword    TEXT NOT NULL,
+        created_at TIMESTAMPTZ NOT NULL,
+        PRIMARY KEY (qa_log_id, keyword, created_at),
+        FOREIGN KEY (qa_log_id, created_at) REFERENCES qa_logs (id, created_at) ON DELETE CASCADE
+    ) PARTITION BY RANGE (created_at);
+
+    CREATE INDEX idx_qa_keywords_keyword
+        ON qa_keywords (keyword);
+
+    SELECT COALESCE(date_trunc('month', MIN(created_at) AT TIME ZONE 'UTC')::date, last_month)
+      INTO first_month
+      FROM qa_logs_unpartitioned;
+    first_month := LEAST(first_month, date_trunc('month', NOW() AT TIME ZONE 'UTC')::date);
+
+    m := first_month;
+    WHILE m <= last_month LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF qa_logs FOR VALUES FROM (%L) TO (%L)',
+            'qa_logs_p' || to_char(m, 'YYYYMM'),
+            m::timestamp AT TIME ZONE 'UTC',
+            (m + INTERVAL '1 month')::timestamp AT TIME ZONE 'UTC'
+        );
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF qa_keywords FOR VALUES FROM (%L) TO (%L)',
+            'qa_keywords_p' || to_char(m, 'YYYYMM'),
+            m::timestamp AT TIME ZONE 'UTC',
+            (m + INTERVAL '1 month')::timestamp AT TIME ZONE 'UTC'
+        );
+        m := (m + INTERVAL '1 month')::date;
+    END LOOP;
+
+    INSERT INTO qa_logs (
+        id, user_id, document_id, link_id, question, answer, model, prompt_tokens, completion_tokens,
+        context_tokens_saved, latency_ms, status, normalized_question, owner_id, created_at
+    )
+    SELECT
+        id, user_id, document_id, link_id, question, answer, model, prompt_tokens, completion_tokens,
+        context_tokens_saved, latency_ms, status, normalized_question, owner_id, created_at
+    FROM qa_logs_unpartitioned;
+
+    INSERT INTO qa_keywords (qa_log_id, keyword, created_at)
+    SELECT k.qa_log_id, k.keyword, l.created_at
+    FROM qa_keywords_unpartitioned k
+    JOIN qa_logs_unpartitioned l ON l.id = k.qa_log_id;
+
+    DROP TABLE qa_keywords_unpartitioned;
+    DROP TABLE qa_logs_unpartitioned;
+END $$;
@@ -0,0 +1,15 @@
+-- 목록 API의 (created_at, id) keyset 페이지네이션용 인덱스
+-- 기존 (user_id, created_at) / (user_id) 인덱스는 새 인덱스의 앞부분이라 지운다.
+
+CREATE INDEX IF NOT EXISTS idx_documents_user_id_created_at_id
+    ON documents (user_id, created_at DESC, id DESC);
+DROP INDEX IF EXISTS idx_documents_user_id_created_at;
+
+CREATE INDEX IF NOT EXISTS idx_links_user_id_created_at_id
+    ON links (user_id, created_at DESC, id DESC);
+DROP INDEX IF EXISTS idx_links_user_id;
+
+-- qa_logs는 파티션 테이블이라 파티션마다 만들어진다.
+CREATE INDEX IF NOT EXISTS idx_qa_logs_user_id_created_at_id
+    ON qa_logs (user_id, created_at DESC, id DESC);
+DROP INDEX IF EXISTS idx_qa_logs_user_id_created_at;
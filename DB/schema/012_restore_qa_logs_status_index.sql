@@ -0,0 +1,5 @@
+-- 010_partition_qa_logs.sql이 파티션 테이블로 옮기면서 빠뜨린 status 인덱스를 되살린다.
+-- (실패 질문 조회 등 status 필터용) 파티션 테이블이라 파티션마다 만들어진다.
+
+CREATE INDEX IF NOT EXISTS idx_qa_logs_status
+    ON qa_logs (status);
@@ -0,0 +1,9 @@
+-- 사용자별 검색 인덱스 버전 (답변 캐시 키)
+-- 문서 인덱싱 완료/삭제/이동, 페르소나 변경 트랜잭션에서 +1 한다.
+-- 프로세스 메모리에 두면 인덱싱한 프로세스만 캐시가 무효화되므로 DB에 둔다.
+
+CREATE TABLE IF NOT EXISTS index_versions (
+    user_id         UUID PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    version         BIGINT NOT NULL DEFAULT 0,
+    updated_at      TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
@@ -0,0 +1,8 @@
+-- 링크 소유자별 답변 캐시 hit/miss (대시보드)
+-- QA 로그에 캐시 hit 여부를 남기고 일별 집계에 더한다. miss = count - cache_hits
+
+ALTER TABLE qa_logs
+    ADD COLUMN IF NOT EXISTS cache_hit BOOLEAN NOT NULL DEFAULT FALSE;
+
+ALTER TABLE qa_daily_counts
+    ADD COLUMN IF NOT EXISTS cache_hits BIGINT NOT NULL DEFAULT 0;
@@ -1,27 +1,40 @@
 from __future__ import annotations
 
+import json
 import logging
-from typing import List, Optional
+import time
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Awaitable, Callable, List, Optional
 from uuid import UUID
 
-import httpx
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, ConfigDict, field_validator
 from datetime import datetime
 
-from app.api.v1.deps import get_current_user, get_db
+from app.api.v1.deps import get_async_db, get_current_user, get_current_user_async, get_db, get_token_principal
 from app.api.v1.search_vector import (
     embed_query,
     vector_search,
     VectorSearchResponse,
     SearchHit,
 )
+from app.core.auth_cache import UserPrincipal
 from app.core.config import settings
-from app.core.question_normalizer import normalize_question_semantic, extract_keywords_for_cloud
+from app.core.http_clients import AZURE_OPENAI, get_async_client
+from app.core.pagination import entities, keyset_page, ndjson_export, page_response, parse_fields
+from app.core.question_normalizer import (
+    extract_keywords_for_cloud,
+    normalize_question_semantic,
+    quick_normalize,
+)
 from app.models.qa_log import QALog
-from app.models.user import User
 from app.models.document_group import DocumentGroup
-from app.models.qa_keyword import QAKetword
+from app.services.answer_cache import CachedAnswer, aindex_version, answer_cache
+from app.services.context_builder import PackedContext, build_context, count_tokens
+from app.services.qa_log_writer import QALogRecord, qa_log_writer
+from app.services.stage_graph import Stage, StageGraph, StageRun
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 import re
 
@@ -89,14 +102,13 @@ def _looks_no_answer(answer: str) -> bool:
     return any(k in low for k in keywords)
 
 
-async def call_chat_model(question: str, hits: List[SearchHit], persona_prompt: str | None = None) -> str:
-    """Call Azure OpenAI chat with RAG prompt."""
-    context_parts = []
-    for i, h in enumerate(hits, start=1):
-        title = h.title or h.original_file_name or h.id
-        content = h.content or ""
-        context_parts.append(f"[doc#{i} | {title}]\n{content}")
-    context_text = "\n\n".join(context_parts) if context_parts else "No relevant documents were found for this user."
+def _build_chat_request(
+    question: str,
+    context: PackedContext,
+    persona_prompt: str | None = None,
+) -> tuple[str, dict, dict]:
+    """RAG 프롬프트를 만들고 Azure OpenAI chat completions 요청 (url, headers, payload)을 구성한다."""
+    context_text = context.render()
 
     base_system = (
         "You are an AI assistant that answers the user's questions based ONLY on the provided documents. "
@@ -133,9 +145,36 @@ async def call_chat_model(question: str, hits: List[SearchHit], persona_prompt:
         "temperature": 0.2,
         "max_tokens": 512,
     }
+    return url, headers, payload
+
+
+def _estimate_prompt_tokens(payload: dict) -> int:
+    """usage가 응답에 없을 때 쓰는 로컬 추정치 (메시지당 오버헤드 4토큰)."""
+    return sum(count_tokens(m.get("content") or "") + 4 for m in payload.get("messages", []))
+
+
+@dataclass
+class ChatStreamUsage:
+    """답변 생성이 끝난 뒤 채워지는 메타데이터 (usage가 없으면 count_tokens 로컬 추정치로 근사)"""
+
+    model: Optional[str] = None
+    prompt_tokens: Optional[int] = None
+    completion_tokens: int = 0
+
+
+async def call_chat_model(
+    question: str,
+    context: PackedContext,
+    persona_prompt: str | None = None,
+    usage: ChatStreamUsage | None = None,
+) -> str:
+    """Call Azure OpenAI chat with RAG prompt."""
+    url, headers, payload = _build_chat_request(question, context, persona_prompt)
+    usage = usage if usage is not None else ChatStreamUsage()
+    usage.prompt_tokens = _estimate_prompt_tokens(payload)
 
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        resp = await client.post(url, headers=headers, json=payload)
+    client = get_async_client(AZURE_OPENAI)
+    resp = await client.post(url, headers=headers, json=payload, timeout=60.0)
 
     if resp.status_code >= 400:
         raise HTTPException(
@@ -144,6 +183,10 @@ async def call_chat_model(question: str, hits: List[SearchHit], persona_prompt:
         )
 
     data = resp.json()
+    usage.model = data.get("model") or usage.model
+    if data.get("usage"):
+        usage.prompt_tokens = data["usage"].get("prompt_tokens", usage.prompt_tokens)
+        usage.completion_tokens = data["usage"].get("completion_tokens", usage.completion_tokens)
     try:
         return data["choices"][0]["message"]["content"]
     except (KeyError, IndexError) as e:
@@ -153,60 +196,391 @@ async def call_chat_model(question: str, hits: List[SearchHit], persona_prompt:
         )
 
 
-@router.post("/rag", response_model=ChatResponse)
-async def chat_with_rag(
-    payload: ChatRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-):
-    """RAG chat: embed query, vector search, call chat model."""
-    search_result: VectorSearchResponse | None = None
-    answer = "죄송합니다. 답변을 생성하는 중 오류가 발생했습니다."
-    status_str = "ERROR"
-    persona_prompt: str | None = None
-    primary_document_id: str | None = None
+async def call_chat_model_stream(
+    question: str,
+    context: PackedContext,
+    persona_prompt: str | None = None,
+    usage: ChatStreamUsage | None = None,
+) -> AsyncIterator[str]:
+    """
+    Azure OpenAI chat `stream: true` 응답을 토큰(delta) 단위로 흘려보낸다.
+    응답에 usage가 없으면 완성 토큰 수는 흘려보낸 답변 전체를 count_tokens로 추정한다. (delta 개수 ≠ 토큰 수)
+    """
+    url, headers, payload = _build_chat_request(question, context, persona_prompt)
+    payload["stream"] = True
+    if settings.azure_openai_stream_usage:
+        payload["stream_options"] = {"include_usage": True}
+    usage = usage if usage is not None else ChatStreamUsage()
+    usage.prompt_tokens = _estimate_prompt_tokens(payload)
+
+    client = get_async_client(AZURE_OPENAI)
+    async with client.stream("POST", url, headers=headers, json=payload, timeout=60.0) as resp:
+        if resp.status_code >= 400:
+            body = (await resp.aread()).decode("utf-8", errors="replace")
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=f"Azure OpenAI chat error: {resp.status_code} {body}",
+            )
+
+        parts: List[str] = []
+        reported = False
+        try:
+            async for line in resp.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                try:
+                    chunk = json.loads(data)
+                except ValueError:
+                    logger.warning("call_chat_model_stream: invalid chunk %r", data[:200])
+                    continue
+
+                usage.model = chunk.get("model") or usage.model
+                if chunk.get("usage"):
+                    reported = True
+                    usage.prompt_tokens = chunk["usage"].get("prompt_tokens", usage.prompt_tokens)
+                    usage.completion_tokens = chunk["usage"].get("completion_tokens", usage.completion_tokens)
+                for choice in chunk.get("choices") or []:
+                    delta = (choice.get("delta") or {}).get("content")
+                    if delta:
+                        parts.append(delta)
+                        yield delta
+        finally:
+            # 중간에 끊겨도 그때까지 보낸 답변만큼은 센다.
+            if not reported:
+                usage.completion_tokens = count_tokens("".join(parts))
+
+
+@dataclass
+class RagOutcome:
+    answer: str
+    status: str
+    hits: List[SearchHit]
+    normalized: Optional[str]
+    keywords: List[str]
+    stages: StageRun
+    cache_hit: bool = False
+    persona_prompt: Optional[str] = None
+    cache_scope: str = "all"
+    cache_version: int = 0
+    cache_keys: List[Optional[str]] = field(default_factory=list)
+    model: Optional[str] = None
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    context: Optional[PackedContext] = None
+    extra_ms: float = 0.0  # 파이프라인 이후 단계(스트리밍 등)에 걸린 시간
+
+    @property
+    def primary_document_id(self) -> Optional[str]:
+        return self.hits[0].document_id if self.hits else None
+
+    @property
+    def latency_ms(self) -> int:
+        return int(self.stages.total_ms + self.extra_ms)
+
+    @property
+    def context_tokens_saved(self) -> Optional[int]:
+        return self.context.tokens_saved if self.context is not None else None
+
+    def record_usage(self, usage: ChatStreamUsage) -> None:
+        self.model = usage.model
+        self.prompt_tokens = usage.prompt_tokens
+        self.completion_tokens = usage.completion_tokens
+
+
+def _classify_answer(answer: str, hits: List[SearchHit]) -> str:
+    status_str = "SUCCESS" if hits else "NO_ANSWER"
+    if status_str == "SUCCESS" and _looks_no_answer(answer):
+        status_str = "NO_ANSWER"
+    return status_str
+
+
+def complete_outcome(outcome: RagOutcome, user_id: UUID, answer: str) -> None:
+    """생성된 답변으로 상태를 판정하고 답변 캐시에 저장한다."""
+    outcome.answer = answer
+    outcome.status = _classify_answer(answer, outcome.hits)
+    answer_cache.set(
+        user_id,
+        outcome.cache_scope,
+        outcome.cache_version,
+        outcome.cache_keys,
+        CachedAnswer(
+            answer=answer,
+            status=outcome.status,
+            hits=list(outcome.hits),
+            normalized=outcome.normalized,
+            keywords=list(outcome.keywords),
+        ),
+    )
 
-    try:
-        query_vec = await embed_query(payload.question)
-
-        search_result = await vector_search(
-            query_vector=query_vec,
-            user_id=current_user.id,
-            group_id=payload.group_id,
-            document_id=None,
-            top_k=payload.top_k,
+
+async def run_rag_pipeline(
+    question: str,
+    user_id: UUID,
+    db: AsyncSession,
+    group_id: Optional[UUID] = None,
+    document_id: Optional[UUID] = None,
+    top_k: int = 5,
+    load_persona: Callable[[], Awaitable[Optional[str]]] | None = None,
+    generate_answer: bool = True,
+) -> RagOutcome:
+    """
+    RAG 파이프라인 (chat_with_rag / ask_via_link 공용).
+
+        embed ──▶ search ──▶ context ──┐
+        persona ───────────────────────┼──▶ answer
+        normalize ──▶ cache ───────────┘
+                  └─▶ keywords
+
+    - 캐시 키에 들어가는 사용자 인덱스 버전은 요청마다 DB에서 한 번 읽는다.
+    - 시작 전에 LLM 없이 만든 정규화 키(quick_normalize, 공백/문장부호만 통일)로 답변 캐시를 먼저 본다.
+      hit이면 임베딩/검색/LLM 호출 없이 바로 반환한다.
+    - 정규화/키워드 추출은 검색과 동시에 실행하고, LLM 정규화가 실제로 다른 키를
+      만들었을 때만 그 키로 캐시를 한 번 더 조회해서 hit이면 LLM 답변 생성을 건너뛴다.
+    - context stage에서 검색 결과를 토큰 예산 안으로 압축한다. (중복 제거/인접 청크 병합)
+    - HTTPException은 그대로 올리고, 그 외 검색/LLM 예외는 ERROR 상태의 답변으로 바꾼다.
+    - generate_answer=False 이면 answer stage를 빼고 검색까지만 한다. (스트리밍 응답용,
+      호출자가 답변을 만든 뒤 complete_outcome()으로 마무리한다)
+    """
+    scope = answer_cache.scope_of(group_id, document_id)
+    quick_key = quick_normalize(question)
+
+    started = time.perf_counter()
+    version = await aindex_version(db, user_id)
+    cached = answer_cache.get(user_id, scope, version, quick_key)
+    if cached is not None:
+        answer_cache.record_lookup(hit=True)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        return RagOutcome(
+            answer=cached.answer,
+            status=cached.status,
+            hits=list(cached.hits),
+            normalized=cached.normalized,
+            keywords=list(cached.keywords),
+            stages=StageRun(timings={"cache": elapsed_ms}, total_ms=elapsed_ms),
+            cache_hit=True,
+            cache_scope=scope,
+            cache_version=version,
         )
 
-        if payload.group_id:
-            group = db.get(DocumentGroup, payload.group_id)
-            if not group or group.user_id != current_user.id:
-                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Group not found")
-            persona_prompt = group.persona_prompt
+    async def _embed(ctx):
+        return await embed_query(question)
+
+    async def _search(ctx):
+        return await vector_search(
+            query_vector=ctx["embed"],
+            user_id=user_id,
+            group_id=group_id,
+            document_id=document_id,
+            top_k=top_k,
+            query_text=question,
+        )
 
-        if search_result.hits:
-            status_str = "SUCCESS"
-            primary_document_id = search_result.hits[0].document_id
-        else:
-            status_str = "NO_ANSWER"
+    async def _persona(ctx):
+        return await load_persona() if load_persona else None
+
+    def _semantic_key(normalized: Optional[str]) -> Optional[str]:
+        # LLM이 없거나 실패하면 normalize_question_semantic은 quick_key와 같은 값을 돌려준다.
+        return normalized if normalized and normalized != quick_key else None
+
+    async def _cache(ctx):
+        return answer_cache.get(user_id, scope, version, _semantic_key(ctx["normalize"]))
+
+    async def _context(ctx):
+        return build_context(ctx["search"].hits)
 
-        answer = await call_chat_model(payload.question, search_result.hits, persona_prompt)
-        if status_str == "SUCCESS" and _looks_no_answer(answer):
-            status_str = "NO_ANSWER"
-    except HTTPException:
+    usage = ChatStreamUsage()
+
+    async def _answer(ctx):
+        if ctx["cache"] is not None:
+            return ctx["cache"].answer
+        return await call_chat_model(question, ctx["context"], ctx["persona"], usage)
+
+    async def _normalize(ctx):
+        try:
+            return await normalize_question_semantic(question)
+        except Exception as e:
+            logger.exception("run_rag_pipeline: normalize_question_semantic 예외 발생", exc_info=e)
+            return None
+
+    async def _keywords(ctx):
+        normalized = ctx["normalize"]
+        return extract_keywords_for_cloud(question, normalized) if normalized else []
+
+    stages = [
+        Stage("embed", _embed),
+        Stage("search", _search, after=("embed",)),
+        Stage("context", _context, after=("search",)),
+        Stage("persona", _persona),
+        Stage("normalize", _normalize),
+        Stage("cache", _cache, after=("normalize",)),
+        Stage("keywords", _keywords, after=("normalize",)),
+    ]
+    if generate_answer:
+        stages.append(Stage("answer", _answer, after=("context", "persona", "cache")))
+    graph = StageGraph(stages)
+    run = await graph.run({"question": question})
+
+    error = run.first_error()
+    if isinstance(error, HTTPException):
         # FastAPI HTTPException 그대로 전달
-        raise
-    except Exception as e:
-        logger.exception("chat_with_rag: 검색/LLM 처리 중 예외 발생", exc_info=e)
-        answer = "죄송합니다. 답변을 생성하는 중 오류가 발생했습니다."
-        status_str = "ERROR"
+        raise error
+
+    search_result: VectorSearchResponse | None = run.results.get("search")
+    hits = search_result.hits if search_result else []
+    normalized = run.results.get("normalize")
+    keywords = run.results.get("keywords") or []
+    semantic_hit: CachedAnswer | None = run.results.get("cache")
+    answer_cache.record_lookup(hit=semantic_hit is not None)
+
+    outcome = RagOutcome(
+        answer="",
+        status="SUCCESS" if hits else "NO_ANSWER",
+        hits=hits,
+        normalized=normalized,
+        keywords=keywords,
+        stages=run,
+        cache_hit=semantic_hit is not None,
+        persona_prompt=run.results.get("persona"),
+        cache_scope=scope,
+        cache_version=version,
+        cache_keys=[quick_key, _semantic_key(normalized)],
+        context=run.results.get("context"),
+    )
+
+    if semantic_hit is not None:
+        outcome.answer = semantic_hit.answer
+        outcome.status = semantic_hit.status
+        outcome.hits = list(semantic_hit.hits)
+    elif error is not None:
+        logger.exception("run_rag_pipeline: 검색/LLM 처리 중 예외 발생", exc_info=error)
+        outcome.answer = "죄송합니다. 답변을 생성하는 중 오류가 발생했습니다."
+        outcome.status = "ERROR"
+    elif generate_answer:
+        outcome.record_usage(usage)
+        complete_outcome(outcome, user_id, run.results["answer"])
+
+    logger.info("run_rag_pipeline timings: %s", run.server_timing())
+    return outcome
+
+
+def _qa_log_record(
+    *,
+    user_id: UUID,
+    document_id: Optional[str | UUID],
+    link_id: Optional[str],
+    question: str,
+    outcome: RagOutcome,
+) -> QALogRecord:
+    return QALogRecord(
+        user_id=user_id,
+        document_id=UUID(str(document_id)) if document_id else None,
+        link_id=link_id,
+        question=question,
+        answer=outcome.answer,
+        status=outcome.status,
+        normalized_question=outcome.normalized,
+        model=outcome.model,
+        prompt_tokens=outcome.prompt_tokens,
+        completion_tokens=outcome.completion_tokens,
+        context_tokens_saved=outcome.context_tokens_saved,
+        latency_ms=outcome.latency_ms,
+        cache_hit=outcome.cache_hit,
+        keywords=list(outcome.keywords),
+    )
+
 
+async def save_qa_log(
+    *,
+    user_id: UUID,
+    document_id: Optional[str | UUID],
+    link_id: Optional[str],
+    question: str,
+    outcome: RagOutcome,
+) -> None:
+    """
+    QA 로그 + 키워드를 QA 로그 writer 버퍼에 넣는다. (best-effort, 응답 전송 후 BackgroundTasks에서 실행)
+    링크 접근 카운트와 링크 소유자의 대시보드 집계는 writer가 배치로 같이 갱신한다. (app.services.qa_log_writer)
+    버퍼가 가득 차면 자리가 날 때까지 기다린다.
+    """
+    await qa_log_writer.put(
+        _qa_log_record(user_id=user_id, document_id=document_id, link_id=link_id, question=question, outcome=outcome)
+    )
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+async def stream_rag_events(
+    outcome: RagOutcome,
+    *,
+    question: str,
+    user_id: UUID,
+    log_document_id: Optional[str | UUID],
+    link_id: Optional[str],
+) -> AsyncIterator[str]:
+    """
+    SSE 이벤트 스트림: sources → token* → done (실패 시 error → done).
+    스트림이 끝나면(클라이언트가 끊어도) 조립된 답변으로 상태를 판정하고 QA 로그를 남긴다.
+    """
+    yield _sse(
+        "sources",
+        {
+            "question": question,
+            "sources": [src.model_dump() for src in _to_sources(outcome.hits)],
+            "cached": outcome.cache_hit,
+        },
+    )
+
+    started = time.perf_counter()
+    parts: List[str] = []
+    finished = False
     try:
-        normalized = await normalize_question_semantic(payload.question)
-    except Exception as e:
-        logger.exception("chat_with_rag: normalize_question_semantic 예외 발생", exc_info=e)
-        normalized = None
+        if outcome.cache_hit or outcome.status == "ERROR":
+            yield _sse("token", {"delta": outcome.answer})
+        else:
+            usage = ChatStreamUsage()
+            context = outcome.context or build_context(outcome.hits)
+            try:
+                async for delta in call_chat_model_stream(question, context, outcome.persona_prompt, usage):
+                    parts.append(delta)
+                    yield _sse("token", {"delta": delta})
+                complete_outcome(outcome, user_id, "".join(parts))
+            except Exception as e:
+                logger.exception("stream_rag_events: LLM 스트리밍 중 예외 발생", exc_info=e)
+                outcome.answer = "".join(parts) or "죄송합니다. 답변을 생성하는 중 오류가 발생했습니다."
+                outcome.status = "ERROR"
+                detail = e.detail if isinstance(e, HTTPException) else "stream failed"
+                yield _sse("error", {"detail": detail})
+            outcome.record_usage(usage)
+        yield _sse("done", {"status": outcome.status, "answer": outcome.answer})
+        finished = True
+    finally:
+        if not finished and not outcome.answer:
+            # 클라이언트가 중간에 끊은 경우: 받은 만큼만 기록
+            outcome.answer = "".join(parts) or "(stream aborted)"
+            outcome.status = "ERROR"
+        outcome.extra_ms = (time.perf_counter() - started) * 1000
+        # 취소된 제너레이터 안에서는 await 할 수 없으므로 기다리지 않고 버퍼에 넣는다
+        qa_log_writer.submit(
+            _qa_log_record(
+                user_id=user_id,
+                document_id=log_document_id,
+                link_id=link_id,
+                question=question,
+                outcome=outcome,
+            )
+        )
 
-    sources: List[ChatSource] = [
+
+def _to_sources(hits: List[SearchHit]) -> List[ChatSource]:
+    return [
         ChatSource(
             id=h.id,
             title=h.title,
@@ -214,57 +588,131 @@ async def chat_with_rag(
             chunk_id=h.chunk_id,
             score=h.score,
         )
-        for h in (search_result.hits if search_result else [])
+        for h in hits
     ]
 
-    # QA 로그 저장 (best-effort)
-    try:
-        qa_log = QALog(
-            user_id=current_user.id,
-            document_id=primary_document_id,
-            link_id=None,
-            question=payload.question,
-            answer=answer,
-            status=status_str,
-            normalized_question=normalized,
-        )
-        db.add(qa_log)
-        db.commit()
-        # 키워드 저장 (best-effort)
-        if normalized:
-            keywords = extract_keywords_for_cloud(payload.question, normalized)
-            for kw in keywords:
-                db.add(QAKetword(qa_log_id=qa_log.id, keyword=kw))
-            db.commit()
-    except Exception as e:
-        logger.exception("chat_with_rag: qa_log 저장 중 예외 발생 - rollback 수행", exc_info=e)
-        try:
-            db.rollback()
-        except Exception as rollback_err:
-            logger.exception("chat_with_rag: rollback 실패", exc_info=rollback_err)
 
-    return ChatResponse(question=payload.question, answer=answer, sources=sources)
+@router.post("/rag", response_model=ChatResponse)
+async def chat_with_rag(
+    payload: ChatRequest,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    current_user: UserPrincipal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """RAG chat: embed query, vector search, call chat model."""
+
+    async def load_persona() -> Optional[str]:
+        if not payload.group_id:
+            return None
+        group = await db.get(DocumentGroup, payload.group_id)
+        if not group or group.user_id != current_user.id:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Group not found")
+        return group.persona_prompt
+
+    outcome = await run_rag_pipeline(
+        question=payload.question,
+        user_id=current_user.id,
+        db=db,
+        group_id=payload.group_id,
+        document_id=None,
+        top_k=payload.top_k,
+        load_persona=load_persona,
+    )
+    response.headers["Server-Timing"] = outcome.stages.server_timing()
+
+    # QA 로그 저장은 응답 이후로 미룬다 (best-effort)
+    background_tasks.add_task(
+        save_qa_log,
+        user_id=current_user.id,
+        document_id=outcome.primary_document_id,
+        link_id=None,
+        question=payload.question,
+        outcome=outcome,
+    )
+
+    return ChatResponse(question=payload.question, answer=outcome.answer, sources=_to_sources(outcome.hits))
+
+
+@router.post("/rag/stream")
+async def chat_with_rag_stream(
+    payload: ChatRequest,
+    current_user: UserPrincipal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """RAG chat (SSE): 출처를 먼저 보내고 답변 토큰을 생성되는 대로 보낸다."""
+
+    async def load_persona() -> Optional[str]:
+        if not payload.group_id:
+            return None
+        group = await db.get(DocumentGroup, payload.group_id)
+        if not group or group.user_id != current_user.id:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Group not found")
+        return group.persona_prompt
+
+    outcome = await run_rag_pipeline(
+        question=payload.question,
+        user_id=current_user.id,
+        db=db,
+        group_id=payload.group_id,
+        document_id=None,
+        top_k=payload.top_k,
+        load_persona=load_persona,
+        generate_answer=False,
+    )
+    headers = {**SSE_HEADERS, "Server-Timing": outcome.stages.server_timing()}
+    events = stream_rag_events(
+        outcome,
+        question=payload.question,
+        user_id=current_user.id,
+        log_document_id=outcome.primary_document_id,
+        link_id=None,
+    )
+    return StreamingResponse(events, media_type="text/event-stream", headers=headers)
+
+
+CHAT_LOG_FIELDS = tuple(ChatLogRead.model_fields)
 
 
 @router.get("/logs", response_model=List[ChatLogRead])
 def list_chat_logs(
+    response: Response,
+    cursor: Optional[str] = Query(None, description="이전 응답의 X-Next-Cursor"),
+    limit: int = Query(settings.list_page_default, ge=1, le=settings.list_page_max),
+    fields: Optional[str] = Query(None, description="쉼표로 구분한 필드만 돌려준다. 예: id,question"),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_token_principal),
+):
+    """내 채팅 기록 (오래된 순). 다음 페이지가 있으면 X-Next-Cursor 헤더로 커서를 준다."""
+    selected = parse_fields(fields, CHAT_LOG_FIELDS)
+    query = db.query(*entities(QALog, selected)).filter(
+        QALog.user_id == current_user.id,
+        QALog.link_id.is_(None),
+    )
+    logs, next_cursor = keyset_page(query, QALog, cursor, limit, descending=False)
+    return page_response(response, logs, next_cursor, selected)
+
+
+@router.get("/logs/export")
+def export_chat_logs(
+    fields: Optional[str] = Query(None, description="쉼표로 구분한 필드만 내보낸다. 예: id,question,created_at"),
+    current_user: UserPrincipal = Depends(get_token_principal),
 ):
-    logs = (
-        db.query(QALog)
-        .filter(QALog.user_id == current_user.id)
-        .filter(QALog.link_id.is_(None))
-        .order_by(QALog.created_at.asc())
-        .all()
+    """내 채팅 기록 전체를 NDJSON(한 줄에 로그 하나, 오래된 순)으로 내려받는다."""
+    return ndjson_export(
+        QALog,
+        [QALog.user_id == current_user.id, QALog.link_id.is_(None)],
+        parse_fields(fields, CHAT_LOG_FIELDS),
+        lambda log: ChatLogRead.model_validate(log).model_dump(mode="json"),
+        "chat-logs.ndjson",
+        descending=False,
     )
-    return logs
 
 
 @router.delete("/logs", status_code=status.HTTP_204_NO_CONTENT)
 def delete_chat_logs(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
 ):
     db.query(QALog).filter(
         QALog.user_id == current_user.id,
@@ -1,11 +1,15 @@
-from typing import Annotated
+from typing import Annotated, Any, AsyncIterator, Dict, Tuple
+from uuid import UUID
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.db import SessionLocal
-from app.core.security import decode_access_token
+from app.core.auth_cache import UserPrincipal, principal_cache
+from app.core.config import settings
+from app.core.db import AsyncSessionLocal, SessionLocal
+from app.core.security import decode_access_token_payload
 from app.models.user import User
 
 
@@ -16,30 +20,92 @@ def get_db() -> Session:
     finally:
         db.close()
 
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """async 라우트용 세션. (sync 세션은 이벤트 루프를 막으므로 async def 핸들러에서는 이걸 사용)"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
 # 🔹 여기: OAuth2PasswordBearer 대신 HTTPBearer 사용
 bearer_scheme = HTTPBearer()
 
 
+def _invalid_credentials() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid authentication credentials",
+    )
+
+
+def _decode_credentials(credentials: HTTPAuthorizationCredentials) -> Tuple[UUID, Dict[str, Any]]:
+    token = credentials.credentials  # Authorization 헤더에서 Bearer 뒤 토큰만 추출
+
+    payload = decode_access_token_payload(token)
+    if not payload or not payload.get("sub"):
+        raise _invalid_credentials()
+    try:
+        return UUID(str(payload["sub"])), payload
+    except ValueError:
+        raise _invalid_credentials()
+
+
+def _user_not_found() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="User not found",
+    )
+
+
 def get_current_user(
     credentials: Annotated[HTTPAuthorizationCredentials, Depends(bearer_scheme)],
     db: Annotated[Session, Depends(get_db)],
-) -> User:
-    token = credentials.credentials  # Authorization 헤더에서 Bearer 뒤 토큰만 추출
+) -> UserPrincipal:
+    user_id, payload = _decode_credentials(credentials)
 
-    user_id = decode_access_token(token)
-    if not user_id:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authentication credentials",
-        )
+    # 캐시 hit이면 DB를 건드리지 않는다 (세션은 첫 쿼리 전까지 커넥션을 잡지 않음)
+    cached = principal_cache.get(str(user_id))
+    if cached is not None:
+        return cached
 
     user = db.get(User, user_id)
     if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found",
-        )
+        raise _user_not_found()
+
+    principal = UserPrincipal.from_user(user)
+    principal_cache.set(str(user_id), principal, exp=payload.get("exp"))
+    return principal
 
-    return user
 
+async def get_current_user_async(
+    credentials: Annotated[HTTPAuthorizationCredentials, Depends(bearer_scheme)],
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+) -> UserPrincipal:
+    user_id, payload = _decode_credentials(credentials)
+
+    cached = principal_cache.get(str(user_id))
+    if cached is not None:
+        return cached
 
+    user = await db.get(User, user_id)
+    if not user:
+        raise _user_not_found()
+
+    principal = UserPrincipal.from_user(user)
+    principal_cache.set(str(user_id), principal, exp=payload.get("exp"))
+    return principal
+
+
+def get_token_principal(
+    credentials: Annotated[HTTPAuthorizationCredentials, Depends(bearer_scheme)],
+    db: Annotated[Session, Depends(get_db)],
+) -> UserPrincipal:
+    """
+    읽기 전용 라우트용.
+    auth_trust_token_claims가 켜져 있고 토큰에 email 클레임이 있으면 서명된 클레임만으로
+    사용자를 만든다. (탈퇴/변경은 토큰 만료 전까지 반영되지 않음) 아니면 get_current_user와 같다.
+    """
+    if settings.auth_trust_token_claims:
+        user_id, payload = _decode_credentials(credentials)
+        if payload.get("email"):
+            return UserPrincipal(id=user_id, email=payload["email"], name=payload.get("name"))
+    return get_current_user(credentials, db)
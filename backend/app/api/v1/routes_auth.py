@@ -7,6 +7,7 @@ from sqlalchemy.orm import Session
 from urllib.parse import urlencode
 
 from app.api.v1.deps import get_db, get_current_user
+from app.core.auth_cache import UserPrincipal, principal_cache
 from app.core.security import hash_password, verify_password, create_access_token
 from app.models.user import User
 from app.schemas.auth import SignupRequest, LoginRequest, Token
@@ -15,6 +16,11 @@ from app.schemas.user import UserRead
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
+def _issue_token(user: User) -> str:
+    # 읽기 전용 라우트가 DB 없이 쓸 수 있도록 표시용 클레임을 함께 서명
+    return create_access_token(str(user.id), claims={"email": user.email, "name": user.name})
+
+
 @router.post("/signup", response_model=Token)
 def signup(payload: SignupRequest, db: Session = Depends(get_db)):
     """로컬 회원가입 후 JWT 발급"""
@@ -32,7 +38,7 @@ def signup(payload: SignupRequest, db: Session = Depends(get_db)):
     db.commit()
     db.refresh(user)
 
-    token = create_access_token(str(user.id))
+    token = _issue_token(user)
     return Token(access_token=token)
 
 
@@ -43,12 +49,12 @@ def login(payload: LoginRequest, db: Session = Depends(get_db)):
     if not user or not verify_password(payload.password, user.password_hash):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
-    token = create_access_token(str(user.id))
+    token = _issue_token(user)
     return Token(access_token=token)
 
 
 @router.get("/me", response_model=UserRead)
-def me(current_user: User = Depends(get_current_user)):
+def me(current_user: UserPrincipal = Depends(get_current_user)):
     return current_user
 
 @router.get("/google/login")
@@ -143,9 +149,10 @@ async def google_callback(
             user.provider = "google"
             db.commit()
             db.refresh(user)
+            principal_cache.invalidate(user.id)
 
     # 4) 우리 서비스용 JWT 발급
-    access_token = create_access_token(str(user.id))
+    access_token = _issue_token(user)
 
     # 프론트로 리다이렉트 (토큰은 쿠키로 전달)
     frontend_base = settings.frontend_base_url or "http://localhost:3000"
@@ -1,27 +1,20 @@
 from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.v1.deps import get_db
-from app.api.v1.search_vector import embed_query, vector_search
-from app.api.v1.chat_rag import call_chat_model, _looks_no_answer
-from app.core.question_normalizer import normalize_question_semantic, extract_keywords_for_cloud
+from app.api.v1.deps import get_async_db
+from app.api.v1.chat_rag import SSE_HEADERS, run_rag_pipeline, save_qa_log, stream_rag_events
 from app.models.link import Link
-from app.models.qa_log import QALog
 from app.models.document_group import DocumentGroup
-from app.models.qa_keyword import QAKetword
 from app.schemas.chat import ChatRequest, ChatResponse
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
 
-@router.post("/", response_model=ChatResponse)
-async def ask_via_link(
-    payload: ChatRequest,
-    db: Session = Depends(get_db),
-):
-    link = db.get(Link, payload.link_id)
+async def _get_active_link(db: AsyncSession, link_id: str) -> Link:
+    link = await db.get(Link, link_id)
     if not link or not link.is_active:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -34,56 +27,69 @@ async def ask_via_link(
 
     # TODO: visibility가 "private"인 경우 인증/비밀번호 검증 추가
     # TODO: password_hash 검증 로직 추가 (payload에 password 받는 구조 설계 필요)
+    return link
+
 
-    persona_prompt = None
-    if link.group_id:
-        group = db.get(DocumentGroup, link.group_id)
-        if group:
-            persona_prompt = group.persona_prompt
+async def _run_link_pipeline(db: AsyncSession, link: Link, question: str, generate_answer: bool = True):
+    async def load_persona():
+        if not link.group_id:
+            return None
+        group = await db.get(DocumentGroup, link.group_id)
+        return group.persona_prompt if group else None
 
     # RAG 파이프라인: 링크가 가리키는 단일 문서만 대상으로 검색 (또는 그룹 단위)
-    query_vec = await embed_query(payload.question)
-    search_result = await vector_search(
-        query_vector=query_vec,
+    return await run_rag_pipeline(
+        question=question,
         user_id=link.user_id,
+        db=db,
         group_id=link.group_id,
         document_id=link.document_id if not link.group_id else None,
         top_k=5,
+        load_persona=load_persona,
+        generate_answer=generate_answer,
     )
 
-    status_str = "SUCCESS"
-    if len(search_result.hits) == 0:
-        status_str = "NO_ANSWER"
-
-    answer = await call_chat_model(payload.question, search_result.hits, persona_prompt)
-    if status_str == "SUCCESS" and _looks_no_answer(answer):
-        status_str = "NO_ANSWER"
-
-    # 링크 메타데이터 업데이트
-    link.access_count += 1
-    link.last_accessed_at = datetime.now(timezone.utc)
-
-    # QA 로그 적재 (토큰/latency는 미수집)
-    try:
-        normalized = await normalize_question_semantic(payload.question)
-        qa_log = QALog(
-            user_id=link.user_id,
-            document_id=link.document_id,
-            link_id=link.id,
-            question=payload.question,
-            answer=answer,
-            status=status_str,
-            normalized_question=normalized,
-        )
-        db.add(qa_log)
-        db.commit()
-        # 키워드 저장
-        if normalized:
-            keywords = extract_keywords_for_cloud(payload.question, normalized)
-            for kw in keywords:
-                db.add(QAKetword(qa_log_id=qa_log.id, keyword=kw))
-            db.commit()
-    except Exception:
-        db.rollback()
-
-    return ChatResponse(answer=answer)
+
+@router.post("/", response_model=ChatResponse)
+async def ask_via_link(
+    payload: ChatRequest,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
+):
+    link = await _get_active_link(db, payload.link_id)
+
+    outcome = await _run_link_pipeline(db, link, payload.question)
+    response.headers["Server-Timing"] = outcome.stages.server_timing()
+
+    # QA 로그 적재 + 링크 메타데이터 업데이트는 응답 이후에 처리
+    background_tasks.add_task(
+        save_qa_log,
+        user_id=link.user_id,
+        document_id=link.document_id,
+        link_id=link.id,
+        question=payload.question,
+        outcome=outcome,
+    )
+
+    return ChatResponse(answer=outcome.answer)
+
+
+@router.post("/stream")
+async def ask_via_link_stream(
+    payload: ChatRequest,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """공개 링크 챗봇 (SSE): sources → token* → done"""
+    link = await _get_active_link(db, payload.link_id)
+
+    outcome = await _run_link_pipeline(db, link, payload.question, generate_answer=False)
+    headers = {**SSE_HEADERS, "Server-Timing": outcome.stages.server_timing()}
+    events = stream_rag_events(
+        outcome,
+        question=payload.question,
+        user_id=link.user_id,
+        log_document_id=link.document_id,
+        link_id=link.id,
+    )
+    return StreamingResponse(events, media_type="text/event-stream", headers=headers)
@@ -1,55 +1,47 @@
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Optional
+from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
 
-from app.api.v1.deps import get_current_user, get_db
-from app.models.user import User
+from app.api.v1.deps import get_db, get_token_principal
+from app.core.auth_cache import UserPrincipal
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.dashboard_rollup import QADailyCount, QAFailedQuestion, QAKeywordCount
 from app.models.document import Document
 from app.models.document_group import DocumentGroup
-from app.models.link import Link
 from app.models.qa_log import QALog
-from app.models.qa_keyword import QAKetword
+from app.services.dashboard_rollups import dashboard_version
 
 router = APIRouter(prefix="/dashboard", tags=["dashboard"])
 
+# (owner_id, 대시보드 버전, 날짜) → 스냅샷. 버전은 DB에서 읽으므로 다른 워커의 변경도 바로 반영된다.
+_snapshots = TTLCache(settings.dashboard_cache_max_entries, settings.dashboard_cache_ttl_seconds)
 
-@router.get("/overview")
-def get_dashboard_overview(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-):
-    owner_id = current_user.id
 
-    owner_logs_subq = (
-        db.query(QALog)
-        .outerjoin(Link, QALog.link_id == Link.id)
-        .filter(QALog.link_id.isnot(None))
-        .filter(Link.user_id == owner_id)
-        .subquery()
-    )
+def _etag(version: int, today: date) -> str:
+    # 최근 30일 창이 날짜에 따라 움직이므로 날짜도 넣는다.
+    return f'"{version}-{today.isoformat()}"'
 
-    keyword_rows = (
-        db.query(
-            QAKetword.keyword,
-            func.count().label("cnt"),
-        )
-        .join(owner_logs_subq, owner_logs_subq.c.id == QAKetword.qa_log_id)
-        .group_by(QAKetword.keyword)
-        .order_by(func.count().desc())
-        .limit(50)
-        .all()
-    )
-    keywords = [{"keyword": kw, "count": cnt} for kw, cnt in keyword_rows]
+
+def _build_overview(db: Session, owner_id: UUID, today: date, since: Optional[int] = None) -> Dict[str, Any]:
+    """
+    집계 테이블에서 대시보드를 만든다. since가 있으면 그 버전 이후 바뀐 집계 행만 담는다.
+    (최근 질문/문서는 몇 행뿐이라 항상 전체를 담는다)
+    """
+    keyword_query = db.query(QAKeywordCount.keyword, QAKeywordCount.count).filter(QAKeywordCount.owner_id == owner_id)
+    if since is not None:
+        keyword_query = keyword_query.filter(QAKeywordCount.version > since)
+    else:
+        keyword_query = keyword_query.order_by(QAKeywordCount.count.desc()).limit(50)
+    keywords = [{"keyword": kw, "count": cnt} for kw, cnt in keyword_query.all()]
 
     recent_rows = (
-        db.query(
-            owner_logs_subq.c.id,
-            owner_logs_subq.c.question,
-            owner_logs_subq.c.created_at,
-        )
-        .order_by(owner_logs_subq.c.created_at.desc())
+        db.query(QALog.id, QALog.question, QALog.created_at)
+        .filter(QALog.owner_id == owner_id)
+        .order_by(QALog.created_at.desc())
         .limit(10)
         .all()
     )
@@ -82,40 +74,35 @@ def get_dashboard_overview(
         for doc in doc_rows
     ]
 
-    thirty_days_ago = datetime.utcnow().date() - timedelta(days=29)
-    chat_day_rows = (
-        db.query(
-            func.date(owner_logs_subq.c.created_at).label("day"),
-            func.count().label("count"),
-        )
-        .filter(owner_logs_subq.c.created_at >= thirty_days_ago)
-        .group_by(func.date(owner_logs_subq.c.created_at))
-        .order_by(func.date(owner_logs_subq.c.created_at))
-        .all()
+    thirty_days_ago = today - timedelta(days=29)
+    day_query = db.query(QADailyCount.day, QADailyCount.count, QADailyCount.cache_hits).filter(
+        QADailyCount.owner_id == owner_id, QADailyCount.day >= thirty_days_ago
     )
-    daily_counts = [{"date": row.day.isoformat(), "count": row.count} for row in chat_day_rows]
-
-    fail_rows = (
-        db.query(
-            owner_logs_subq.c.normalized_question,
-            func.count().label("fail_count"),
-            func.max(owner_logs_subq.c.created_at).label("last_asked_at"),
-            func.min(owner_logs_subq.c.question).label("sample_question"),
-        )
-        .filter(owner_logs_subq.c.status == "NO_ANSWER")
-        .group_by(owner_logs_subq.c.normalized_question)
-        .order_by(func.count().desc())
-        .limit(20)
-        .all()
+    if since is not None:
+        day_query = day_query.filter(QADailyCount.version > since)
+    # 답변 캐시 hit/miss도 이 소유자 링크의 질문만 센다. (miss = count - cache_hits)
+    daily_counts = [
+        {"date": row.day.isoformat(), "count": row.count, "cache_hits": row.cache_hits}
+        for row in day_query.order_by(QADailyCount.day)
+    ]
+
+    fail_query = (
+        db.query(QAFailedQuestion)
+        .filter(QAFailedQuestion.owner_id == owner_id)
+        .order_by(QAFailedQuestion.fail_count.desc())
     )
+    if since is not None:
+        fail_query = fail_query.filter(QAFailedQuestion.version > since)
+    else:
+        fail_query = fail_query.limit(20)
     failed_questions = [
         {
-            "normalized_question": row.normalized_question,
+            "normalized_question": row.normalized_question or None,
             "sample_question": row.normalized_question or row.sample_question,
             "fail_count": row.fail_count,
             "last_asked_at": row.last_asked_at.isoformat() if row.last_asked_at else None,
         }
-        for row in fail_rows
+        for row in fail_query
     ]
 
     return {
@@ -125,3 +112,44 @@ def get_dashboard_overview(
         "daily_counts": daily_counts,
         "failed_questions": failed_questions,
     }
+
+
+@router.get("/overview")
+def get_dashboard_overview(
+    response: Response,
+    since: int | None = Query(None, ge=0, description="이전 응답의 version. 그 이후 바뀐 집계만 돌려준다."),
+    if_none_match: str | None = Header(None),
+    db: Session = Depends(get_db),
+    current_user: UserPrincipal = Depends(get_token_principal),
+):
+    """
+    링크 소유자의 대시보드. 키워드/일별 질문 수/실패 질문은 QA 로그 저장 시 갱신되는 집계 테이블만 읽으므로
+    로그가 아무리 쌓여도 조회 비용이 일정하다. (app.services.dashboard_rollups)
+
+    - 소유자의 QA 로그/문서가 바뀔 때마다 올라가는 대시보드 버전을 ETag로 쓴다.
+      바뀐 게 없으면 버전 조회 한 번으로 304를 돌려준다.
+    - since=<version>이면 delta=true로 그 이후 바뀐 키워드/일별 수/실패 질문 행만 준다.
+      클라이언트는 키(keyword/date/normalized_question)별로 덮어쓴 뒤 정렬/자르기를 다시 한다.
+      since가 너무 오래됐으면 전체 스냅샷(delta=false)을 준다.
+    """
+    owner_id = current_user.id
+    today = datetime.utcnow().date()
+    version = dashboard_version(db, owner_id)
+    etag = _etag(version, today)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+
+    if if_none_match and etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=dict(response.headers))
+
+    delta = since is not None and since <= version and version - since <= settings.dashboard_delta_max_versions
+    if delta:
+        body = _build_overview(db, owner_id, today, since)
+    else:
+        key = (str(owner_id), version, today)
+        body = _snapshots.get(key)
+        if body is None:
+            body = _build_overview(db, owner_id, today)
+            _snapshots.set(key, body)
+
+    return {**body, "version": version, "delta": delta}
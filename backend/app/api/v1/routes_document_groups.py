@@ -1,18 +1,19 @@
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
-from app.api.v1.deps import get_db, get_current_user
-from app.api.v1.routes_documents import delete_document_internal
+from app.api.v1.deps import get_db, get_current_user, get_token_principal
+from app.api.v1.routes_documents import delete_documents_internal
+from app.core.auth_cache import UserPrincipal
 from app.models.document_group import DocumentGroup
 from app.models.document import Document
-from app.models.user import User
 from app.schemas.document_group import (
     DocumentGroupCreate,
     DocumentGroupUpdate,
     DocumentGroupRead,
 )
+from app.services.answer_cache import bump_index_version
 from app.services.blob_storage import get_blob_container_client
 from azure.storage.blob import ContainerClient
 
@@ -22,7 +23,7 @@ router = APIRouter(prefix="/document-groups", tags=["document_groups"])
 @router.get("/", response_model=list[DocumentGroupRead])
 def list_groups(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_token_principal),
 ):
     return (
         db.query(DocumentGroup)
@@ -36,7 +37,7 @@ def list_groups(
 def create_group(
     payload: DocumentGroupCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
 ):
     group = DocumentGroup(
         user_id=current_user.id,
@@ -55,7 +56,7 @@ def update_group(
     group_id: UUID,
     payload: DocumentGroupUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
 ):
     group = db.get(DocumentGroup, group_id)
     if not group or group.user_id != current_user.id:
@@ -67,6 +68,8 @@ def update_group(
         group.description = payload.description
     if payload.persona_prompt is not None:
         group.persona_prompt = payload.persona_prompt
+        # 페르소나가 바뀌면 캐시된 답변 톤도 달라져야 한다
+        bump_index_version(db, current_user.id)
 
     db.commit()
     db.refresh(group)
@@ -76,8 +79,9 @@ def update_group(
 @router.delete("/{group_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_group(
     group_id: UUID,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     container: ContainerClient = Depends(get_blob_container_client),
 ):
     group = db.get(DocumentGroup, group_id)
@@ -89,8 +93,7 @@ def delete_group(
         .filter(Document.user_id == current_user.id, Document.group_id == group_id)
         .all()
     )
-    for doc in docs:
-        delete_document_internal(db, current_user, doc, container)
+    delete_documents_internal(db, current_user, docs, container, background_tasks)
 
     db.delete(group)
     db.commit()
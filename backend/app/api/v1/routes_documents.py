@@ -1,143 +1,189 @@
+import asyncio
 import logging
-import os
+import mimetypes
 import uuid
-from datetime import datetime
+import zipfile
+from datetime import datetime, timezone
+from email.utils import format_datetime
 from pathlib import Path
-from typing import List, Optional
+from typing import AsyncIterable, AsyncIterator, List, Optional, Sequence, Tuple
+from urllib.parse import quote
 
 import httpx
 from azure.storage.blob import ContainerClient
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, status, Header
-from fastapi.responses import StreamingResponse
+from azure.storage.blob.aio import ContainerClient as AsyncContainerClient
+from fastapi import APIRouter, BackgroundTasks, Depends, File, Form, HTTPException, Query, Request, UploadFile, status, Header
+from fastapi.responses import RedirectResponse, Response, StreamingResponse
+from sqlalchemy import delete as sa_delete
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from uuid import UUID
 from pydantic import BaseModel
 
-from app.api.v1.deps import get_current_user, get_db
+from app.api.v1.deps import get_async_db, get_current_user, get_current_user_async, get_db, get_token_principal
+from app.core.auth_cache import UserPrincipal
 from app.core.config import settings
+from app.core.http_clients import N8N, get_async_client
+from app.core.pagination import entities, keyset_page, ndjson_export, page_response, parse_fields
 from app.models.document import Document, DocumentStatus
-from app.models.document_group import DocumentGroup
-from app.models.user import User
-from app.schemas.document import DocumentIndexCallback, DocumentRead
+from app.models.index_job import PRIORITY_INTERACTIVE
+from app.schemas.document import (
+    BatchUploadError,
+    BatchUploadResult,
+    DocumentIndexCallback,
+    DocumentRead,
+    UploadSessionComplete,
+    UploadSessionRead,
+)
+from app.services.answer_cache import abump_index_version, bump_index_version
+from app.services.blob_objects import release_blob_objects
 from app.services.blob_storage import (
-    delete_blob,
+    UploadResult,
+    async_blob_container,
+    commit_blocks,
+    delete_blobs,
     download_blob,
+    generate_download_url,
     get_blob_container_client,
-    upload_blob,
+    get_blob_info,
+    hash_blob,
+    list_staged_blocks,
+    stage_block,
+)
+from app.services import index_queue
+from app.services.dashboard_rollups import abump_dashboard_version, bump_dashboard_version
+from app.services.index_maintenance import move_documents, purge_documents
+from app.services.index_queue import enqueue_index_job, has_active_job
+from app.services.indexing import clear_manifest, index_document
+from app.services.uploads import (
+    PendingUpload,
+    max_upload_bytes,
+    register_uploads,
+    safe_file_name,
+    start_indexing,
+    too_large,
+    upload_file,
+    validate_group,
 )
 
 router = APIRouter(prefix="/documents", tags=["documents"])
 logger = logging.getLogger(__name__)
 
+ZIP_MIME_TYPES = {"application/zip", "application/x-zip-compressed"}
+
 
 class DocumentMoveGroup(BaseModel):
     group_id: UUID | None = None
 
 
-def delete_from_search_index(document: Document) -> None:
-    """Best-effort delete of all chunks belonging to the document from Azure AI Search."""
-    if not settings.azure_search_endpoint or not settings.azure_search_admin_key or not settings.azure_search_index_name:
-        logger.warning("Azure Search config missing, skipping index delete for %s", document.id)
+def delete_documents_internal(
+    db: Session,
+    current_user: UserPrincipal,
+    documents: Sequence[Document],
+    container: ContainerClient,
+    background_tasks: BackgroundTasks,
+) -> None:
+    """
+    Delete documents: DB rows, blobs, then search index in the background. No HTTPExceptions raised here.
+    공유 blob(blob_objects)은 마지막 참조가 사라질 때만 지운다. 문서 수와 상관없이 DB는 한 트랜잭션, blob은 배치 삭제.
+    """
+    if not documents:
         return
+    ids = [doc.id for doc in documents]
+    # 커밋 뒤에는 지워진 행을 읽을 수 없으므로 미리 꺼내 둔다.
+    owned = [(doc.content_hash, doc.blob_path) for doc in documents]
+    managed, orphans = release_blob_objects(db, [content_hash for content_hash, _ in owned])
+    db.execute(sa_delete(Document).where(Document.id.in_(ids)).execution_options(synchronize_session=False))
+    bump_dashboard_version(db, current_user.id)
+    bump_index_version(db, current_user.id)
+    for doc in documents:
+        db.expunge(doc)
+    db.commit()
 
-    search_url = (
-        f"{settings.azure_search_endpoint}/indexes/{settings.azure_search_index_name}"
-        "/docs/search?api-version=2023-11-01"
-    )
-    headers = {
-        "Content-Type": "application/json",
-        "api-key": settings.azure_search_admin_key,
-    }
-    filter_expr = f"document_id eq '{document.id}'"
-    try:
-        with httpx.Client(timeout=10.0) as client:
-            resp = client.post(search_url, headers=headers, json={"filter": filter_expr, "select": "id", "top": 1000})
-            resp.raise_for_status()
-            data = resp.json()
-            ids = [doc.get("id") for doc in data.get("value", []) if doc.get("id")]
-            if not ids:
-                return
-            delete_url = (
-                f"{settings.azure_search_endpoint}/indexes/{settings.azure_search_index_name}"
-                "/docs/index?api-version=2023-11-01"
-            )
-            payload = {"value": [{"@search.action": "delete", "id": doc_id} for doc_id in ids]}
-            resp2 = client.post(delete_url, headers=headers, json=payload)
-            resp2.raise_for_status()
-    except Exception as exc:  # noqa: BLE001
-        logger.warning("Failed to delete search documents for %s: %s", document.id, exc)
+    # DB 커밋 뒤에 지운다. (중간에 실패하면 참조 없는 blob이 남을 뿐, 없는 blob을 가리키는 문서는 생기지 않는다)
+    blob_paths = orphans + [path for content_hash, path in owned if content_hash not in managed and path]
+    failed = delete_blobs(container, blob_paths)
+    if failed:
+        logger.warning("Failed to delete %d blobs of deleted documents: %s", len(failed), failed[:10])
 
+    # 검색 인덱스 정리는 응답 뒤에 문서 묶음 단위로 한다. (청크 수가 많아도 전부 페이지를 넘겨 지운다)
+    background_tasks.add_task(purge_documents, current_user.id, ids)
 
-def update_search_group(document: Document, group_id: Optional[UUID]) -> None:
-    """Best-effort update of group_id for all indexed chunks of the document."""
-    if not settings.azure_search_endpoint or not settings.azure_search_admin_key or not settings.azure_search_index_name:
-        logger.warning("Azure Search config missing, skipping index update for %s", document.id)
-        return
 
-    search_url = (
-        f"{settings.azure_search_endpoint}/indexes/{settings.azure_search_index_name}"
-        "/docs/search?api-version=2023-11-01"
-    )
-    headers = {
-        "Content-Type": "application/json",
-        "api-key": settings.azure_search_admin_key,
-    }
-    filter_expr = f"document_id eq '{document.id}'"
-    try:
-        with httpx.Client(timeout=10.0) as client:
-            resp = client.post(search_url, headers=headers, json={"filter": filter_expr, "select": "id", "top": 1000})
-            resp.raise_for_status()
-            data = resp.json()
-            ids = [doc.get("id") for doc in data.get("value", []) if doc.get("id")]
-            if not ids:
-                return
-            update_url = (
-                f"{settings.azure_search_endpoint}/indexes/{settings.azure_search_index_name}"
-                "/docs/index?api-version=2023-11-01"
-            )
-            payload = {
-                "value": [
-                    {
-                        "@search.action": "merge",
-                        "id": doc_id,
-                        "group_id": str(group_id) if group_id else None,
-                    }
-                    for doc_id in ids
-                ]
-            }
-            resp2 = client.post(update_url, headers=headers, json=payload)
-            resp2.raise_for_status()
-    except Exception as exc:  # noqa: BLE001
-        logger.warning("Failed to update search group for %s: %s", document.id, exc)
-
-
-def delete_document_internal(db: Session, current_user: User, document: Document, container: ContainerClient) -> None:
-    """
-    Delete a document: blob, search index, DB row. No HTTPExceptions raised here.
-    """
-    try:
-        delete_blob(container, document.blob_path)
-    except RuntimeError:
-        logger.warning("Failed to delete blob for document %s", document.id)
+def delete_document_internal(
+    db: Session,
+    current_user: UserPrincipal,
+    document: Document,
+    container: ContainerClient,
+    background_tasks: BackgroundTasks,
+) -> None:
+    delete_documents_internal(db, current_user, [document], container, background_tasks)
 
-    delete_from_search_index(document)
 
-    db.delete(document)
-    db.commit()
+DOCUMENT_FIELDS = tuple(DocumentRead.model_fields)
 
 
 @router.get("/", response_model=List[DocumentRead])
 def list_my_documents(
+    response: Response,
+    cursor: Optional[str] = Query(None, description="이전 응답의 X-Next-Cursor"),
+    limit: int = Query(settings.list_page_default, ge=1, le=settings.list_page_max),
+    fields: Optional[str] = Query(None, description="쉼표로 구분한 필드만 돌려준다. 예: id,title,status"),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_token_principal),
 ):
-    docs = (
-        db.query(Document)
-        .filter(Document.user_id == current_user.id)
-        .order_by(Document.created_at.desc())
-        .all()
+    """내 문서 (최신 순). 다음 페이지가 있으면 X-Next-Cursor 헤더로 커서를 준다."""
+    selected = parse_fields(fields, DOCUMENT_FIELDS)
+    query = db.query(*entities(Document, selected)).filter(Document.user_id == current_user.id)
+    docs, next_cursor = keyset_page(query, Document, cursor, limit)
+    return page_response(response, docs, next_cursor, selected)
+
+
+@router.get("/export")
+def export_my_documents(
+    fields: Optional[str] = Query(None, description="쉼표로 구분한 필드만 내보낸다."),
+    current_user: UserPrincipal = Depends(get_token_principal),
+):
+    """내 문서 목록 전체를 NDJSON(한 줄에 문서 하나, 최신 순)으로 내려받는다."""
+    return ndjson_export(
+        Document,
+        [Document.user_id == current_user.id],
+        parse_fields(fields, DOCUMENT_FIELDS),
+        lambda doc: DocumentRead.model_validate(doc).model_dump(mode="json"),
+        "documents.ndjson",
     )
-    return docs
+
+
+async def _read_upload(file: UploadFile, block_size: int) -> AsyncIterator[bytes]:
+    while True:
+        data = await file.read(block_size)
+        if not data:
+            return
+        yield data
+
+
+async def store_upload(
+    db: AsyncSession,
+    container: AsyncContainerClient,
+    current_user: UserPrincipal,
+    chunks: AsyncIterable[bytes],
+    file_name: Optional[str],
+    content_type: Optional[str],
+    title: Optional[str],
+    group_id: Optional[UUID],
+) -> Document:
+    """
+    업로드 스트림을 blob으로 흘려보내고(블록 병렬 업로드, 크기 제한/sha256은 흐르는 동안 계산) Document를 만든다.
+    같은 내용(sha256)이 이미 있으면 방금 올린 blob은 지우고 공유 blob을 참조한다.
+    """
+    await validate_group(db, current_user.id, group_id)
+    pending = await upload_file(container, current_user.id, chunks, file_name, content_type, title)
+    (document,) = await register_uploads(db, container, current_user.id, group_id, [pending])
+
+    if settings.index_on_upload:
+        # 대량 업로드가 사용자가 직접 누른 재인덱싱을 밀어내지 않도록 낮은 우선순위로 넣는다.
+        await start_indexing(db, [document])
+    return document
 
 
 @router.post("/upload", response_model=DocumentRead, status_code=status.HTTP_201_CREATED)
@@ -145,103 +191,382 @@ async def upload_document(
     file: UploadFile = File(...),
     title: str | None = Form(None),
     group_id: UUID | None = Form(None),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-    container: ContainerClient = Depends(get_blob_container_client),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserPrincipal = Depends(get_current_user_async),
+    container: AsyncContainerClient = Depends(async_blob_container),
 ):
-    safe_name = Path(file.filename or "upload.bin").name
-    doc_id = uuid.uuid4()
-    blob_path = f"{current_user.id}/{doc_id}/original/{safe_name}"
+    chunks = _read_upload(file, settings.blob_upload_block_size)
+    return await store_upload(
+        db, container, current_user, chunks, file.filename, file.content_type, title, group_id
+    )
+
+
+@router.put("/upload/stream", response_model=DocumentRead, status_code=status.HTTP_201_CREATED)
+async def upload_document_stream(
+    request: Request,
+    name: str,
+    title: str | None = None,
+    group_id: UUID | None = None,
+    content_length: int | None = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserPrincipal = Depends(get_current_user_async),
+    container: AsyncContainerClient = Depends(async_blob_container),
+):
+    """
+    요청 본문이 곧 파일인 업로드 (multipart 아님). 본문을 디스크에 모으지 않고 바로 blob 블록으로 흘려보낸다.
+    파일 이름은 ?name=, MIME 타입은 Content-Type 헤더로 받는다.
+    """
+    if settings.max_upload_size_mb and content_length and content_length > settings.max_upload_size_mb * 1024 * 1024:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File too large (>{settings.max_upload_size_mb}MB)",
+        )
+    content_type = request.headers.get("content-type")
+    return await store_upload(
+        db, container, current_user, request.stream(), name, content_type, title, group_id
+    )
 
-    if group_id:
-        group = db.get(DocumentGroup, group_id)
-        if not group or group.user_id != current_user.id:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid group_id")
 
+def _zip_members(archive: zipfile.ZipFile) -> List[zipfile.ZipInfo]:
+    """zip 안의 일반 파일만. (디렉터리, macOS 메타데이터, 숨김 파일 제외)"""
+    members = []
+    for info in archive.infolist():
+        name = info.filename
+        parts = Path(name).parts
+        if info.is_dir() or "__MACOSX" in parts or any(part.startswith(".") for part in parts):
+            continue
+        members.append(info)
+    return members
+
+
+async def _read_zip_member(archive: zipfile.ZipFile, info: zipfile.ZipInfo, block_size: int) -> AsyncIterator[bytes]:
+    # 압축 해제는 CPU/디스크 작업이라 스레드에서 돌린다. (크기 제한은 upload_stream이 흐르는 동안 검사)
+    fp = await asyncio.to_thread(archive.open, info)
+    try:
+        while True:
+            data = await asyncio.to_thread(fp.read, block_size)
+            if not data:
+                return
+            yield data
+    finally:
+        fp.close()
+
+
+@router.post("/upload/batch", response_model=BatchUploadResult, status_code=status.HTTP_201_CREATED)
+async def upload_documents_batch(
+    background_tasks: BackgroundTasks,
+    files: List[UploadFile] = File(...),
+    group_id: UUID | None = Form(None),
+    unzip: bool = Form(True),
+    index: bool | None = Form(None),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserPrincipal = Depends(get_current_user_async),
+    container: AsyncContainerClient = Depends(async_blob_container),
+):
+    """
+    여러 파일(zip은 풀어서)을 동시에 blob으로 올리고 Document 행을 한 번에 INSERT, 인덱싱 작업도 한 번에 넣는다.
+    파일 하나가 실패해도 나머지는 등록하고, 실패한 파일은 errors로 돌려준다.
+    """
+    await validate_group(db, current_user.id, group_id)
+    block_size = settings.blob_upload_block_size
+
+    sources = []  # (file_name, content_type, chunks 팩토리)
+    archives: List[zipfile.ZipFile] = []
+    errors: List[BatchUploadError] = []
     try:
-        file.file.seek(0, os.SEEK_END)
-        size_bytes = file.file.tell()
-        file.file.seek(0)
-    except Exception:
-        size_bytes = None
-
-    if settings.max_upload_size_mb and size_bytes is not None:
-        max_bytes = settings.max_upload_size_mb * 1024 * 1024
-        if size_bytes > max_bytes:
+        for file in files:
+            is_zip = (file.content_type in ZIP_MIME_TYPES or (file.filename or "").lower().endswith(".zip"))
+            if unzip and is_zip:
+                try:
+                    archive = await asyncio.to_thread(zipfile.ZipFile, file.file)
+                except zipfile.BadZipFile:
+                    errors.append(BatchUploadError(file_name=file.filename or "", detail="Invalid zip archive"))
+                    continue
+                archives.append(archive)
+                for info in _zip_members(archive):
+                    content_type = mimetypes.guess_type(info.filename)[0]
+                    sources.append((
+                        Path(info.filename).name,
+                        content_type,
+                        lambda a=archive, i=info: _read_zip_member(a, i, block_size),
+                    ))
+            else:
+                sources.append((file.filename, file.content_type, lambda f=file: _read_upload(f, block_size)))
+
+        if len(sources) > settings.max_batch_upload_files:
             raise HTTPException(
                 status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                detail=f"File too large (>{settings.max_upload_size_mb}MB)",
+                detail=f"Too many files (>{settings.max_batch_upload_files})",
             )
 
+        semaphore = asyncio.Semaphore(max(1, settings.blob_batch_upload_concurrency))
+
+        async def _one(file_name: Optional[str], content_type: Optional[str], open_chunks):
+            async with semaphore:
+                return await upload_file(container, current_user.id, open_chunks(), file_name, content_type)
+
+        results = await asyncio.gather(
+            *(_one(name, ctype, opener) for name, ctype, opener in sources), return_exceptions=True
+        )
+    finally:
+        for archive in archives:
+            archive.close()
+
+    pending: List[PendingUpload] = []
+    for (file_name, _, _), result in zip(sources, results):
+        if isinstance(result, HTTPException):
+            errors.append(BatchUploadError(file_name=safe_file_name(file_name), detail=str(result.detail)))
+        elif isinstance(result, BaseException):
+            logger.exception("Batch upload failed for %s", file_name, exc_info=result)
+            errors.append(BatchUploadError(file_name=safe_file_name(file_name), detail="Upload failed"))
+        else:
+            pending.append(result)
+
+    documents = await register_uploads(db, container, current_user.id, group_id, pending)
+    if settings.index_on_upload if index is None else index:
+        await start_indexing(db, documents, background_tasks)
+    return BatchUploadResult(documents=documents, errors=errors)
+
+
+# ------------------------------
+# Resumable upload
+# 세션 상태는 DB에 두지 않는다: blob 경로가 곧 세션이고, 올라간 블록 목록은 Azure에 묻는다.
+# 커밋되지 않은 블록은 Azure가 7일 뒤 지우므로 버려진 세션은 따로 청소하지 않는다.
+# ------------------------------
+def _session_blob_path(user_id: UUID, upload_id: UUID) -> str:
+    return f"uploads/{user_id}/{upload_id}"
+
+
+@router.post("/uploads", response_model=UploadSessionRead, status_code=status.HTTP_201_CREATED)
+async def create_upload_session(
+    current_user: UserPrincipal = Depends(get_current_user_async),
+):
+    return UploadSessionRead(upload_id=uuid.uuid4(), block_size=settings.blob_upload_block_size)
+
+
+@router.get("/uploads/{upload_id}", response_model=UploadSessionRead)
+async def get_upload_session(
+    upload_id: UUID,
+    current_user: UserPrincipal = Depends(get_current_user_async),
+    container: AsyncContainerClient = Depends(async_blob_container),
+):
+    """이미 올라간 블록 번호와 크기. 끊긴 업로드는 여기 없는 블록만 다시 보내면 된다."""
     try:
-        upload_blob(container, blob_path, file.file, content_type=file.content_type)
+        blocks = await list_staged_blocks(container, _session_blob_path(current_user.id, upload_id))
     except RuntimeError as exc:
-        raise HTTPException(
-            status_code=status.HTTP_502_BAD_GATEWAY,
-            detail=str(exc),
-        ) from exc
-
-    document = Document(
-        id=doc_id,
-        user_id=current_user.id,
-        title=title or safe_name,
-        original_file_name=safe_name,
-        mime_type=file.content_type,
-        size_bytes=size_bytes,
-        blob_path=blob_path,
-        source="upload",
-        group_id=group_id,
-        status=DocumentStatus.UPLOADED,
-    )
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(exc)) from exc
+    return UploadSessionRead(upload_id=upload_id, block_size=settings.blob_upload_block_size, blocks=blocks)
 
-    db.add(document)
+
+@router.put("/uploads/{upload_id}/blocks/{block}", status_code=status.HTTP_204_NO_CONTENT)
+async def put_upload_block(
+    upload_id: UUID,
+    block: int,
+    request: Request,
+    current_user: UserPrincipal = Depends(get_current_user_async),
+    container: AsyncContainerClient = Depends(async_blob_container),
+):
+    """블록 하나를 올린다. 같은 번호를 다시 보내면 덮어쓰므로 재시도해도 안전하다."""
+    max_bytes = max_upload_bytes()
+    if block < 0 or (max_bytes and block * settings.blob_upload_block_size >= max_bytes):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid block index")
+
+    buf = bytearray()
+    async for data in request.stream():
+        buf.extend(data)
+        if len(buf) > settings.blob_upload_block_size:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Block too large (>{settings.blob_upload_block_size} bytes)",
+            )
+    if not buf:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Empty block")
     try:
-        db.commit()
-    except Exception:
-        try:
-            container.delete_blob(blob_path, delete_snapshots="include")
-        except Exception:
-            pass
-        db.rollback()
-        raise
+        await stage_block(container, _session_blob_path(current_user.id, upload_id), block, bytes(buf))
+    except RuntimeError as exc:
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(exc)) from exc
 
-    db.refresh(document)
+
+@router.post("/uploads/{upload_id}/complete", response_model=DocumentRead, status_code=status.HTTP_201_CREATED)
+async def complete_upload_session(
+    upload_id: UUID,
+    payload: UploadSessionComplete,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserPrincipal = Depends(get_current_user_async),
+    container: AsyncContainerClient = Depends(async_blob_container),
+):
+    """0..block_count-1 블록을 순서대로 커밋해 파일을 만들고 Document를 등록한다."""
+    await validate_group(db, current_user.id, payload.group_id)
+    blob_path = _session_blob_path(current_user.id, upload_id)
+    try:
+        staged = await list_staged_blocks(container, blob_path)
+        missing = [i for i in range(payload.block_count) if i not in staged]
+        if missing:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail={"message": "Missing blocks", "missing": missing[:100]},
+            )
+        max_bytes = max_upload_bytes()
+        if max_bytes and sum(staged[i] for i in range(payload.block_count)) > max_bytes:
+            raise too_large()
+
+        content_type = payload.content_type or mimetypes.guess_type(payload.file_name)[0]
+        await commit_blocks(container, blob_path, payload.block_count, content_type)
+        sha256, size_bytes = await hash_blob(container, blob_path)
+    except RuntimeError as exc:
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(exc)) from exc
+
+    pending = PendingUpload(
+        doc_id=uuid.uuid4(),
+        file_name=safe_file_name(payload.file_name),
+        title=payload.title,
+        content_type=content_type,
+        blob=UploadResult(blob_path=blob_path, sha256=sha256, size_bytes=size_bytes),
+    )
+    (document,) = await register_uploads(db, container, current_user.id, payload.group_id, [pending])
+    if settings.index_on_upload if payload.index is None else payload.index:
+        await start_indexing(db, [document], background_tasks)
     return document
 
 
+def _content_disposition(file_name: str) -> str:
+    # 한글 파일 이름은 latin-1 헤더에 그대로 못 싣는다: ASCII 대체 이름 + RFC 5987 filename*
+    fallback = file_name.encode("ascii", "replace").decode("ascii").replace("?", "_").replace('"', "_")
+    return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(file_name)}"
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match는 약한 비교: W/ 접두어는 무시한다.
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    "bytes=a-b" / "bytes=a-" / "bytes=-n" 하나만 지원하고 (start, end 포함)를 돌려준다.
+    해석할 수 없거나 여러 구간이면 None (RFC 9110: Range를 무시하고 전체를 보내도 된다).
+    만족할 수 없는 구간이면 416.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        else:
+            if not last:
+                return None
+            start, end = max(size - int(last), 0), size - 1
+    except ValueError:
+        return None
+    if start > end and first and last:
+        return None
+    if start >= size or (not first and int(last) == 0):
+        raise HTTPException(
+            status_code=status.HTTP_416_RANGE_NOT_SATISFIABLE,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, min(end, size - 1)
+
+
 @router.get("/{document_id}/download")
 def download_document(
     document_id: str,
+    range_header: str | None = Header(None, alias="Range"),
+    if_range: str | None = Header(None),
+    if_none_match: str | None = Header(None),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_token_principal),
     container: ContainerClient = Depends(get_blob_container_client),
 ):
+    """
+    원본 다운로드. blob의 ETag로 If-None-Match(304)를, Range로 부분 전송(206)을 지원한다.
+    BLOB_DOWNLOAD_REDIRECT_MIN_BYTES 이상인 파일은 단기 SAS URL로 리다이렉트해서 워커를 거치지 않는다.
+    """
     doc = db.get(Document, document_id)
     if not doc or doc.user_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Document not found")
 
+    content_type = doc.mime_type or "application/octet-stream"
+    disposition = _content_disposition(doc.original_file_name)
+
+    min_redirect = settings.blob_download_redirect_min_bytes
+    if min_redirect is not None and (doc.size_bytes or 0) >= min_redirect:
+        try:
+            url = generate_download_url(
+                container, doc.blob_path, settings.blob_download_sas_ttl_seconds, content_type, disposition
+            )
+        except RuntimeError as exc:
+            logger.warning("SAS redirect unavailable, proxying download: %s", exc)
+        else:
+            # SAS가 박힌 URL이 캐시에 남지 않도록 한다.
+            return RedirectResponse(url, status_code=status.HTTP_307_TEMPORARY_REDIRECT, headers={"Cache-Control": "no-store"})
+
     try:
-        chunks = download_blob(container, doc.blob_path)
+        info = get_blob_info(container, doc.blob_path)
     except RuntimeError as exc:
         raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(exc)) from exc
+    if info is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Document content not found")
 
-    content_type = doc.mime_type or "application/octet-stream"
-    headers = {"Content-Disposition": f'attachment; filename="{doc.original_file_name}"'}
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": info.etag,
+        # 브라우저/PDF 뷰어는 캐시해두고 매번 ETag로 재검증한다.
+        "Cache-Control": "private, no-cache",
+    }
+    if info.last_modified:
+        headers["Last-Modified"] = format_datetime(info.last_modified, usegmt=True)
+
+    if _etag_matches(if_none_match, info.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    byte_range = None
+    # If-Range가 현재 ETag와 다르면(파일이 바뀜) 부분이 아니라 전체를 보낸다. (If-Range는 strong 비교)
+    if range_header and (not if_range or if_range.strip() == info.etag):
+        byte_range = _parse_range(range_header, info.size_bytes)
+
+    headers["Content-Disposition"] = disposition
+    try:
+        if byte_range:
+            start, end = byte_range
+            chunks = download_blob(container, doc.blob_path, offset=start, length=end - start + 1, etag=info.etag)
+        else:
+            chunks = download_blob(container, doc.blob_path, etag=info.etag)
+    except RuntimeError as exc:
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(exc)) from exc
+
+    if byte_range:
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{info.size_bytes}"
+        headers["Content-Length"] = str(end - start + 1)
+        return StreamingResponse(chunks, status_code=status.HTTP_206_PARTIAL_CONTENT, media_type=content_type, headers=headers)
+    headers["Content-Length"] = str(info.size_bytes)
     return StreamingResponse(chunks, media_type=content_type, headers=headers)
 
 
 @router.delete("/{document_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_document(
     document_id: str,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
     container: ContainerClient = Depends(get_blob_container_client),
 ):
     doc = db.get(Document, document_id)
     if not doc or doc.user_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Document not found")
 
-    delete_document_internal(db, current_user, doc, container)
+    delete_document_internal(db, current_user, doc, container, background_tasks)
     return None
 
 
@@ -249,19 +574,22 @@ def delete_document(
 def move_document_group(
     document_id: UUID,
     payload: DocumentMoveGroup,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
 ):
     doc = db.get(Document, document_id)
     if not doc or doc.user_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Document not found")
 
     doc.group_id = payload.group_id
+    bump_dashboard_version(db, doc.user_id)
+    bump_index_version(db, doc.user_id)
     db.commit()
     db.refresh(doc)
 
-    # 인덱싱된 문서의 group_id도 업데이트 (best-effort)
-    update_search_group(doc, payload.group_id)
+    # 인덱싱된 문서의 group_id도 업데이트 (best-effort, 응답 뒤)
+    background_tasks.add_task(move_documents, doc.user_id, [doc.id], payload.group_id)
     return doc
 
 
@@ -285,6 +613,9 @@ def indexing_callback(
     doc.chunk_count = payload.chunk_count or 0
     doc.last_indexed_at = datetime.utcnow()
     doc.error_message = payload.error_message
+    bump_dashboard_version(db, doc.user_id)
+    # 인덱스 내용이 바뀌었으므로 이 사용자의 캐시된 답변을 무효화
+    bump_index_version(db, doc.user_id)
 
     db.commit()
     db.refresh(doc)
@@ -293,16 +624,31 @@ def indexing_callback(
 
 @router.post("/{document_id}/index", response_model=DocumentRead)
 async def trigger_index_document(
-    document_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    document_id: UUID,
+    background_tasks: BackgroundTasks,
+    full: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserPrincipal = Depends(get_current_user_async),
 ):
-    doc = db.get(Document, document_id)
+    doc = await db.get(Document, document_id)
     if not doc or doc.user_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Document not found")
 
+    queued = settings.indexing_backend == "queue"
     if doc.status == DocumentStatus.PROCESSING:
-        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Document is already processing")
+        if queued:
+            # 큐 모드에서는 대기/실행 중인 작업이 없으면(워커 장애 등으로 유실) 다시 넣을 수 있다.
+            busy = await has_active_job(db, doc.id)
+        else:
+            # native/n8n 모드는 진행 상황을 추적할 수 없으므로 오래 멈춰 있으면 재시도를 허용한다.
+            updated_at = doc.updated_at
+            if updated_at is not None and updated_at.tzinfo is None:
+                updated_at = updated_at.replace(tzinfo=timezone.utc)
+            busy = updated_at is None or (
+                (datetime.now(timezone.utc) - updated_at).total_seconds() < settings.index_processing_stale_seconds
+            )
+        if busy:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Document is already processing")
 
     doc.status = DocumentStatus.PROCESSING
     doc.last_indexed_at = None
@@ -310,19 +656,33 @@ async def trigger_index_document(
     if doc.chunk_count is None:
         doc.chunk_count = 0
 
-    db.commit()
-    db.refresh(doc)
-
-    if settings.n8n_index_webhook_url:
+    if full or settings.indexing_backend == "n8n":
+        # 청크 manifest를 비워서 전체 재인덱싱한다. (n8n은 manifest를 갱신하지 않으므로 항상 비운다)
+        await clear_manifest(db, doc.id)
+    if queued:
+        # 상태 변경과 작업 등록을 한 트랜잭션으로 묶는다. 실제 처리는 워커가 한다.
+        await enqueue_index_job(db, doc.id, doc.user_id, PRIORITY_INTERACTIVE)
+    await abump_dashboard_version(db, doc.user_id)
+    await db.commit()
+    await db.refresh(doc)
+
+    if queued:
+        if index_queue.embedded_worker is not None:
+            index_queue.embedded_worker.notify()
+    elif settings.indexing_backend == "native":
+        # 추출 → 청킹 → 배치 임베딩 → bulk upsert 를 응답 이후 이 프로세스에서 실행한다.
+        # 완료되면 index_document()가 status/chunk_count를 직접 갱신한다.
+        background_tasks.add_task(index_document, doc.id)
+    elif settings.n8n_index_webhook_url:
         # n8n에서 전체 문서 정보를 사용할 수 있도록 직렬화한 payload 전달
         doc_out = DocumentRead.model_validate(doc)
         payload = doc_out.model_dump(mode="json")
         payload.setdefault("document_id", str(doc.id))
 
         try:
-            async with httpx.AsyncClient(timeout=10) as client:
-                resp = await client.post(settings.n8n_index_webhook_url, json=payload)
-                resp.raise_for_status()
+            client = get_async_client(N8N)
+            resp = await client.post(settings.n8n_index_webhook_url, json=payload, timeout=10.0)
+            resp.raise_for_status()
         except Exception as exc:
             # n8n 응답/예외를 최대한 남겨서 원인 파악을 돕는다.
             resp_text = None
@@ -330,8 +690,9 @@ async def trigger_index_document(
                 resp_text = exc.response.text
             doc.status = DocumentStatus.FAILED
             doc.error_message = f"n8n trigger failed: {exc} {resp_text or ''}".strip()
-            db.commit()
-            db.refresh(doc)
+            await abump_dashboard_version(db, doc.user_id)
+            await db.commit()
+            await db.refresh(doc)
             raise HTTPException(
                 status_code=status.HTTP_502_BAD_GATEWAY,
                 detail="Failed to trigger indexing",
@@ -339,7 +700,9 @@ async def trigger_index_document(
     else:
         doc.status = DocumentStatus.PROCESSED
         doc.last_indexed_at = datetime.utcnow()
-        db.commit()
-        db.refresh(doc)
+        await abump_dashboard_version(db, doc.user_id)
+        await abump_index_version(db, doc.user_id)
+        await db.commit()
+        await db.refresh(doc)
 
     return doc
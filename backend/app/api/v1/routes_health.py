@@ -1,4 +1,14 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from app.api.v1.deps import get_db
+from app.api.v1.search_vector import embedding_cache_stats
+from app.core.auth_cache import principal_cache
+from app.core.http_clients import http_clients
+from app.services import index_queue
+from app.services.answer_cache import answer_cache
+from app.services.qa_log_writer import qa_log_writer
+from app.services.vector_store import get_vector_store
 
 router = APIRouter(tags=["health"])
 
@@ -6,3 +16,41 @@ router = APIRouter(tags=["health"])
 @router.get("/health")
 def health_check():
     return {"status": "ok"}
+
+
+@router.get("/health/http-pools")
+def http_pool_metrics():
+    """업스트림별 HTTP 커넥션 풀 사용량/지연 지표"""
+    return http_clients.metrics()
+
+
+@router.get("/health/caches")
+def cache_metrics():
+    """이 워커의 답변/질문 임베딩/인증 캐시 지표"""
+    return {
+        "answer_cache": answer_cache.stats(),
+        "embedding_cache": embedding_cache_stats(),
+        "auth_cache": principal_cache.stats(),
+    }
+
+
+@router.get("/health/vector-store")
+def vector_store_metrics():
+    """현재 벡터 저장소 백엔드와 (local 백엔드일 때) 로드된 인덱스 크기"""
+    return get_vector_store().stats()
+
+
+@router.get("/health/index-queue")
+def index_queue_metrics(db: Session = Depends(get_db)):
+    """인덱싱 작업 큐 깊이/처리량과 (있으면) 이 프로세스의 임베디드 워커 지표"""
+    worker = index_queue.embedded_worker
+    return {
+        "queue": index_queue.queue_stats(db),
+        "embedded_worker": worker.metrics.as_dict() if worker is not None else None,
+    }
+
+
+@router.get("/health/qa-log-writer")
+def qa_log_writer_metrics():
+    """이 워커의 QA 로그 버퍼 깊이와 배치 쓰기 지표"""
+    return qa_log_writer.stats()
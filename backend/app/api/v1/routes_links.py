@@ -1,11 +1,14 @@
 import secrets
-from typing import List
+from typing import List, Optional
 from datetime import datetime, timedelta
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
 
-from app.api.v1.deps import get_db, get_current_user
+from app.api.v1.deps import get_db, get_current_user, get_token_principal
+from app.core.auth_cache import UserPrincipal
+from app.core.config import settings
+from app.core.pagination import entities, keyset_page, ndjson_export, page_response, parse_fields
 from app.core.security import hash_password
 from app.models.document import Document
 from app.models.document_group import DocumentGroup
@@ -26,7 +29,7 @@ def generate_link_id(length: int = 16) -> str:
 def create_link(
     payload: LinkCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_current_user),
 ):
     # target validation
     if payload.document_id and payload.group_id:
@@ -93,13 +96,38 @@ def create_link(
     return link
 
 
+LINK_FIELDS = tuple(LinkRead.model_fields)
+
+
 @router.get("/", response_model=List[LinkRead])
 def list_my_links(
+    response: Response,
+    cursor: Optional[str] = Query(None, description="이전 응답의 X-Next-Cursor"),
+    limit: int = Query(settings.list_page_default, ge=1, le=settings.list_page_max),
+    fields: Optional[str] = Query(None, description="쉼표로 구분한 필드만 돌려준다. 예: id,title,access_count"),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_token_principal),
+):
+    """내 공유 링크 (최신 순). 다음 페이지가 있으면 X-Next-Cursor 헤더로 커서를 준다."""
+    selected = parse_fields(fields, LINK_FIELDS)
+    query = db.query(*entities(Link, selected)).filter(Link.user_id == current_user.id)
+    links, next_cursor = keyset_page(query, Link, cursor, limit)
+    return page_response(response, links, next_cursor, selected)
+
+
+@router.get("/export")
+def export_my_links(
+    fields: Optional[str] = Query(None, description="쉼표로 구분한 필드만 내보낸다."),
+    current_user: UserPrincipal = Depends(get_token_principal),
 ):
-    links = db.query(Link).filter(Link.user_id == current_user.id).all()
-    return links
+    """내 공유 링크 전체를 NDJSON(한 줄에 링크 하나, 최신 순)으로 내려받는다."""
+    return ndjson_export(
+        Link,
+        [Link.user_id == current_user.id],
+        parse_fields(fields, LINK_FIELDS),
+        lambda link: LinkRead.model_validate(link).model_dump(mode="json"),
+        "links.ndjson",
+    )
 
 
 @router.get("/{link_id}/info")
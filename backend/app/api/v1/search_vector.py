@@ -1,23 +1,40 @@
 from __future__ import annotations
 
-from typing import List, Optional
+import asyncio
+import hashlib
+import logging
+import sys
+from array import array
+from typing import Dict, List, Optional, Set, Tuple
 from uuid import UUID
 
-import httpx
 from fastapi import APIRouter, Depends, HTTPException, status
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from sqlalchemy import func, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
-from app.api.v1.deps import get_current_user
+from app.api.v1.deps import get_token_principal
+from app.core.auth_cache import UserPrincipal
+from app.core.cache import TTLCache
 from app.core.config import settings
-from app.models.user import User
+from app.core.db import SessionLocal
+from app.core.http_clients import AZURE_OPENAI, get_async_client
+from app.core.question_normalizer import quick_normalize
+from app.models.qa_log import QALog
+from app.models.query_embedding import QueryEmbedding
+from app.services.vector_store import get_vector_store
 
 router = APIRouter(prefix="/api/v1/search", tags=["search"])
+logger = logging.getLogger(__name__)
 
 
 class VectorSearchRequest(BaseModel):
     query: str
     group_id: Optional[UUID] = None
     top_k: int = 5
+    # 하이브리드(키워드 + 벡터) RRF 가중치. text_weight=0 이면 벡터 검색만 한다.
+    text_weight: float = Field(default_factory=lambda: settings.hybrid_text_weight, ge=0)
+    vector_weight: float = Field(default_factory=lambda: settings.hybrid_vector_weight, ge=0)
 
 
 class SearchHit(BaseModel):
@@ -30,6 +47,8 @@ class SearchHit(BaseModel):
     content: Optional[str] = None
     source_path: Optional[str] = None
     original_file_name: Optional[str] = None
+    page: Optional[int] = None
+    section: Optional[str] = None
     score: float
 
 
@@ -39,8 +58,103 @@ class VectorSearchResponse(BaseModel):
     hits: List[SearchHit]
 
 
-async def embed_query(text: str) -> List[float]:
-    """Create an embedding for the query using Azure OpenAI."""
+# ------------------------------
+# Query embedding cache
+# ------------------------------
+_embedding_cache = TTLCache(
+    max_entries=settings.embedding_cache_max_entries,
+    ttl_seconds=settings.embedding_cache_ttl_seconds,
+)
+_background_writes: Set[asyncio.Task] = set()
+
+
+def _embed_model_name() -> str:
+    return settings.azure_openai_embed_deployment or "default"
+
+
+def embedding_cache_key(text: str) -> str:
+    """
+    질문 텍스트의 sha256. 공백/문장부호/대소문자만 통일한다.
+    캐시가 사용자 구분 없이 공유되므로 의미가 다를 수 있는 질문을 합치는 정규화(postprocess_normalized)는 쓰지 않는다.
+    """
+    normalized = quick_normalize(text) or text.strip()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def pack_vector(vector: List[float]) -> bytes:
+    """float 리스트 → little-endian float32 bytes (float64 JSON 대비 1/4 이하 크기)"""
+    arr = array("f", vector)
+    if sys.byteorder != "little":
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def unpack_vector(data: bytes) -> List[float]:
+    arr = array("f")
+    arr.frombytes(data)
+    if sys.byteorder != "little":
+        arr.byteswap()
+    return arr.tolist()
+
+
+def _load_persisted_embedding(key: str) -> Optional[List[float]]:
+    db = SessionLocal()
+    try:
+        stmt = (
+            update(QueryEmbedding)
+            .where(QueryEmbedding.question_hash == key, QueryEmbedding.model == _embed_model_name())
+            .values(hit_count=QueryEmbedding.hit_count + 1, last_used_at=func.now())
+            .returning(QueryEmbedding.vector)
+        )
+        data = db.execute(stmt).scalar_one_or_none()
+        db.commit()
+        return unpack_vector(data) if data else None
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("Failed to load cached embedding %s: %s", key, exc)
+        db.rollback()
+        return None
+    finally:
+        db.close()
+
+
+def _store_persisted_embeddings(items: List[Tuple[str, str, List[float]]]) -> None:
+    if not items:
+        return
+    db = SessionLocal()
+    try:
+        rows = [
+            {
+                "question_hash": key,
+                "model": _embed_model_name(),
+                "question": text,
+                "dims": len(vector),
+                "vector": pack_vector(vector),
+            }
+            for key, text, vector in items
+        ]
+        stmt = pg_insert(QueryEmbedding).values(rows).on_conflict_do_nothing(
+            index_elements=[QueryEmbedding.question_hash, QueryEmbedding.model]
+        )
+        db.execute(stmt)
+        db.commit()
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("Failed to persist %d embeddings: %s", len(items), exc)
+        db.rollback()
+    finally:
+        db.close()
+
+
+def _remember_embeddings(items: List[Tuple[str, str, List[float]]], persist: bool = True) -> None:
+    for key, _, vector in items:
+        _embedding_cache.set(key, tuple(vector))
+    if persist and settings.embedding_cache_persist:
+        task = asyncio.create_task(asyncio.to_thread(_store_persisted_embeddings, items))
+        _background_writes.add(task)
+        task.add_done_callback(_background_writes.discard)
+
+
+async def _request_embeddings(texts: List[str]) -> List[List[float]]:
+    """Create embeddings for one or more inputs in a single Azure OpenAI request."""
     url = (
         f"{settings.azure_openai_endpoint}/openai/deployments/"
         f"{settings.azure_openai_embed_deployment}/embeddings"
@@ -50,10 +164,10 @@ async def embed_query(text: str) -> List[float]:
         "api-key": settings.azure_openai_api_key,
         "Content-Type": "application/json",
     }
-    payload = {"input": text}
+    payload = {"input": texts if len(texts) > 1 else texts[0]}
 
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        resp = await client.post(url, headers=headers, json=payload)
+    client = get_async_client(AZURE_OPENAI)
+    resp = await client.post(url, headers=headers, json=payload, timeout=30.0)
 
     if resp.status_code >= 400:
         raise HTTPException(
@@ -63,99 +177,150 @@ async def embed_query(text: str) -> List[float]:
 
     data = resp.json()
     try:
-        return data["data"][0]["embedding"]
-    except (KeyError, IndexError) as e:
+        items = sorted(data["data"], key=lambda item: item.get("index", 0))
+        vectors = [item["embedding"] for item in items]
+    except (KeyError, IndexError, TypeError) as e:
         raise HTTPException(
             status_code=status.HTTP_502_BAD_GATEWAY,
             detail=f"Invalid embedding response: {e}",
         )
+    if len(vectors) != len(texts):
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Invalid embedding response: expected {len(texts)} vectors, got {len(vectors)}",
+        )
+    return vectors
 
 
-async def vector_search(
-    query_vector: List[float],
-    user_id: UUID,
-    group_id: Optional[UUID] = None,
-    document_id: Optional[UUID] = None,
-    top_k: int = 5,
-) -> VectorSearchResponse:
-    """Run vector search on Azure AI Search scoped to user (and optional group)."""
-    search_url = (
-        f"{settings.azure_search_endpoint}/indexes/{settings.azure_search_index_name}"
-        "/docs/search?api-version=2023-11-01"
-    )
+async def embed_query(text: str) -> List[float]:
+    """
+    Create an embedding for the query using Azure OpenAI.
+    정규화 질문 해시 기준으로 in-process LRU → (옵션) Postgres 순서로 캐시를 먼저 본다.
+    """
+    if not settings.embedding_cache_enabled:
+        return (await _request_embeddings([text]))[0]
 
-    filters = [f"user_id eq '{user_id}'"]
-    if group_id is not None:
-        filters.append(f"group_id eq '{group_id}'")
-    if document_id is not None:
-        filters.append(f"document_id eq '{document_id}'")
-    filter_expr = " and ".join(filters)
+    key = embedding_cache_key(text)
+    cached = _embedding_cache.get(key)
+    if cached is not None:
+        return list(cached)
 
-    body = {
-        "vectorQueries": [
-            {
-                "kind": "vector",
-                "vector": query_vector,
-                "fields": "embedding",
-                "k": top_k,
-            }
-        ],
-        "filter": filter_expr,
-        "select": (
-            "id,document_id,user_id,group_id,chunk_id,"
-            "title,content,source_path,original_file_name"
-        ),
-        "top": top_k,
-    }
+    if settings.embedding_cache_persist:
+        vector = await asyncio.to_thread(_load_persisted_embedding, key)
+        if vector is not None:
+            _remember_embeddings([(key, text, vector)], persist=False)
+            return vector
 
-    headers = {
-        "Content-Type": "application/json",
-        "api-key": settings.azure_search_admin_key,
+    vector = (await _request_embeddings([text]))[0]
+    _remember_embeddings([(key, text, vector)])
+    return vector
+
+
+def embedding_cache_stats() -> dict:
+    return {
+        "enabled": settings.embedding_cache_enabled,
+        "persist": settings.embedding_cache_persist,
+        **_embedding_cache.stats(),
     }
 
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        resp = await client.post(search_url, headers=headers, json=body)
 
-    if resp.status_code >= 400:
-        raise HTTPException(
-            status_code=status.HTTP_502_BAD_GATEWAY,
-            detail=f"Azure Search error: {resp.status_code} {resp.text}",
+def _top_questions(limit: int) -> List[str]:
+    db = SessionLocal()
+    try:
+        group_key = func.coalesce(QALog.normalized_question, QALog.question)
+        rows = (
+            db.query(func.min(QALog.question).label("question"), func.count().label("cnt"))
+            .group_by(group_key)
+            .order_by(func.count().desc())
+            .limit(limit)
+            .all()
         )
+        return [row.question for row in rows if row.question]
+    finally:
+        db.close()
 
-    data = resp.json()
-    hits: List[SearchHit] = []
-    for doc in data.get("value", []):
-        hits.append(
-            SearchHit(
-                id=doc.get("id"),
-                document_id=doc.get("document_id"),
-                user_id=doc.get("user_id"),
-                group_id=doc.get("group_id"),
-                chunk_id=doc.get("chunk_id"),
-                title=doc.get("title"),
-                content=doc.get("content"),
-                source_path=doc.get("source_path"),
-                original_file_name=doc.get("original_file_name"),
-                score=float(doc.get("@search.score", 0.0)),
-            )
-        )
 
-    return VectorSearchResponse(query="", top_k=top_k, hits=hits)
+async def prewarm_embedding_cache(limit: Optional[int] = None, batch_size: int = 16) -> int:
+    """
+    qa_logs에서 많이 나온 질문들을 미리 임베딩해서 캐시에 넣는다.
+    여러 질문을 한 번의 embeddings 요청으로 묶어서 보낸다. 새로 임베딩한 개수를 반환.
+    """
+    limit = limit or settings.embedding_cache_prewarm_limit
+    questions = await asyncio.to_thread(_top_questions, limit)
+
+    pending: Dict[str, str] = {}
+    for question in questions:
+        key = embedding_cache_key(question)
+        if key in pending or _embedding_cache.get(key) is not None:
+            continue
+        if settings.embedding_cache_persist:
+            vector = await asyncio.to_thread(_load_persisted_embedding, key)
+            if vector is not None:
+                _remember_embeddings([(key, question, vector)], persist=False)
+                continue
+        pending[key] = question
+
+    items = list(pending.items())
+    warmed = 0
+    for i in range(0, len(items), batch_size):
+        batch = items[i : i + batch_size]
+        try:
+            vectors = await _request_embeddings([q for _, q in batch])
+        except HTTPException as exc:
+            logger.warning("prewarm_embedding_cache: batch failed: %s", exc.detail)
+            continue
+        entries = [(key, q, vec) for (key, q), vec in zip(batch, vectors)]
+        _remember_embeddings(entries, persist=False)
+        if settings.embedding_cache_persist:
+            await asyncio.to_thread(_store_persisted_embeddings, entries)
+        warmed += len(entries)
+
+    logger.info("prewarm_embedding_cache: %d/%d questions embedded", warmed, len(questions))
+    return warmed
+
+
+async def vector_search(
+    query_vector: List[float],
+    user_id: UUID,
+    group_id: Optional[UUID] = None,
+    document_id: Optional[UUID] = None,
+    top_k: int = 5,
+    query_text: Optional[str] = None,
+    text_weight: Optional[float] = None,
+    vector_weight: Optional[float] = None,
+) -> VectorSearchResponse:
+    """
+    Run search on the configured vector store scoped to user (and optional group).
+    query_text가 주어지면 키워드 검색 결과를 RRF로 합친 하이브리드 검색을 한다.
+    """
+    docs = await get_vector_store().search(
+        query_vector,
+        user_id=user_id,
+        group_id=group_id,
+        document_id=document_id,
+        top_k=top_k,
+        query_text=query_text,
+        text_weight=settings.hybrid_text_weight if text_weight is None else text_weight,
+        vector_weight=settings.hybrid_vector_weight if vector_weight is None else vector_weight,
+    )
+    hits = [SearchHit(**doc) for doc in docs]
+    return VectorSearchResponse(query=query_text or "", top_k=top_k, hits=hits)
 
 
 @router.post("/vector", response_model=VectorSearchResponse)
 async def search_with_vector(
     payload: VectorSearchRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: UserPrincipal = Depends(get_token_principal),
 ):
-    """Vector search within the current user's documents (optionally scoped by group)."""
+    """Hybrid (keyword + vector) search within the current user's documents (optionally scoped by group)."""
     query_vec = await embed_query(payload.query)
-    result = await vector_search(
+    return await vector_search(
         query_vector=query_vec,
         user_id=current_user.id,
         group_id=payload.group_id,
         document_id=None,
         top_k=payload.top_k,
+        query_text=payload.query,
+        text_weight=payload.text_weight,
+        vector_weight=payload.vector_weight,
     )
-    result.query = payload.query
-    return result
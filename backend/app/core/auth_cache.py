@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+
+@dataclass(frozen=True)
+class UserPrincipal:
+    """
+    인증된 사용자 정보 스냅샷.
+    세션에 묶인 ORM User 대신 이걸 캐시/전달해서, 요청이 끝난 뒤에도 안전하게 재사용한다.
+    UserRead(from_attributes=True)로 그대로 직렬화할 수 있다.
+    """
+
+    id: UUID
+    email: str
+    name: Optional[str] = None
+    provider: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+    @classmethod
+    def from_user(cls, user: Any) -> "UserPrincipal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            name=user.name,
+            provider=user.provider,
+            created_at=user.created_at,
+        )
+
+
+class PrincipalCache:
+    """
+    토큰 sub(user_id) → UserPrincipal 캐시.
+    항목 TTL은 auth_cache_ttl_seconds 와 토큰 만료(exp)까지 남은 시간 중 짧은 쪽이다.
+    프로세스 로컬이므로 다른 워커에서의 사용자 변경은 TTL 안에 반영된다.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self._cache = TTLCache(max_entries, ttl_seconds)
+
+    def get(self, sub: str) -> UserPrincipal | None:
+        if not settings.auth_cache_enabled:
+            return None
+        return self._cache.get(sub)
+
+    def set(self, sub: str, principal: UserPrincipal, exp: Optional[float] = None) -> None:
+        if not settings.auth_cache_enabled:
+            return
+        ttl = settings.auth_cache_ttl_seconds
+        if exp is not None:
+            ttl = min(ttl, exp - time.time())
+        if ttl <= 0:
+            return
+        self._cache.set(sub, principal, ttl_seconds=ttl)
+
+    def invalidate(self, user_id: UUID | str) -> None:
+        self._cache.pop(str(user_id))
+
+    def stats(self) -> Dict[str, Any]:
+        return {"enabled": settings.auth_cache_enabled, **self._cache.stats()}
+
+
+principal_cache = PrincipalCache(
+    max_entries=settings.auth_cache_max_entries,
+    ttl_seconds=settings.auth_cache_ttl_seconds,
+)
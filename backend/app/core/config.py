@@ -20,12 +20,25 @@ class Settings(BaseSettings):
 
     # Database
     database_url: str
+    async_database_url: Optional[str] = None  # 없으면 database_url을 asyncpg URL로 변환
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_pre_ping: bool = True
+    db_pool_recycle: int = 1800
+    db_pool_timeout: float = 30.0
 
     # JWT
     jwt_secret_key: str = Field(alias="JWT_SECRET_KEY")
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 60
 
+    # Auth principal cache (token sub → user snapshot, per worker)
+    auth_cache_enabled: bool = True
+    auth_cache_ttl_seconds: float = 300.0
+    auth_cache_max_entries: int = 10000
+    # 읽기 전용 라우트에서 토큰에 서명된 id/email/name 클레임을 DB 조회 없이 신뢰
+    auth_trust_token_claims: bool = False
+
     # Google OAuth
     google_client_id: Optional[str] = None
     google_client_secret: Optional[str] = None
@@ -37,8 +50,25 @@ class Settings(BaseSettings):
 
     # Azure Blob Storage
     azure_storage_connection_string: Optional[str] = None
+    azure_storage_account_url: Optional[str] = None
+    azure_storage_account_name: Optional[str] = None
+    azure_storage_account_key: Optional[str] = None
     azure_blob_container: str = "user-docs"
+    # 프로세스 전체가 공유하는 Blob 클라이언트의 커넥션 풀/재시도/타임아웃
+    blob_pool_max_connections: int = 20
+    blob_connect_timeout: float = 10.0
+    blob_read_timeout: float = 60.0
+    blob_retry_total: int = 3
+    blob_retry_initial_backoff: float = 1.0  # 재시도 간격: initial + 3^n 초 (ExponentialRetry)
     max_upload_size_mb: int = 20
+    blob_upload_block_size: int = 4 * 1024 * 1024  # 업로드를 이 크기의 블록으로 나눠 Put Block
+    blob_upload_max_concurrency: int = 4  # 동시에 보내는 블록 수 (업로드당 메모리 ≈ 블록 × (동시 수 + 1))
+    blob_batch_upload_concurrency: int = 4  # 일괄 업로드에서 동시에 올리는 파일 수
+    max_batch_upload_files: int = 200  # 일괄 업로드 한 번에 받는 파일 수 (zip 안의 파일 포함)
+    # 다운로드: 이 크기 이상이면 API가 중계하지 않고 단기 SAS URL로 307 리다이렉트 (None이면 항상 중계)
+    blob_download_redirect_min_bytes: Optional[int] = None
+    blob_download_sas_ttl_seconds: int = 300
+    blob_dedup_enabled: bool = True  # 같은 내용(sha256)의 원본은 objects/ 아래 blob 하나를 ref_count로 공유
 
     # Azure OpenAI
     azure_openai_endpoint: Optional[str] = None
@@ -46,17 +76,118 @@ class Settings(BaseSettings):
     azure_openai_embed_deployment: Optional[str] = None
     azure_openai_chat_deployment: Optional[str] = None
     azure_openai_api_version: str = "2024-02-15-preview"
+    # 스트리밍 응답 끝에 실제 usage를 받는다 (stream_options.include_usage, api-version 2024-09-01-preview 이상).
+    # 끄면 완성 토큰 수는 답변 전체 텍스트로 로컬 추정한다.
+    azure_openai_stream_usage: bool = False
 
     # Azure AI Search
     azure_search_endpoint: Optional[str] = None
     azure_search_admin_key: Optional[str] = None
     azure_search_index_name: Optional[str] = None
+    azure_search_chunk_metadata: bool = False  # 인덱스에 page(Edm.Int32)/section(Edm.String) 필드가 있을 때만 true
+
+    # Vector store backend: "azure" (Azure AI Search) | "local" (NumPy memmap, per user)
+    vector_store_backend: str = "azure"
+    local_vector_store_dir: str = str(BASE_DIR / "data" / "vectors")
+    local_vector_store_block_rows: int = 65536
+
+    # Hybrid retrieval (keyword/BM25 + vector, fused with reciprocal rank fusion)
+    hybrid_search_enabled: bool = True
+    hybrid_text_weight: float = 1.0
+    hybrid_vector_weight: float = 1.0
+    hybrid_candidates: int = 50  # 랭킹별로 RRF에 넣는 후보 수
+    hybrid_rrf_k: int = 60
+    hybrid_search_fields: str = "content,title"
+
+    # LLM context packing (token budget, adjacent chunk merge, MinHash dedup)
+    context_token_budget: int = 3000
+    context_dedup_threshold: float = 0.85
+    context_shingle_size: int = 5
+    context_minhash_permutations: int = 64
 
     # n8n callbacks
     fastapi_callback_url: Optional[str] = None
     n8n_callback_token: Optional[str] = None
     n8n_index_webhook_url: Optional[str] = None
 
+    # Indexing backend:
+    #   "queue"  – index_jobs 테이블에 넣고 워커(임베디드 또는 app.workers.index_worker)가 처리
+    #   "native" – 같은 파이프라인을 요청 프로세스의 BackgroundTasks로 바로 실행 (재시도 없음)
+    #   "n8n"    – n8n 웹훅 + /documents/callback/index
+    indexing_backend: str = "queue"
+    index_on_upload: bool = False  # 업로드 직후 bulk 우선순위로 자동 인덱싱 (queue 모드)
+    index_processing_stale_seconds: float = 1800.0  # native/n8n 모드에서 PROCESSING이 이보다 오래되면 재시도 허용
+    index_chunk_size: int = 1500  # 청크 최대 글자 수 (문장/제목 경계에서 나눈다)
+    index_chunk_overlap: int = 150  # 같은 section 안에서 앞 청크 끝 문장을 이만큼까지 다음 청크에 반복
+    index_spool_max_bytes: int = 16 * 1024 * 1024  # 원본 다운로드를 메모리에 두는 한도 (넘으면 임시 파일)
+    index_stream_chunks: int = 512  # 추출 → 임베딩 → upsert 를 이 청크 수 단위로 흘려보낸다
+    index_incremental: bool = True  # document_chunks manifest로 바뀐 청크만 다시 임베딩
+    index_share_embeddings: bool = True  # chunk_embeddings 테이블로 같은 내용의 청크 임베딩을 문서/사용자 간 재사용
+    embedding_model_version: Optional[str] = None  # manifest 비교용 모델 식별자 (기본: 임베딩 배포 이름)
+    index_embed_batch_size: int = 64  # embeddings 요청 하나에 넣는 청크 수
+    index_embed_concurrency: int = 4  # 문서 하나에서 동시에 보내는 embeddings 요청 수
+    index_upsert_batch_size: int = 1000  # Azure Search /docs/index 한 번에 보내는 문서 수 (최대 1000)
+    index_upsert_max_bytes: int = 12 * 1024 * 1024  # Azure Search 요청 크기 제한(16MB)보다 여유 있게
+    index_upsert_concurrency: int = 2
+    index_max_concurrent_documents: int = 2  # native 모드에서 프로세스당 동시에 인덱싱하는 문서 수
+
+    # Index job queue (Postgres, SELECT ... FOR UPDATE SKIP LOCKED)
+    index_worker_embedded: bool = True  # API 프로세스 안에서도 워커를 돌린다 (별도 워커만 쓰려면 false)
+    index_worker_concurrency: int = 2
+    index_worker_poll_interval: float = 2.0
+    index_job_visibility_timeout: float = 300.0  # heartbeat가 없으면 이 시간 뒤 다른 워커가 다시 가져간다
+    index_job_heartbeat_interval: float = 60.0
+    index_job_max_attempts: int = 5
+    index_job_retry_base_seconds: float = 10.0
+    index_job_retry_max_seconds: float = 600.0
+
+    # Outbound HTTP client pools (Azure OpenAI / Azure Search / n8n)
+    http_http2: bool = True
+    http_max_connections: int = 50
+    http_azure_openai_max_connections: int = 50
+    http_azure_search_max_connections: int = 50
+    http_n8n_max_connections: int = 10
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry: float = 60.0
+    http_connect_timeout: float = 5.0
+    http_read_timeout: float = 30.0
+
+    # RAG answer cache (in-process, per worker)
+    answer_cache_enabled: bool = True
+    answer_cache_ttl_seconds: float = 600.0
+    answer_cache_max_entries: int = 2048
+
+    # List APIs (documents/links/chat logs): (created_at, id) keyset pages
+    list_page_default: int = 100
+    list_page_max: int = 1000
+
+    # QA log writer (in-process buffer → batched INSERT, per worker)
+    qa_log_batch_size: int = 200
+    qa_log_flush_interval_seconds: float = 1.0  # 첫 로그 이후 이만큼 지나면 배치가 덜 찼어도 쓴다
+    qa_log_queue_max: int = 10000  # 넘으면 put()은 기다리고 submit()은 버린다
+
+    # qa_logs monthly partitions (app.services.qa_log_partitions)
+    qa_log_partition_months_ahead: int = 2  # 이번 달 외에 미리 만들어 두는 달 수
+    qa_log_retention_months: Optional[int] = None  # 이번 달 포함 이만큼만 DB에 남긴다 (None이면 영구 보관)
+    qa_log_archive_enabled: bool = True  # 지우기 전에 blob에 gzip JSONL로 보관
+    qa_log_archive_prefix: str = "archive/qa_logs"  # {prefix}/YYYY/MM.jsonl.gz
+    qa_log_maintenance_embedded: bool = True  # API 프로세스에서도 주기적으로 실행 (advisory lock으로 한 곳만)
+    qa_log_maintenance_interval_seconds: float = 6 * 3600
+
+    # Dashboard snapshot cache (in-process, 키에 DB의 대시보드 버전이 들어가므로 워커 간에도 stale 없음)
+    dashboard_cache_ttl_seconds: float = 300.0
+    dashboard_cache_max_entries: int = 1024
+    # since가 이보다 오래된 버전이면 증분 대신 전체 스냅샷을 돌려준다
+    dashboard_delta_max_versions: int = 1000
+
+    # Query embedding cache (in-process LRU + optional Postgres table)
+    embedding_cache_enabled: bool = True
+    embedding_cache_max_entries: int = 4096
+    embedding_cache_ttl_seconds: float = 86400.0
+    embedding_cache_persist: bool = False
+    embedding_cache_prewarm_limit: int = 200
+    embedding_cache_prewarm_on_startup: bool = False
+
     model_config = SettingsConfigDict(
         env_file=[
             str(BASE_DIR / ".env"),  # backend/.env
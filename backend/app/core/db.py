@@ -1,9 +1,19 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from .config import settings
 
+_pool_options = dict(
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_pre_ping=settings.db_pool_pre_ping,
+    pool_recycle=settings.db_pool_recycle,
+    pool_timeout=settings.db_pool_timeout,
+)
+
 # SQLAlchemy 2.0 스타일 엔진
-engine = create_engine(settings.database_url, echo=False, future=True)
+engine = create_engine(settings.database_url, echo=False, future=True, **_pool_options)
 
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -11,4 +21,27 @@ SessionLocal = sessionmaker(
     bind=engine,
 )
 
+
+def _async_database_url(url: str) -> str:
+    """postgresql(+psycopg2):// URL을 asyncpg 드라이버 URL로 바꾼다."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "postgresql" and parsed.get_driver_name() != "asyncpg":
+        parsed = parsed.set(drivername="postgresql+asyncpg")
+    return parsed.render_as_string(hide_password=False)
+
+
+# async 라우트용 엔진 (이벤트 루프를 막지 않도록 asyncpg 사용)
+async_engine = create_async_engine(
+    settings.async_database_url or _async_database_url(settings.database_url),
+    echo=False,
+    **_pool_options,
+)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 Base = declarative_base()
@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import importlib.util
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 외부 업스트림 이름 (업스트림마다 커넥션 풀을 따로 둔다)
+AZURE_OPENAI = "azure_openai"
+AZURE_SEARCH = "azure_search"
+N8N = "n8n"
+UPSTREAMS = (AZURE_OPENAI, AZURE_SEARCH, N8N)
+
+
+@dataclass
+class PoolStats:
+    requests: int = 0
+    errors: int = 0
+    in_flight: int = 0
+    total_ms: float = 0.0
+
+    def as_dict(self) -> dict:
+        avg_ms = self.total_ms / self.requests if self.requests else 0.0
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "avg_latency_ms": round(avg_ms, 2),
+        }
+
+
+def _pool_connections(transport: httpx.BaseTransport | httpx.AsyncBaseTransport) -> dict:
+    """httpcore 커넥션 풀의 현재 커넥션 수(전체/유휴)를 best-effort로 읽는다."""
+    pool = getattr(transport, "_pool", None)
+    connections = list(getattr(pool, "connections", []) or [])
+    idle = sum(1 for c in connections if getattr(c, "is_idle", lambda: False)())
+    return {"connections": len(connections), "idle_connections": idle}
+
+
+class _MeteredAsyncTransport(httpx.AsyncBaseTransport):
+    def __init__(self, inner: httpx.AsyncHTTPTransport, stats: PoolStats) -> None:
+        self._inner = inner
+        self._stats = stats
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self._stats.in_flight += 1
+        started = time.perf_counter()
+        try:
+            response = await self._inner.handle_async_request(request)
+        except Exception:
+            self._stats.errors += 1
+            raise
+        finally:
+            self._stats.in_flight -= 1
+            self._stats.requests += 1
+            self._stats.total_ms += (time.perf_counter() - started) * 1000
+        if response.status_code >= 400:
+            self._stats.errors += 1
+        return response
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+
+    def pool_info(self) -> dict:
+        return _pool_connections(self._inner)
+
+
+class _MeteredSyncTransport(httpx.BaseTransport):
+    def __init__(self, inner: httpx.HTTPTransport, stats: PoolStats) -> None:
+        self._inner = inner
+        self._stats = stats
+        self._lock = threading.Lock()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        with self._lock:
+            self._stats.in_flight += 1
+        started = time.perf_counter()
+        failed = False
+        try:
+            response = self._inner.handle_request(request)
+            failed = response.status_code >= 400
+            return response
+        except Exception:
+            failed = True
+            raise
+        finally:
+            with self._lock:
+                self._stats.in_flight -= 1
+                self._stats.requests += 1
+                self._stats.errors += int(failed)
+                self._stats.total_ms += (time.perf_counter() - started) * 1000
+
+    def close(self) -> None:
+        self._inner.close()
+
+    def pool_info(self) -> dict:
+        return _pool_connections(self._inner)
+
+
+def _http2_enabled() -> bool:
+    if not settings.http_http2:
+        return False
+    if importlib.util.find_spec("h2") is None:
+        logger.warning("HTTP/2 requested but the 'h2' package is not installed – falling back to HTTP/1.1")
+        return False
+    return True
+
+
+def _limits_for(name: str) -> httpx.Limits:
+    max_connections = {
+        AZURE_OPENAI: settings.http_azure_openai_max_connections,
+        AZURE_SEARCH: settings.http_azure_search_max_connections,
+        N8N: settings.http_n8n_max_connections,
+    }.get(name, settings.http_max_connections)
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=min(settings.http_max_keepalive_connections, max_connections),
+        keepalive_expiry=settings.http_keepalive_expiry,
+    )
+
+
+def _default_timeout() -> httpx.Timeout:
+    # 개별 호출에서 timeout=... 으로 read 타임아웃을 덮어쓴다.
+    return httpx.Timeout(settings.http_read_timeout, connect=settings.http_connect_timeout)
+
+
+class HttpClientRegistry:
+    """
+    업스트림(Azure OpenAI / Azure Search / n8n)별로 재사용되는 httpx 클라이언트 모음.
+
+    - 앱 lifespan에서 open()/aclose() 로 관리한다.
+    - lifespan 밖(스크립트, 워커)에서 호출되면 최초 사용 시 lazy 하게 만든다.
+    - async 라우트는 get_async(), sync 라우트(threadpool)는 get_sync() 를 사용한다.
+    """
+
+    def __init__(self) -> None:
+        self._async: Dict[str, httpx.AsyncClient] = {}
+        self._sync: Dict[str, httpx.Client] = {}
+        self._async_stats: Dict[str, PoolStats] = {}
+        self._sync_stats: Dict[str, PoolStats] = {}
+        self._lock = threading.Lock()
+
+    def get_async(self, name: str) -> httpx.AsyncClient:
+        client = self._async.get(name)
+        if client is None or client.is_closed:
+            with self._lock:
+                client = self._async.get(name)
+                if client is None or client.is_closed:
+                    stats = self._async_stats.setdefault(name, PoolStats())
+                    inner = httpx.AsyncHTTPTransport(limits=_limits_for(name), http2=_http2_enabled())
+                    client = httpx.AsyncClient(
+                        transport=_MeteredAsyncTransport(inner, stats),
+                        timeout=_default_timeout(),
+                    )
+                    self._async[name] = client
+        return client
+
+    def get_sync(self, name: str) -> httpx.Client:
+        client = self._sync.get(name)
+        if client is None or client.is_closed:
+            with self._lock:
+                client = self._sync.get(name)
+                if client is None or client.is_closed:
+                    stats = self._sync_stats.setdefault(name, PoolStats())
+                    inner = httpx.HTTPTransport(limits=_limits_for(name), http2=_http2_enabled())
+                    client = httpx.Client(
+                        transport=_MeteredSyncTransport(inner, stats),
+                        timeout=_default_timeout(),
+                    )
+                    self._sync[name] = client
+        return client
+
+    def open(self) -> None:
+        for name in UPSTREAMS:
+            self.get_async(name)
+
+    async def aclose(self) -> None:
+        with self._lock:
+            async_clients = list(self._async.values())
+            sync_clients = list(self._sync.values())
+            self._async.clear()
+            self._sync.clear()
+        for client in async_clients:
+            try:
+                await client.aclose()
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("Failed to close async http client: %s", exc)
+        for client in sync_clients:
+            try:
+                client.close()
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("Failed to close http client: %s", exc)
+
+    def metrics(self) -> dict:
+        result: dict = {}
+        for kind, clients, stats_map in (
+            ("async", self._async, self._async_stats),
+            ("sync", self._sync, self._sync_stats),
+        ):
+            for name, stats in stats_map.items():
+                entry = stats.as_dict()
+                client = clients.get(name)
+                transport = getattr(client, "_transport", None) if client else None
+                if transport is not None and hasattr(transport, "pool_info"):
+                    entry.update(transport.pool_info())
+                result.setdefault(name, {})[kind] = entry
+        return result
+
+
+http_clients = HttpClientRegistry()
+
+
+def get_async_client(name: str) -> httpx.AsyncClient:
+    return http_clients.get_async(name)
+
+
+def get_sync_client(name: str) -> httpx.Client:
+    return http_clients.get_sync(name)
@@ -0,0 +1,125 @@
+"""
+목록 API 공통: (created_at, id) keyset 페이지네이션, 필드 선택, NDJSON 내보내기.
+
+- 페이지는 limit+1 행만 읽는다. 다음 페이지가 있으면 X-Next-Cursor 헤더에 커서를 준다. (본문은 기존처럼 배열)
+- fields=id,question 처럼 주면 그 컬럼만 SELECT 한다. 커서를 만들 수 있도록 id/created_at은 항상 들어간다.
+- 내보내기는 서버 쪽 커서(yield_per)로 EXPORT_FETCH_ROWS씩 읽으며 한 줄씩 흘려보낸다. (기록 크기와 상관없이 메모리 일정)
+"""
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import literal, select, tuple_
+from sqlalchemy.orm import Query
+
+from app.core.db import SessionLocal
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+EXPORT_FETCH_ROWS = 1000
+KEY_FIELDS = ("id", "created_at")
+
+
+def encode_cursor(created_at: datetime, row_id: Any) -> str:
+    raw = json.dumps([created_at.isoformat(), str(row_id)]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, id_type: Callable[[str], Any] = str) -> Tuple[datetime, Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), id_type(row_id)
+    except (ValueError, TypeError, binascii.Error) as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor") from exc
+
+
+def parse_fields(fields: Optional[str], allowed: Sequence[str]) -> Optional[List[str]]:
+    """fields=a,b → 선택할 컬럼 이름 목록 (없으면 None = 전체)"""
+    if not fields:
+        return None
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)} (allowed: {', '.join(allowed)})",
+        )
+    return list(dict.fromkeys([*KEY_FIELDS, *names]))
+
+
+def entities(model: Any, fields: Optional[List[str]]) -> List[Any]:
+    """SELECT 대상: 필드 선택이 있으면 그 컬럼들, 없으면 ORM 엔티티"""
+    return [getattr(model, name) for name in fields] if fields else [model]
+
+
+def _order(model: Any, descending: bool):
+    if descending:
+        return model.created_at.desc(), model.id.desc()
+    return model.created_at.asc(), model.id.asc()
+
+
+def keyset_page(
+    query: Query,
+    model: Any,
+    cursor: Optional[str],
+    limit: int,
+    descending: bool = True,
+) -> Tuple[list, Optional[str]]:
+    """(created_at, id) 순서로 cursor 다음 limit 행과 다음 페이지 커서."""
+    if cursor:
+        created_at, row_id = decode_cursor(cursor, model.id.type.python_type)
+        key = tuple_(model.created_at, model.id)
+        bound = tuple_(literal(created_at, model.created_at.type), literal(row_id, model.id.type))
+        query = query.filter(key < bound if descending else key > bound)
+    rows = query.order_by(*_order(model, descending)).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
+
+
+def page_response(response: Response, rows: list, next_cursor: Optional[str], fields: Optional[List[str]]):
+    """다음 커서 헤더를 붙인다. 필드 선택이면 response_model 검증 없이 선택한 키만 돌려준다."""
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    if fields is None:
+        return rows
+    return JSONResponse(jsonable_encoder([row._asdict() for row in rows]), headers=dict(response.headers))
+
+
+def ndjson_export(
+    model: Any,
+    where: Sequence[Any],
+    fields: Optional[List[str]],
+    serialize: Callable[[Any], Dict[str, Any]],
+    filename: str,
+    descending: bool = True,
+) -> StreamingResponse:
+    """
+    조건에 맞는 행 전체를 NDJSON으로 흘려보낸다.
+    응답을 보내는 동안 요청 세션이 닫힐 수 있으므로 스트림 안에서 세션을 따로 연다.
+    """
+    stmt = select(*entities(model, fields)).where(*where).order_by(*_order(model, descending))
+    stmt = stmt.execution_options(yield_per=EXPORT_FETCH_ROWS)
+
+    def lines() -> Iterator[bytes]:
+        with SessionLocal() as db:
+            result = db.execute(stmt)
+            rows = result.scalars() if fields is None else result
+            for row in rows:
+                record = serialize(row) if fields is None else jsonable_encoder(row._asdict())
+                yield (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+
+    return StreamingResponse(
+        lines(),
+        media_type=NDJSON_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
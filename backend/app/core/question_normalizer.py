@@ -4,9 +4,8 @@ import logging
 import re
 from typing import Iterable, List
 
-import httpx
-
 from app.core.config import settings
+from app.core.http_clients import AZURE_OPENAI, get_async_client
 
 logger = logging.getLogger(__name__)
 
@@ -68,6 +67,15 @@ def postprocess_normalized(s: str) -> str:
     return s.strip()
 
 
+def quick_normalize(text: str) -> str:
+    """
+    LLM 없이 계산하는 정규화 키. (캐시 조회처럼 지연이 중요한 곳에서 사용)
+    공백/문장부호/대소문자만 통일한다. postprocess_normalized는 서로 다른 질문을
+    "이름"/"좋아하는 것" 으로 합치므로 정확히 일치해야 하는 캐시 키에는 쓰지 않는다.
+    """
+    return _simple_normalize(text)
+
+
 # ------------------------------
 # Keyword extraction for word cloud
 # ------------------------------
@@ -97,6 +105,85 @@ def _dedup_preserve_order(tokens: Iterable[str]) -> List[str]:
     return result
 
 
+# 앞 글자의 받침에 따라 모양이 정해지는 조사. 받침과 맞지 않으면("전문"+가) 조사로 보지 않는다.
+JOSA_AFTER_CONSONANT = frozenset({"이", "은", "을", "과", "이란", "이야", "으로"})
+JOSA_AFTER_VOWEL = frozenset({"가", "는", "를", "와", "로"})  # "로"는 ㄹ 받침 뒤에도 온다
+# 명사 뒤에 붙는 조사 (긴 것부터 매칭). "코드미가" → "코드미"
+JOSA_SUFFIXES: tuple[str, ...] = tuple(
+    sorted(
+        JOSA_AFTER_CONSONANT
+        | JOSA_AFTER_VOWEL
+        | {"에서", "에게", "까지", "부터", "처럼", "보다", "의", "에"},
+        key=len,
+        reverse=True,
+    )
+)
+# 조사처럼 끝나지만 명사의 일부인 끝말 (고양이, 전문가, 민주주의 ...)
+JOSA_EXCEPTION_ENDINGS: tuple[str, ...] = (
+    "고양이", "어린이", "원숭이", "호랑이", "지렁이", "손잡이", "걸이", "놀이",
+    "전문가", "정치가", "투자가", "역사가", "외교가", "애호가", "안무가",
+    "주의", "회의", "강의", "문의", "협의", "합의", "동의", "논의", "토의", "정의",
+    "결과", "효과", "성과", "학과", "통과", "초과", "경과", "마을", "가을",
+    "도로", "경로", "통로", "회로", "진로", "차로", "미로",
+)
+# "키우는", "하는"처럼 동사 어간 뒤의 관형사형 "-는"과 구분하기 위해, 이 글자 뒤의 "는"은 떼지 않는다.
+VERB_STEM_FINALS = frozenset("하되우주드르리시치기지보오내")
+
+
+def _final_consonant(ch: str) -> int:
+    """한글 음절의 받침 번호 (0 = 받침 없음, 8 = ㄹ)"""
+    return (ord(ch) - 0xAC00) % 28
+
+
+def _is_josa_for(stem: str, suffix: str) -> bool:
+    final = _final_consonant(stem[-1])
+    if suffix in JOSA_AFTER_CONSONANT:
+        return final != 0 and not (suffix == "으로" and final == 8)
+    if suffix == "로":
+        return final in (0, 8)
+    if suffix in JOSA_AFTER_VOWEL:
+        return final == 0 and not (suffix == "는" and stem[-1] in VERB_STEM_FINALS)
+    return True
+
+
+def strip_josa(token: str) -> str:
+    """
+    한글 토큰 끝의 조사를 한 번 떼어 낸다. 애매하면 떼지 않는다.
+    - 떼고 나서 두 글자 이상 남아야 한다.
+    - 앞 글자 받침에 맞는 조사여야 한다. (이/을/은/과 ↔ 가/를/는/와)
+    - JOSA_EXCEPTION_ENDINGS 로 끝나는 명사는 그대로 둔다.
+    """
+    if not re.fullmatch(r"[가-힣]+", token) or token.endswith(JOSA_EXCEPTION_ENDINGS):
+        return token
+    for suffix in JOSA_SUFFIXES:
+        if not token.endswith(suffix) or len(token) - len(suffix) < 2:
+            continue
+        stem = token[: -len(suffix)]
+        if _is_josa_for(stem, suffix):
+            return stem
+    return token
+
+
+def keyword_tokens(text: str, strip: bool = True) -> List[str]:
+    """
+    한글/영문/숫자 토큰을 뽑아 불용어/숫자/1글자를 버린다. (중복 유지, 소문자화 안 함)
+    strip=True 이면 조사를 뗀다. (BM25 키워드 검색용)
+    """
+    tokens: List[str] = []
+    for tok in re.findall(r"[가-힣A-Za-z0-9]+", text):
+        t = tok.strip()
+        if strip:
+            t = strip_josa(t)
+        if len(t) <= 1:
+            continue
+        if t.isdigit():
+            continue
+        if t in STOPWORDS_KO or t.lower() in STOPWORDS_EN:
+            continue
+        tokens.append(t)
+    return tokens
+
+
 def extract_keywords_for_cloud(
     question: str,
     normalized: str | None = None,
@@ -119,21 +206,7 @@ def extract_keywords_for_cloud(
     if not base:
         return []
 
-    raw_tokens = re.findall(r"[가-힣A-Za-z0-9]+", base)
-    if not raw_tokens:
-        return []
-
-    cand: List[str] = []
-    for tok in raw_tokens:
-        t = tok.strip()
-        if len(t) <= 1:
-            continue
-        if t.isdigit():
-            continue
-        if t in STOPWORDS_KO or t.lower() in STOPWORDS_EN:
-            continue
-        cand.append(t)
-
+    cand = keyword_tokens(base, strip=False)
     if not cand:
         return []
 
@@ -206,8 +279,8 @@ async def normalize_question_semantic(question: str) -> str:
     }
 
     try:
-        async with httpx.AsyncClient(timeout=20.0) as client:
-            resp = await client.post(url, headers=headers, json=body)
+        client = get_async_client(AZURE_OPENAI)
+        resp = await client.post(url, headers=headers, json=body, timeout=20.0)
     except Exception as e:
         logger.exception("normalize_question_semantic: LLM 호출 실패 - fallback 사용", exc_info=e)
         return base_fallback
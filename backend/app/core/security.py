@@ -1,5 +1,5 @@
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Any, Dict, Optional
 
 from jose import jwt, JWTError
 from passlib.context import CryptContext
@@ -20,23 +20,37 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def create_access_token(
     subject: str,
     expires_delta: Optional[timedelta] = None,
+    claims: Optional[Dict[str, Any]] = None,
 ) -> str:
+    """
+    claims로 email/name 같은 표시용 정보를 함께 서명해 두면,
+    읽기 전용 라우트에서 DB 조회 없이 사용자 정보를 쓸 수 있다. (auth_trust_token_claims)
+    """
     if expires_delta is None:
         expires_delta = timedelta(minutes=settings.access_token_expire_minutes)
 
     expire = datetime.now(timezone.utc) + expires_delta
-    to_encode = {"sub": subject, "exp": expire}
+    to_encode = {**(claims or {}), "sub": subject, "exp": expire}
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
 
 
-def decode_access_token(token: str) -> Optional[str]:
+def decode_access_token_payload(token: str) -> Optional[Dict[str, Any]]:
     """
-    유효한 토큰이면 user_id 문자열을, 아니면 None 반환
+    유효한 토큰이면 전체 클레임(dict)을, 아니면 None 반환
     """
     try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-        sub: str | None = payload.get("sub")
-        return sub
+        return jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
     except JWTError:
         return None
+
+
+def decode_access_token(token: str) -> Optional[str]:
+    """
+    유효한 토큰이면 user_id 문자열을, 아니면 None 반환
+    """
+    payload = decode_access_token_payload(token)
+    if payload is None:
+        return None
+    sub: str | None = payload.get("sub")
+    return sub
@@ -1,16 +1,67 @@
+import asyncio
 import os
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
  
 from app.core.config import settings
+from app.core.db import async_engine
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.http_clients import http_clients
 from app.api.v1 import routes_health, routes_auth, routes_documents, routes_links, routes_chat
 from app.api.v1 import chat_rag, search_vector
+from app.api.v1.search_vector import prewarm_embedding_cache
 from app.api.v1 import routes_document_groups
 from app.api.v1.routes_dashboard import router as dashboard_router
+from app.services import index_queue
+from app.services.blob_storage import blob_clients
+from app.services.qa_log_partitions import check_partitions, maintenance_loop
+from app.services.qa_log_writer import qa_log_writer
  
-app = FastAPI(title="CODEME Backend", version="0.1.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 외부 호출용 HTTP 커넥션 풀은 프로세스 수명 동안 재사용한다.
+    http_clients.open()
+    blob_clients.open()
+    qa_log_writer.start()
+    prewarm_task = None
+    if settings.embedding_cache_prewarm_on_startup:
+        prewarm_task = asyncio.create_task(prewarm_embedding_cache())
+    # 이번 달 qa_logs 파티션이 없으면 로그가 모두 버려지므로 시작 때 한 번 만들고 확인한다.
+    await asyncio.to_thread(check_partitions)
+    maintenance_task = None
+    if settings.qa_log_maintenance_embedded:
+        # qa_logs 다음 달 파티션 만들기 + 보존 기간 적용
+        maintenance_task = asyncio.create_task(maintenance_loop())
+    worker_stop = asyncio.Event()
+    worker_task = None
+    if settings.indexing_backend == "queue" and settings.index_worker_embedded:
+        # 별도 워커 프로세스(app.workers.index_worker) 없이도 큐가 처리되도록 API 프로세스에서도 돌린다.
+        index_queue.embedded_worker = index_queue.IndexWorker()
+        worker_task = asyncio.create_task(index_queue.embedded_worker.run(worker_stop))
+    try:
+        yield
+    finally:
+        if prewarm_task and not prewarm_task.done():
+            prewarm_task.cancel()
+        if maintenance_task is not None:
+            maintenance_task.cancel()
+        if worker_task is not None:
+            worker_stop.set()
+            await worker_task
+            index_queue.embedded_worker = None
+        # 버퍼에 남은 QA 로그를 DB 엔진을 닫기 전에 쓴다.
+        await qa_log_writer.aclose()
+        await http_clients.aclose()
+        await blob_clients.aclose()
+        await async_engine.dispose()
+
+
+app = FastAPI(title="CODEME Backend", version="0.1.0", lifespan=lifespan)
  
 # CORS 설정
 origins = settings.backend_cors_origins or ["*"]
@@ -20,6 +71,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
  
 # API 라우터 등록
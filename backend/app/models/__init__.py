@@ -4,5 +4,11 @@ from .document_group import DocumentGroup
 from .link import Link
 from .qa_log import QALog
 from .qa_keyword import QAKetword
+from .query_embedding import QueryEmbedding
+from .index_job import IndexJob
+from .document_chunk import DocumentChunk
+from .blob_object import BlobObject, ChunkEmbedding
+from .dashboard_rollup import QADailyCount, QAKeywordCount, QAFailedQuestion, DashboardVersion
+from .index_version import IndexVersion
 
-__all__ = ["User", "Document", "DocumentStatus", "DocumentGroup", "Link", "QALog", "QAKetword"]
+__all__ = ["User", "Document", "DocumentStatus", "DocumentGroup", "Link", "QALog", "QAKetword", "QueryEmbedding", "IndexJob", "DocumentChunk", "BlobObject", "ChunkEmbedding", "QADailyCount", "QAKeywordCount", "QAFailedQuestion", "DashboardVersion", "IndexVersion"]
@@ -0,0 +1,34 @@
+from sqlalchemy import Column, String, DateTime, Integer, BigInteger, Text, LargeBinary
+from sqlalchemy.sql import func
+
+from app.core.db import Base
+
+
+class BlobObject(Base):
+    """내용 주소(sha256) 기반 원본 blob. 같은 파일을 올린 문서들이 하나의 blob을 ref_count로 공유한다."""
+
+    __tablename__ = "blob_objects"
+
+    sha256 = Column(String(64), primary_key=True)
+    blob_path = Column(Text, nullable=False)
+    size_bytes = Column(BigInteger, nullable=True)
+    mime_type = Column(String(100), nullable=True)
+    ref_count = Column(Integer, nullable=False, default=0)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+
+class ChunkEmbedding(Base):
+    """청크 텍스트 해시 → 임베딩. 같은 내용의 청크는 문서/사용자가 달라도 다시 임베딩하지 않는다."""
+
+    __tablename__ = "chunk_embeddings"
+
+    content_hash = Column(String(64), primary_key=True)  # sha256(청크 텍스트)
+    model = Column(String(200), primary_key=True)
+
+    dims = Column(Integer, nullable=False)
+    vector = Column(LargeBinary, nullable=False)  # little-endian float32
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    last_used_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
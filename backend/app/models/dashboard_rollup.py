@@ -0,0 +1,51 @@
+from sqlalchemy import Column, Date, DateTime, BigInteger, Text, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+
+from app.core.db import Base
+
+
+class QADailyCount(Base):
+    """링크 소유자별 일별 질문 수. (QA 로그 저장 시 +1)"""
+
+    __tablename__ = "qa_daily_counts"
+
+    owner_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    count = Column(BigInteger, nullable=False, default=0)
+    cache_hits = Column(BigInteger, nullable=False, default=0)  # 그중 답변 캐시 hit 수
+    version = Column(BigInteger, nullable=False, default=0)  # 이 행을 마지막으로 바꾼 대시보드 버전
+
+
+class QAKeywordCount(Base):
+    """링크 소유자별 질문 키워드 수."""
+
+    __tablename__ = "qa_keyword_counts"
+
+    owner_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    keyword = Column(Text, primary_key=True)
+    count = Column(BigInteger, nullable=False, default=0)
+    version = Column(BigInteger, nullable=False, default=0)  # 이 행을 마지막으로 바꾼 대시보드 버전
+
+
+class QAFailedQuestion(Base):
+    """링크 소유자별 NO_ANSWER 질문 수. normalized_question이 없는 로그는 ''로 묶는다."""
+
+    __tablename__ = "qa_failed_questions"
+
+    owner_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    normalized_question = Column(Text, primary_key=True)
+    fail_count = Column(BigInteger, nullable=False, default=0)
+    sample_question = Column(Text, nullable=False)
+    last_asked_at = Column(DateTime(timezone=True), nullable=False)
+    version = Column(BigInteger, nullable=False, default=0)
+
+
+class DashboardVersion(Base):
+    """소유자 대시보드의 버전. QA 로그/문서가 바뀌는 트랜잭션에서 +1 (ETag, since 증분 응답의 기준)."""
+
+    __tablename__ = "dashboard_versions"
+
+    owner_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
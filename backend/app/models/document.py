@@ -44,6 +44,7 @@ class Document(Base):
     mime_type = Column(String(100), nullable=True)
     size_bytes = Column(BigInteger, nullable=True)
     blob_path = Column(Text, nullable=False)
+    content_hash = Column(String(64), nullable=True, index=True)  # 원본 sha256 (blob_objects.sha256)
     source = Column(String(50), nullable=False, default="upload")
 
     status = Column(
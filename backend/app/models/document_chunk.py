@@ -0,0 +1,24 @@
+from sqlalchemy import Column, String, DateTime, Integer, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+
+from app.core.db import Base
+
+
+class DocumentChunk(Base):
+    """
+    문서별 청크 manifest: 검색 인덱스에 들어가 있는 `{document_id}_{chunk_id}` 청크의 내용 해시.
+    재인덱싱 때 새 청크와 비교해서 바뀐 청크만 임베딩/upsert 한다.
+    """
+
+    __tablename__ = "document_chunks"
+
+    document_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("documents.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    chunk_id = Column(Integer, primary_key=True)
+    content_hash = Column(String(64), nullable=False)  # sha256(청크 텍스트 + page/section)
+    embedding_model = Column(String(200), nullable=False)
+    indexed_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
@@ -0,0 +1,65 @@
+import uuid
+
+from sqlalchemy import Column, String, DateTime, Integer, SmallInteger, Text, ForeignKey, Index, text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+
+from app.core.db import Base
+
+
+class IndexJobStatus:
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+# 숫자가 클수록 먼저 처리된다.
+PRIORITY_INTERACTIVE = 10  # 사용자가 직접 누른 (재)인덱싱
+PRIORITY_BULK = 0  # 업로드 직후 자동 인덱싱 등
+
+
+class IndexJob(Base):
+    """문서 인덱싱 작업 큐 (SELECT ... FOR UPDATE SKIP LOCKED 로 워커가 lease 한다)"""
+
+    __tablename__ = "index_jobs"
+    __table_args__ = (
+        # 문서당 대기/실행 중인 작업은 하나만
+        Index(
+            "uq_index_jobs_active_document",
+            "document_id",
+            unique=True,
+            postgresql_where=text("status IN ('queued', 'running')"),
+        ),
+        Index(
+            "idx_index_jobs_dequeue",
+            text("priority DESC"),
+            "run_after",
+            postgresql_where=text("status = 'queued'"),
+        ),
+        Index(
+            "idx_index_jobs_leased_until",
+            "leased_until",
+            postgresql_where=text("status = 'running'"),
+        ),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    document_id = Column(UUID(as_uuid=True), ForeignKey("documents.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+
+    status = Column(String(20), nullable=False, default=IndexJobStatus.QUEUED)
+    priority = Column(SmallInteger, nullable=False, default=PRIORITY_BULK)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+
+    run_after = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    leased_until = Column(DateTime(timezone=True), nullable=True)
+    lease_owner = Column(String(100), nullable=True)
+    last_error = Column(Text, nullable=True)
+    chunk_count = Column(Integer, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, DateTime, BigInteger, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+
+from app.core.db import Base
+
+
+class IndexVersion(Base):
+    """
+    사용자별 검색 인덱스 버전. 문서 인덱싱 완료/삭제/이동, 페르소나 변경 트랜잭션에서 +1.
+    답변 캐시 키에 들어가므로 어느 프로세스에서 올려도 모든 워커의 이전 답변이 무효화된다.
+    """
+
+    __tablename__ = "index_versions"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -1,10 +1,19 @@
-from sqlalchemy import Column, Text, ForeignKey
+from sqlalchemy import Column, DateTime, ForeignKeyConstraint, Text
 from sqlalchemy.dialects.postgresql import UUID
 from app.core.db import Base
 
 
 class QAKetword(Base):  # keeping name to match instruction spelling
     __tablename__ = "qa_keywords"
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ["qa_log_id", "created_at"],
+            ["qa_logs.id", "qa_logs.created_at"],
+            ondelete="CASCADE",
+        ),
+    )
 
-    qa_log_id = Column(UUID(as_uuid=True), ForeignKey("qa_logs.id", ondelete="CASCADE"), primary_key=True)
+    qa_log_id = Column(UUID(as_uuid=True), primary_key=True)
     keyword = Column(Text, primary_key=True)
+    # 로그의 created_at. qa_logs와 같은 달 파티션에 들어간다.
+    created_at = Column(DateTime(timezone=True), primary_key=True)
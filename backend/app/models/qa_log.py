@@ -1,6 +1,6 @@
 import uuid
 
-from sqlalchemy import Column, String, DateTime, Integer, Text, ForeignKey
+from sqlalchemy import Boolean, Column, String, DateTime, Integer, Text, ForeignKey, false
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 
@@ -25,8 +25,14 @@ class QALog(Base):
     model = Column(String(100), nullable=True)
     prompt_tokens = Column(Integer, nullable=True)
     completion_tokens = Column(Integer, nullable=True)
+    context_tokens_saved = Column(Integer, nullable=True)
     latency_ms = Column(Integer, nullable=True)
     status = Column(String(20), nullable=True, default="SUCCESS")
     normalized_question = Column(Text, nullable=True)
+    # 링크 경유 질문이면 링크 소유자 (대시보드 주인)
+    owner_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    # 답변 캐시에서 바로 돌려준 질문 (대시보드 캐시 hit/miss)
+    cache_hit = Column(Boolean, nullable=False, default=False, server_default=false())
 
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    # created_at 기준 월별 파티션이라 PK에 같이 들어간다. (app.services.qa_log_partitions)
+    created_at = Column(DateTime(timezone=True), primary_key=True, server_default=func.now(), nullable=False)
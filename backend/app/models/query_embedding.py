@@ -0,0 +1,21 @@
+from sqlalchemy import Column, String, DateTime, Integer, Text, LargeBinary
+from sqlalchemy.sql import func
+
+from app.core.db import Base
+
+
+class QueryEmbedding(Base):
+    """질문 임베딩 캐시 (정규화 질문 해시 → float32 벡터 bytes)"""
+
+    __tablename__ = "query_embeddings"
+
+    question_hash = Column(String(64), primary_key=True)  # sha256(normalized question)
+    model = Column(String(100), primary_key=True)
+
+    question = Column(Text, nullable=False)
+    dims = Column(Integer, nullable=False)
+    vector = Column(LargeBinary, nullable=False)  # little-endian float32
+    hit_count = Column(Integer, nullable=False, default=0)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    last_used_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -31,3 +31,28 @@ class DocumentIndexCallback(BaseModel):
     status: DocumentStatus
     chunk_count: int | None = Field(default=None, description="Number of processed chunks")
     error_message: str | None = Field(default=None, description="Error message when indexing fails")
+
+
+class BatchUploadError(BaseModel):
+    file_name: str
+    detail: str
+
+
+class BatchUploadResult(BaseModel):
+    documents: list[DocumentRead]
+    errors: list[BatchUploadError] = Field(default_factory=list)
+
+
+class UploadSessionRead(BaseModel):
+    upload_id: UUID
+    block_size: int = Field(..., description="Maximum bytes per block")
+    blocks: dict[int, int] = Field(default_factory=dict, description="Staged block index → size")
+
+
+class UploadSessionComplete(BaseModel):
+    file_name: str
+    block_count: int = Field(..., ge=1)
+    content_type: str | None = None
+    title: str | None = None
+    group_id: UUID | None = None
+    index: bool | None = Field(default=None, description="Start indexing right away (default: INDEX_ON_UPLOAD)")
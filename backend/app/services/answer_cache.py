@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+from uuid import UUID
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.index_version import IndexVersion
+
+
+@dataclass
+class CachedAnswer:
+    answer: str
+    status: str
+    hits: List[Any]
+    normalized: Optional[str]
+    keywords: List[str] = field(default_factory=list)
+
+
+class AnswerCache:
+    """
+    (user_id, 검색 범위, 정규화 질문, 인덱스 버전) → 답변 캐시.
+
+    - 인덱스 버전은 DB(index_versions)의 사용자별 카운터다. 문서가 인덱싱 완료/삭제/이동되거나
+      페르소나가 바뀌는 트랜잭션에서 bump_index_version()으로 올려서 이전 답변을 모두 무효화한다.
+      요청마다 aindex_version()으로 한 번 읽어 키에 넣으므로, 캐시는 프로세스 로컬이어도
+      어느 프로세스(인덱스 워커 포함)가 올린 버전이든 바로 반영된다.
+    - hit/miss는 키 조회 횟수가 아니라 질문 단위로 센다. (record_lookup, 한 질문에 키가 여러 개일 수 있음)
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self._cache = TTLCache(max_entries, ttl_seconds)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def scope_of(group_id: UUID | str | None, document_id: UUID | str | None) -> str:
+        if group_id:
+            return f"group:{group_id}"
+        if document_id:
+            return f"doc:{document_id}"
+        return "all"
+
+    @staticmethod
+    def _key(user_id: UUID | str, scope: str, version: int, question_key: str) -> tuple:
+        return (str(user_id), scope, question_key, version)
+
+    def get(self, user_id: UUID | str, scope: str, version: int, question_key: str | None) -> CachedAnswer | None:
+        if not settings.answer_cache_enabled or not question_key:
+            return None
+        return self._cache.get(self._key(user_id, scope, version, question_key))
+
+    def set(
+        self,
+        user_id: UUID | str,
+        scope: str,
+        version: int,
+        question_keys: List[str | None],
+        value: CachedAnswer,
+    ) -> None:
+        if not settings.answer_cache_enabled:
+            return
+        for question_key in {k for k in question_keys if k}:
+            self._cache.set(self._key(user_id, scope, version, question_key), value)
+
+    def record_lookup(self, hit: bool) -> None:
+        """질문 하나의 캐시 조회 결과를 센다."""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "enabled": settings.answer_cache_enabled,
+            "entries": len(self._cache),
+            "evictions": self._cache.evictions,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+def _bump_stmt(user_ids: Iterable[UUID]):
+    # 여러 사용자를 한 번에 올릴 때 행 잠금 순서를 고정한다.
+    rows = [{"user_id": user_id, "version": 1} for user_id in sorted(set(user_ids), key=str)]
+    return pg_insert(IndexVersion).values(rows).on_conflict_do_update(
+        index_elements=[IndexVersion.user_id],
+        set_={"version": IndexVersion.version + 1, "updated_at": func.now()},
+    )
+
+
+def bump_index_version(db: Session, *user_ids: UUID) -> None:
+    """사용자의 인덱스 버전을 올린다. 문서/페르소나를 바꾸는 트랜잭션 안에서 호출하고 커밋은 호출자가 한다."""
+    if user_ids:
+        db.execute(_bump_stmt(user_ids))
+
+
+async def abump_index_version(db: AsyncSession, *user_ids: UUID) -> None:
+    """bump_index_version()의 AsyncSession 버전."""
+    if user_ids:
+        await db.execute(_bump_stmt(user_ids))
+
+
+async def aindex_version(db: AsyncSession, user_id: UUID) -> int:
+    return (
+        await db.execute(select(IndexVersion.version).where(IndexVersion.user_id == user_id))
+    ).scalar_one_or_none() or 0
+
+
+answer_cache = AnswerCache(
+    max_entries=settings.answer_cache_max_entries,
+    ttl_seconds=settings.answer_cache_ttl_seconds,
+)
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from collections import Counter
+from typing import Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import Integer, String, column, delete, func, update, values
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.blob_object import BlobObject
+
+
+async def acquire_blob_object(
+    db: AsyncSession,
+    sha256: str,
+    blob_path: str,
+    size_bytes: Optional[int],
+    mime_type: Optional[str],
+) -> Tuple[str, bool]:
+    """
+    sha256 객체의 ref_count를 1 올리고 (공유 blob_path, 새로 만든 객체인지)를 돌려준다.
+    새 객체면 방금 올린 blob_path가 그 객체가 되고, 이미 있으면 호출자가 방금 올린 blob을 지운다.
+    커밋은 호출자가 한다. (Document 생성과 같은 트랜잭션)
+    """
+    stmt = pg_insert(BlobObject).values(
+        sha256=sha256,
+        blob_path=blob_path,
+        size_bytes=size_bytes,
+        mime_type=mime_type,
+        ref_count=1,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[BlobObject.sha256],
+        set_={"ref_count": BlobObject.ref_count + 1, "updated_at": func.now()},
+    ).returning(BlobObject.blob_path, BlobObject.ref_count)
+    path, ref_count = (await db.execute(stmt)).one()
+    return path, ref_count == 1
+
+
+def release_blob_object(db: Session, sha256: str) -> Tuple[bool, Optional[str]]:
+    """
+    ref_count를 1 내린다. (blob_objects가 관리하는 원본인지, 마지막 참조였으면 지워야 할 blob_path)
+    커밋은 호출자가 하고, blob 삭제는 커밋 뒤에 한다.
+    """
+    row = db.execute(
+        update(BlobObject)
+        .where(BlobObject.sha256 == sha256)
+        .values(ref_count=BlobObject.ref_count - 1, updated_at=func.now())
+        .returning(BlobObject.blob_path, BlobObject.ref_count)
+        .execution_options(synchronize_session=False)
+    ).one_or_none()
+    if row is None:
+        return False, None
+    path, ref_count = row
+    if ref_count > 0:
+        return True, None
+    db.execute(delete(BlobObject).where(BlobObject.sha256 == sha256, BlobObject.ref_count <= 0))
+    return True, path
+
+
+def release_blob_objects(db: Session, hashes: Iterable[str]) -> Tuple[Set[str], List[str]]:
+    """
+    release_blob_object()의 일괄 버전: 문서 여러 개가 같은 내용이면 그만큼 내린다. UPDATE 한 번.
+    (blob_objects가 관리하는 sha256 집합, 마지막 참조였던 blob_path 목록)
+    """
+    counts = Counter(h for h in hashes if h)
+    if not counts:
+        return set(), []
+    released = values(column("sha256", String), column("n", Integer), name="released").data(list(counts.items()))
+    rows = db.execute(
+        update(BlobObject)
+        .where(BlobObject.sha256 == released.c.sha256)
+        .values(ref_count=BlobObject.ref_count - released.c.n, updated_at=func.now())
+        .returning(BlobObject.sha256, BlobObject.blob_path, BlobObject.ref_count)
+        .execution_options(synchronize_session=False)
+    ).all()
+    managed = {sha256 for sha256, _, _ in rows}
+    orphans = [(sha256, path) for sha256, path, ref_count in rows if ref_count <= 0]
+    if orphans:
+        db.execute(
+            delete(BlobObject).where(BlobObject.sha256.in_([sha256 for sha256, _ in orphans]), BlobObject.ref_count <= 0)
+        )
+    return managed, [path for _, path in orphans]
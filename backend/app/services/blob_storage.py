@@ -1,32 +1,150 @@
 from __future__ import annotations
 
-from typing import BinaryIO, Iterable, Optional
+import asyncio
+import base64
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterable, BinaryIO, Dict, Iterable, List, Optional, Sequence, Set, Tuple
 
-from azure.core.exceptions import AzureError
-from azure.storage.blob import BlobServiceClient, ContainerClient, ContentSettings
+import aiohttp
+import requests
+from azure.core import MatchConditions
+from azure.core.exceptions import AzureError, ResourceNotFoundError
+from azure.core.pipeline.transport import AioHttpTransport, RequestsTransport
+from azure.storage.blob import (
+    BlobSasPermissions,
+    ContainerClient,
+    ContentSettings,
+    ExponentialRetry,
+    generate_blob_sas,
+)
+from azure.storage.blob.aio import ContainerClient as AsyncContainerClient
 
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
 
-def get_blob_container_client() -> ContainerClient:
+# Blob Batch 한 요청에 담을 수 있는 하위 요청 수
+BLOB_BATCH_SIZE = 256
+
+
+def _account_url() -> str:
+    if settings.azure_storage_account_url and settings.azure_storage_account_key:
+        return settings.azure_storage_account_url
+    if settings.azure_storage_account_name and settings.azure_storage_account_key:
+        return f"https://{settings.azure_storage_account_name}.blob.core.windows.net"
+    raise RuntimeError("Azure Blob Storage credentials are not configured.")
+
+
+def _client_options() -> dict:
+    return {
+        "retry_policy": ExponentialRetry(
+            initial_backoff=settings.blob_retry_initial_backoff,
+            retry_total=settings.blob_retry_total,
+        ),
+        "connection_timeout": settings.blob_connect_timeout,
+        "read_timeout": settings.blob_read_timeout,
+    }
+
+
+def _build_sync_client() -> ContainerClient:
     """
-    Resolve a ContainerClient using the configured credentials.
     Connection string 우선, 없으면 account URL + key, 마지막으로 account name + key 조합을 사용.
     """
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=1, pool_maxsize=settings.blob_pool_max_connections
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    options = {**_client_options(), "transport": RequestsTransport(session=session, session_owner=True)}
+    if settings.azure_storage_connection_string:
+        return ContainerClient.from_connection_string(
+            settings.azure_storage_connection_string, settings.azure_blob_container, **options
+        )
+    return ContainerClient(
+        _account_url(), settings.azure_blob_container, credential=settings.azure_storage_account_key, **options
+    )
+
+
+def _build_async_client() -> AsyncContainerClient:
+    # aiohttp 세션은 실행 중인 이벤트 루프 안에서 만들어야 한다.
+    session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=settings.blob_pool_max_connections)
+    )
+    options = {**_client_options(), "transport": AioHttpTransport(session=session, session_owner=True)}
     if settings.azure_storage_connection_string:
-        service = BlobServiceClient.from_connection_string(settings.azure_storage_connection_string)
-    elif settings.azure_storage_account_url and settings.azure_storage_account_key:
-        service = BlobServiceClient(
-            account_url=settings.azure_storage_account_url,
-            credential=settings.azure_storage_account_key,
+        return AsyncContainerClient.from_connection_string(
+            settings.azure_storage_connection_string, settings.azure_blob_container, **options
         )
-    elif settings.azure_storage_account_name and settings.azure_storage_account_key:
-        account_url = f"https://{settings.azure_storage_account_name}.blob.core.windows.net"
-        service = BlobServiceClient(account_url=account_url, credential=settings.azure_storage_account_key)
-    else:
-        raise RuntimeError("Azure Blob Storage credentials are not configured.")
+    return AsyncContainerClient(
+        _account_url(), settings.azure_blob_container, credential=settings.azure_storage_account_key, **options
+    )
+
+
+class BlobClientRegistry:
+    """
+    프로세스 전체가 재사용하는 ContainerClient (sync/aio 각각 하나, 커넥션 풀 공유).
+
+    - 앱 lifespan에서 open()/aclose() 로 관리한다.
+    - lifespan 밖(스크립트, 워커)에서 호출되면 최초 사용 시 lazy 하게 만든다.
+    - SDK 클라이언트는 스레드 안전하므로 threadpool의 sync 라우트들이 같이 써도 된다.
+    """
+
+    def __init__(self) -> None:
+        self._sync: Optional[ContainerClient] = None
+        self._async: Optional[AsyncContainerClient] = None
+        self._lock = threading.Lock()
+
+    def get_sync(self) -> ContainerClient:
+        client = self._sync
+        if client is None:
+            with self._lock:
+                client = self._sync
+                if client is None:
+                    client = self._sync = _build_sync_client()
+        return client
+
+    def get_async(self) -> AsyncContainerClient:
+        # 이벤트 루프 스레드에서만 불리므로 await 없이 만드는 동안 끼어들 수 없다.
+        client = self._async
+        if client is None:
+            client = self._async = _build_async_client()
+        return client
+
+    def open(self) -> None:
+        try:
+            self.get_sync()
+            self.get_async()
+        except RuntimeError as exc:
+            # 자격 증명이 없는 개발 환경에서도 앱은 뜨고, blob을 쓰는 요청만 실패한다.
+            logger.warning("Blob storage clients not initialised: %s", exc)
+
+    async def aclose(self) -> None:
+        with self._lock:
+            sync_client, self._sync = self._sync, None
+            async_client, self._async = self._async, None
+        if async_client is not None:
+            try:
+                await async_client.close()
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("Failed to close async blob client: %s", exc)
+        if sync_client is not None:
+            try:
+                sync_client.close()
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("Failed to close blob client: %s", exc)
+
+
+blob_clients = BlobClientRegistry()
+
 
-    return service.get_container_client(settings.azure_blob_container)
+def get_blob_container_client() -> ContainerClient:
+    """Process-wide ContainerClient (FastAPI dependency로도 쓴다)."""
+    return blob_clients.get_sync()
 
 
 def upload_blob(
@@ -64,13 +182,253 @@ def delete_blob(container: ContainerClient, blob_path: str) -> None:
         raise RuntimeError(f"Failed to delete blob: {exc}") from exc
 
 
-def download_blob(container: ContainerClient, blob_path: str) -> Iterable[bytes]:
+def delete_blobs(container: ContainerClient, blob_paths: Sequence[str]) -> List[str]:
+    """
+    여러 blob을 Blob Batch 요청(최대 256개씩)으로 지운다. 없는 blob은 무시하고, 지우지 못한 경로를 돌려준다.
+    배치를 지원하지 않는 계정(계층 네임스페이스 등)이면 하나씩 지운다.
+    """
+    failed: List[str] = []
+    for start in range(0, len(blob_paths), BLOB_BATCH_SIZE):
+        batch = list(blob_paths[start : start + BLOB_BATCH_SIZE])
+        try:
+            responses = container.delete_blobs(*batch, delete_snapshots="include", raise_on_any_failure=False)
+            failed.extend(path for path, resp in zip(batch, responses) if resp.status_code >= 300 and resp.status_code != 404)
+        except AzureError:
+            for path in batch:
+                try:
+                    delete_blob(container, path)
+                except RuntimeError:
+                    failed.append(path)
+    return failed
+
+
+def download_blob(
+    container: ContainerClient,
+    blob_path: str,
+    offset: Optional[int] = None,
+    length: Optional[int] = None,
+    etag: Optional[str] = None,
+) -> Iterable[bytes]:
     """
     Stream blob content in chunks.
+    offset/length를 주면 그 바이트 구간만 받는다. etag를 주면 그 사이 blob이 바뀐 경우 실패한다(If-Match).
     """
     try:
         blob_client = container.get_blob_client(blob_path)
-        stream = blob_client.download_blob()
+        if etag:
+            stream = blob_client.download_blob(offset=offset, length=length, etag=etag, match_condition=MatchConditions.IfNotModified)
+        else:
+            stream = blob_client.download_blob(offset=offset, length=length)
         return stream.chunks()
     except AzureError as exc:
         raise RuntimeError(f"Failed to download blob: {exc}") from exc
+
+
+@dataclass
+class BlobInfo:
+    etag: str  # Azure가 주는 따옴표 포함 strong ETag
+    size_bytes: int
+    last_modified: Optional[datetime]
+
+
+def get_blob_info(container: ContainerClient, blob_path: str) -> Optional[BlobInfo]:
+    """blob 속성(HEAD 한 번). 없으면 None."""
+    try:
+        props = container.get_blob_client(blob_path).get_blob_properties()
+    except ResourceNotFoundError:
+        return None
+    except AzureError as exc:
+        raise RuntimeError(f"Failed to read blob properties: {exc}") from exc
+    etag = props.etag if props.etag.startswith('"') else f'"{props.etag}"'
+    return BlobInfo(etag=etag, size_bytes=props.size, last_modified=props.last_modified)
+
+
+def generate_download_url(
+    container: ContainerClient,
+    blob_path: str,
+    ttl_seconds: int,
+    content_type: Optional[str] = None,
+    content_disposition: Optional[str] = None,
+) -> str:
+    """
+    읽기 전용 단기 SAS URL. 응답 헤더(Content-Type/Disposition)는 SAS에 실어서 Azure가 내려주게 한다.
+    계정 키가 없는 자격 증명(SAS 연결 문자열 등)이면 RuntimeError.
+    """
+    account_key = getattr(container.credential, "account_key", None)
+    if not account_key:
+        raise RuntimeError("SAS generation requires an account key credential.")
+    now = datetime.now(timezone.utc)
+    sas = generate_blob_sas(
+        account_name=container.account_name,
+        container_name=container.container_name,
+        blob_name=blob_path,
+        account_key=account_key,
+        permission=BlobSasPermissions(read=True),
+        start=now - timedelta(minutes=5),  # 서버 간 시계 오차
+        expiry=now + timedelta(seconds=ttl_seconds),
+        content_type=content_type,
+        content_disposition=content_disposition,
+    )
+    return f"{container.get_blob_client(blob_path).url}?{sas}"
+
+
+# ------------------------------
+# Async (azure.storage.blob.aio) – 업로드 경로에서 이벤트 루프를 막지 않는다
+# ------------------------------
+def get_async_blob_container_client() -> AsyncContainerClient:
+    """Process-wide aio ContainerClient. 호출자가 닫지 않는다."""
+    return blob_clients.get_async()
+
+
+async def async_blob_container() -> AsyncContainerClient:
+    """FastAPI dependency."""
+    return blob_clients.get_async()
+
+
+def block_id(index: int) -> str:
+    """블록 번호 → Azure block id (한 blob 안의 block id는 길이가 같아야 한다)."""
+    return base64.b64encode(f"{index:010d}".encode()).decode()
+
+
+def block_index(value: str) -> Optional[int]:
+    try:
+        return int(base64.b64decode(value).decode())
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+class UploadTooLarge(RuntimeError):
+    """스트리밍 중 max_bytes를 넘었다. (스테이징된 블록은 커밋되지 않고 Azure가 정리한다)"""
+
+
+@dataclass
+class UploadResult:
+    blob_path: str
+    sha256: str
+    size_bytes: int
+
+
+async def upload_stream(
+    container: AsyncContainerClient,
+    blob_path: str,
+    chunks: AsyncIterable[bytes],
+    content_type: Optional[str] = None,
+    max_bytes: Optional[int] = None,
+    block_size: Optional[int] = None,
+    max_concurrency: Optional[int] = None,
+) -> UploadResult:
+    """
+    들어오는 바이트를 block_size 블록으로 나눠 Put Block을 max_concurrency개까지 동시에 보내고 Put Block List로 커밋한다.
+    sha256/크기는 흘러가는 동안 계산하고, max_bytes를 넘는 순간 중단한다. (seek 없음)
+    메모리는 블록 (max_concurrency + 1)개 정도로 제한된다. 블록 하나보다 작은 파일은 Put Blob 한 번으로 올린다.
+    """
+    block_size = max(1, block_size or settings.blob_upload_block_size)
+    concurrency = max(1, max_concurrency or settings.blob_upload_max_concurrency)
+    blob = container.get_blob_client(blob_path)
+    content_settings = ContentSettings(content_type=content_type or "application/octet-stream")
+
+    digest = hashlib.sha256()
+    size = 0
+    buffer = bytearray()
+    block_ids: List[str] = []
+    pending: Set[asyncio.Task] = set()
+
+    async def stage(data: bytes) -> None:
+        block_ids.append(block_id(len(block_ids)))
+        while len(pending) >= concurrency:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            pending.difference_update(done)
+            for task in done:
+                task.result()  # 실패한 블록이 있으면 여기서 올라온다
+        pending.add(asyncio.create_task(blob.stage_block(block_ids[-1], data, length=len(data))))
+
+    try:
+        async for piece in chunks:
+            if not piece:
+                continue
+            size += len(piece)
+            if max_bytes is not None and size > max_bytes:
+                raise UploadTooLarge(f"Upload exceeds {max_bytes} bytes")
+            digest.update(piece)
+            buffer += piece
+            while len(buffer) >= block_size:
+                await stage(bytes(buffer[:block_size]))
+                del buffer[:block_size]
+
+        if not block_ids:
+            await blob.upload_blob(bytes(buffer), overwrite=True, content_settings=content_settings)
+        else:
+            if buffer:
+                await stage(bytes(buffer))
+            await asyncio.gather(*pending)
+            await blob.commit_block_list(block_ids, content_settings=content_settings)
+    except AzureError as exc:
+        raise RuntimeError(f"Failed to upload blob: {exc}") from exc
+    finally:
+        for task in pending:
+            if not task.done():
+                task.cancel()
+
+    return UploadResult(blob_path=blob_path, sha256=digest.hexdigest(), size_bytes=size)
+
+
+async def adelete_blob(container: AsyncContainerClient, blob_path: str) -> None:
+    """delete_blob()의 async 버전 (없는 blob은 무시)."""
+    try:
+        await container.delete_blob(blob_path, delete_snapshots="include")
+    except AzureError as exc:
+        if "BlobNotFound" in str(exc):
+            return
+        raise RuntimeError(f"Failed to delete blob: {exc}") from exc
+
+
+# ------------------------------
+# Resumable upload (클라이언트가 블록 번호를 지정해서 올리고, 끊기면 빠진 블록만 다시 보낸다)
+# ------------------------------
+async def stage_block(container: AsyncContainerClient, blob_path: str, index: int, data: bytes) -> None:
+    try:
+        await container.get_blob_client(blob_path).stage_block(block_id(index), data, length=len(data))
+    except AzureError as exc:
+        raise RuntimeError(f"Failed to stage block: {exc}") from exc
+
+
+async def list_staged_blocks(container: AsyncContainerClient, blob_path: str) -> Dict[int, int]:
+    """커밋되지 않은 블록 번호 → 크기. (Azure는 커밋되지 않은 블록을 7일 뒤 지운다)"""
+    try:
+        _, uncommitted = await container.get_blob_client(blob_path).get_block_list("uncommitted")
+    except ResourceNotFoundError:
+        return {}
+    except AzureError as exc:
+        raise RuntimeError(f"Failed to list blocks: {exc}") from exc
+    blocks: Dict[int, int] = {}
+    for block in uncommitted:
+        index = block_index(block.id)
+        if index is not None:
+            blocks[index] = block.size
+    return blocks
+
+
+async def commit_blocks(
+    container: AsyncContainerClient, blob_path: str, count: int, content_type: Optional[str] = None
+) -> None:
+    try:
+        await container.get_blob_client(blob_path).commit_block_list(
+            [block_id(i) for i in range(count)],
+            content_settings=ContentSettings(content_type=content_type or "application/octet-stream"),
+        )
+    except AzureError as exc:
+        raise RuntimeError(f"Failed to commit blocks: {exc}") from exc
+
+
+async def hash_blob(container: AsyncContainerClient, blob_path: str) -> Tuple[str, int]:
+    """커밋된 blob을 스트리밍으로 읽으며 (sha256, 크기)를 구한다."""
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        stream = await container.get_blob_client(blob_path).download_blob()
+        async for chunk in stream.chunks():
+            digest.update(chunk)
+            size += len(chunk)
+    except AzureError as exc:
+        raise RuntimeError(f"Failed to read blob: {exc}") from exc
+    return digest.hexdigest(), size
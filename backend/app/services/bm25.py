@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import math
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.question_normalizer import keyword_tokens
+
+
+def bm25_tokens(text: str) -> List[str]:
+    """BM25 색인/질의 공용 토큰화 (워드클라우드 키워드와 같은 규칙, 소문자화)."""
+    return [t.lower() for t in keyword_tokens(text or "")]
+
+
+class BM25Index:
+    """
+    청크 텍스트에 대한 작은 in-memory BM25(Okapi) 역색인.
+    term → (행 번호 배열, tf 배열) posting을 NumPy 배열로 들고 있어서 질의 점수를 벡터 연산으로 더한다.
+    """
+
+    def __init__(self, texts: Sequence[str], k1: float = 1.2, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self.size = len(texts)
+
+        postings: Dict[str, Tuple[List[int], List[int]]] = {}
+        lengths = np.zeros(self.size, dtype=np.float32)
+        for row, text in enumerate(texts):
+            counts = Counter(bm25_tokens(text))
+            lengths[row] = sum(counts.values())
+            for term, tf in counts.items():
+                rows, tfs = postings.setdefault(term, ([], []))
+                rows.append(row)
+                tfs.append(tf)
+
+        avgdl = float(lengths.mean()) if self.size and lengths.any() else 1.0
+        self._norm = (k1 * (1 - b + b * lengths / avgdl)).astype(np.float32)
+        self._postings = {
+            term: (np.asarray(rows, dtype=np.int64), np.asarray(tfs, dtype=np.float32))
+            for term, (rows, tfs) in postings.items()
+        }
+
+    def _idf(self, df: int) -> float:
+        return math.log(1 + (self.size - df + 0.5) / (df + 0.5))
+
+    def scores(self, query: str) -> np.ndarray:
+        scores = np.zeros(self.size, dtype=np.float32)
+        for term in set(bm25_tokens(query)):
+            posting = self._postings.get(term)
+            if posting is None:
+                continue
+            rows, tfs = posting
+            scores[rows] += self._idf(len(rows)) * tfs * (self.k1 + 1) / (tfs + self._norm[rows])
+        return scores
+
+    def top_k(self, query: str, top_k: int, rows: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """점수 > 0 인 행 중 상위 top_k (행 번호, 점수)를 내림차순으로. rows가 있으면 그 행들로 제한."""
+        if top_k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        scores = self.scores(query)
+        candidates = np.flatnonzero(scores) if rows is None else rows[scores[rows] > 0]
+        if candidates.size > top_k:
+            candidates = candidates[np.argpartition(-scores[candidates], top_k - 1)[:top_k]]
+        order = np.argsort(-scores[candidates], kind="stable")
+        candidates = candidates[order]
+        return candidates, scores[candidates]
@@ -0,0 +1,407 @@
+from __future__ import annotations
+
+import codecs
+import io
+import posixpath
+import re
+import zipfile
+from dataclasses import dataclass
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+from xml.etree import ElementTree as ET
+
+from app.core.config import settings
+
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+PPTX_MIME = "application/vnd.openxmlformats-officedocument.presentationml.presentation"
+
+_FORMAT_BY_MIME = {
+    "application/pdf": "pdf",
+    DOCX_MIME: "docx",
+    XLSX_MIME: "xlsx",
+    PPTX_MIME: "pptx",
+}
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_S = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_A = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+_P = "{http://schemas.openxmlformats.org/presentationml/2006/main}"
+_R = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+
+class ExtractionError(ValueError):
+    """원본에서 텍스트를 뽑을 수 없음 (손상된 파일, 지원하지 않는 형식 등)."""
+
+
+@dataclass
+class Segment:
+    """추출기가 흘려보내는 단위 (PDF 페이지, 문단, 시트의 행, 슬라이드)."""
+
+    text: str
+    page: Optional[int] = None  # PDF/DOCX 페이지, PPTX 슬라이드 번호 (1부터)
+    section: Optional[str] = None  # 현재 제목 / 시트 이름 / 슬라이드 제목
+    heading: bool = False  # 제목 문단 자체 (다음 본문과 같은 청크에 들어간다)
+
+
+@dataclass
+class Chunk:
+    text: str
+    page: Optional[int] = None  # 청크가 시작하는 페이지
+    section: Optional[str] = None
+
+
+def detect_format(mime_type: Optional[str], file_name: Optional[str]) -> str:
+    """"pdf" | "docx" | "xlsx" | "pptx" | "text"."""
+    fmt = _FORMAT_BY_MIME.get((mime_type or "").split(";")[0].strip().lower())
+    if fmt:
+        return fmt
+    ext = posixpath.splitext((file_name or "").lower())[1].lstrip(".")
+    return ext if ext in ("pdf", "docx", "xlsx", "pptx") else "text"
+
+
+def iter_segments(fp: BinaryIO, mime_type: Optional[str], file_name: Optional[str]) -> Iterator[Segment]:
+    """
+    seek 가능한 바이너리 파일에서 Segment를 하나씩 뽑는다.
+    전체 텍스트를 만들지 않고 페이지/문단/행 단위로 흘려보내므로 큰 파일도 메모리가 일정하다.
+    """
+    fmt = detect_format(mime_type, file_name)
+    try:
+        if fmt == "pdf":
+            yield from _pdf_segments(fp)
+        elif fmt == "docx":
+            yield from _docx_segments(fp)
+        elif fmt == "xlsx":
+            yield from _xlsx_segments(fp)
+        elif fmt == "pptx":
+            yield from _pptx_segments(fp)
+        else:
+            yield from _text_segments(fp)
+    except (zipfile.BadZipFile, KeyError, ET.ParseError) as exc:
+        raise ExtractionError(f"Cannot read {fmt.upper()} file: {exc}") from exc
+
+
+# ------------------------------
+# Extractors
+# ------------------------------
+def _pdf_segments(fp: BinaryIO) -> Iterator[Segment]:
+    try:
+        from pypdf import PdfReader
+    except ImportError as exc:  # pragma: no cover - requirements.txt에 포함
+        raise ExtractionError("PDF extraction requires the 'pypdf' package") from exc
+
+    reader = PdfReader(fp)
+    outline = _pdf_outline(reader)
+    section = None
+    for number, page in enumerate(reader.pages, start=1):
+        section = outline.get(number, section)
+        text = page.extract_text() or ""
+        if text.strip():
+            yield Segment(text, page=number, section=section)
+
+
+def _pdf_outline(reader) -> Dict[int, str]:
+    """최상위 책갈피(outline) 제목 → 시작 페이지. 책갈피가 없거나 깨져 있으면 빈 dict."""
+    starts: Dict[int, str] = {}
+    try:
+        for item in reader.outline:
+            if isinstance(item, list):  # 하위 책갈피
+                continue
+            page = reader.get_destination_page_number(item)
+            if page is not None and item.title:
+                starts.setdefault(page + 1, item.title.strip()[:200])
+    except Exception:  # noqa: BLE001
+        return {}
+    return starts
+
+
+_HEADING_STYLE_RE = re.compile(r"^(heading|title|subtitle|제목|부제)\s*\d*$", re.IGNORECASE)
+
+
+def _docx_segments(fp: BinaryIO) -> Iterator[Segment]:
+    with zipfile.ZipFile(fp) as zf, zf.open("word/document.xml") as xml:
+        page = 1
+        section = None
+        depth = 0
+        body: Optional[ET.Element] = None
+        for event, el in ET.iterparse(xml, events=("start", "end")):
+            if event == "start":
+                depth += 1
+                if el.tag == f"{_W}body":
+                    body = el
+                continue
+            depth -= 1
+            if el.tag == f"{_W}p":
+                segment, page, section = _docx_paragraph(el, page, section)
+                el.clear()
+                if segment is not None:
+                    yield segment
+            if depth == 2 and body is not None:
+                body.clear()  # 끝난 문단/표는 버려서 메모리를 일정하게 유지
+
+
+def _docx_paragraph(
+    el: ET.Element, page: int, section: Optional[str]
+) -> Tuple[Optional[Segment], int, Optional[str]]:
+    parts: List[str] = []
+    for node in el.iter():
+        if node.tag == f"{_W}t":
+            parts.append(node.text or "")
+        elif node.tag == f"{_W}tab":
+            parts.append("\t")
+        elif node.tag == f"{_W}br":
+            if node.get(f"{_W}type") == "page":
+                page += 1
+            else:
+                parts.append("\n")
+        elif node.tag == f"{_W}lastRenderedPageBreak":
+            page += 1
+    text = "".join(parts)
+    if not text.strip():
+        return None, page, section
+    ppr = el.find(f"{_W}pPr")
+    style = ppr.find(f"{_W}pStyle") if ppr is not None else None
+    if ppr is not None and (
+        ppr.find(f"{_W}outlineLvl") is not None
+        or (style is not None and _HEADING_STYLE_RE.match(style.get(f"{_W}val", "")))
+    ):
+        section = text.strip()[:200]
+        return Segment(text, page=page, section=section, heading=True), page, section
+    return Segment(text, page=page, section=section), page, section
+
+
+def _rels(zf: zipfile.ZipFile, part: str) -> Dict[str, str]:
+    """part의 관계 파일(_rels/*.rels)에서 rId → zip 안의 경로."""
+    base = posixpath.dirname(part)
+    rels_path = posixpath.join(base, "_rels", posixpath.basename(part) + ".rels")
+    targets: Dict[str, str] = {}
+    with zf.open(rels_path) as xml:
+        for rel in ET.parse(xml).getroot().iter(f"{_REL}Relationship"):
+            target = rel.get("Target", "")
+            path = target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join(base, target))
+            targets[rel.get("Id", "")] = path
+    return targets
+
+
+def _xlsx_shared_strings(zf: zipfile.ZipFile) -> List[str]:
+    if "xl/sharedStrings.xml" not in zf.namelist():
+        return []
+    strings: List[str] = []
+    with zf.open("xl/sharedStrings.xml") as xml:
+        for _, el in ET.iterparse(xml):
+            if el.tag == f"{_S}si":
+                strings.append("".join(t.text or "" for t in el.iter(f"{_S}t")))
+                el.clear()
+    return strings
+
+
+def _xlsx_cell(cell: ET.Element, shared: List[str]) -> str:
+    kind = cell.get("t")
+    if kind == "inlineStr":
+        return "".join(t.text or "" for t in cell.iter(f"{_S}t")).strip()
+    value = cell.findtext(f"{_S}v") or ""
+    if kind == "s" and value.isdigit() and int(value) < len(shared):
+        return shared[int(value)].strip()
+    if kind == "b":
+        return "TRUE" if value == "1" else "FALSE"
+    return value.strip()
+
+
+def _xlsx_segments(fp: BinaryIO) -> Iterator[Segment]:
+    with zipfile.ZipFile(fp) as zf:
+        shared = _xlsx_shared_strings(zf)
+        targets = _rels(zf, "xl/workbook.xml")
+        with zf.open("xl/workbook.xml") as xml:
+            sheets = [
+                (sheet.get("name") or "", targets.get(sheet.get(f"{_R}id", ""), ""))
+                for sheet in ET.parse(xml).getroot().iter(f"{_S}sheet")
+            ]
+        for name, path in sheets:
+            if path not in zf.namelist():
+                continue
+            with zf.open(path) as xml:
+                for _, el in ET.iterparse(xml):
+                    if el.tag != f"{_S}row":
+                        continue
+                    values = [_xlsx_cell(c, shared) for c in el.iter(f"{_S}c")]
+                    el.clear()
+                    line = " | ".join(v for v in values if v)
+                    if line:
+                        # 한 행이 한 segment: 문장 분리 없이 행 단위로 청크에 담긴다.
+                        yield Segment(line, section=name)
+
+
+def _pptx_segments(fp: BinaryIO) -> Iterator[Segment]:
+    with zipfile.ZipFile(fp) as zf:
+        targets = _rels(zf, "ppt/presentation.xml")
+        with zf.open("ppt/presentation.xml") as xml:
+            slides = [
+                targets.get(sld.get(f"{_R}id", ""), "")
+                for sld in ET.parse(xml).getroot().iter(f"{_P}sldId")
+            ]
+        for number, path in enumerate(slides, start=1):
+            if path not in zf.namelist():
+                continue
+            with zf.open(path) as xml:
+                root = ET.parse(xml).getroot()
+            title = None
+            paragraphs: List[str] = []
+            for shape in root.iter(f"{_P}sp"):
+                ph = shape.find(f"{_P}nvSpPr/{_P}nvPr/{_P}ph")
+                texts = [
+                    "".join(t.text or "" for t in p.iter(f"{_A}t"))
+                    for p in shape.iter(f"{_A}p")
+                ]
+                texts = [t for t in texts if t.strip()]
+                if ph is not None and ph.get("type") in ("title", "ctrTitle") and texts and title is None:
+                    title = " ".join(texts).strip()[:200]
+                paragraphs.extend(texts)
+            if paragraphs:
+                yield Segment("\n".join(paragraphs), page=number, section=title)
+
+
+_MD_HEADING_RE = re.compile(r"^\s{0,3}#{1,6}\s+(.+?)\s*#*\s*$")
+
+
+def _sniff_encoding(fp: BinaryIO) -> str:
+    sample = fp.read(64 * 1024)
+    fp.seek(0)
+    for encoding in ("utf-8-sig", "cp949"):
+        try:
+            codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return "utf-8"
+
+
+def _text_segments(fp: BinaryIO) -> Iterator[Segment]:
+    """빈 줄로 구분된 문단 단위. 마크다운 제목(#)은 section이 된다."""
+    limit = max(1, settings.index_chunk_size)
+    stream = io.TextIOWrapper(fp, encoding=_sniff_encoding(fp), errors="replace", newline=None)
+    section = None
+    lines: List[str] = []
+    size = 0
+    try:
+        for line in stream:
+            heading = _MD_HEADING_RE.match(line)
+            if heading or not line.strip() or size > limit:
+                if lines:
+                    yield Segment("".join(lines), section=section)
+                    lines, size = [], 0
+                if heading:
+                    section = heading.group(1)[:200]
+                    yield Segment(line, section=section, heading=True)
+                    continue
+            if line.strip():
+                lines.append(line)
+                size += len(line)
+        if lines:
+            yield Segment("".join(lines), section=section)
+    finally:
+        stream.detach()  # fp는 호출자가 닫는다
+
+
+# ------------------------------
+# Chunking
+# ------------------------------
+# 문장 끝(. ! ? 。 … + 닫는 따옴표/괄호) 다음 공백, 또는 빈 줄
+_BOUNDARY_RE = re.compile(r"[.!?。…]+[\"'”’)\]]*(?=\s)|\n\s*\n")
+
+
+def split_sentences(text: str) -> List[str]:
+    pieces: List[str] = []
+    start = 0
+    for match in _BOUNDARY_RE.finditer(text):
+        piece = text[start : match.end()].strip()
+        if piece:
+            pieces.append(piece)
+        start = match.end()
+    tail = text[start:].strip()
+    if tail:
+        pieces.append(tail)
+    return pieces
+
+
+def _hard_split(sentence: str, size: int) -> Iterator[str]:
+    """chunk_size보다 긴 문장은 공백에서(없으면 글자 수로) 자른다."""
+    while len(sentence) > size:
+        cut = sentence.rfind(" ", size // 2, size)
+        cut = cut if cut > 0 else size
+        yield sentence[:cut].strip()
+        sentence = sentence[cut:].strip()
+    if sentence:
+        yield sentence
+
+
+def chunk_segments(
+    segments: Iterable[Segment],
+    chunk_size: Optional[int] = None,
+    overlap: Optional[int] = None,
+) -> Iterator[Chunk]:
+    """
+    Segment들을 chunk_size 글자 이하의 Chunk로 묶는다.
+
+    - 문장 중간에서 자르지 않는다. (chunk_size보다 긴 문장만 예외)
+    - section(제목/시트/슬라이드)이 바뀌면 새 청크를 시작한다. 단 현재 청크에 제목밖에 없으면 이어 붙인다.
+      section마다 경계가 새로 정해지므로 앞부분이 바뀌어도 뒤쪽 section의 청크는 그대로 나온다. (증분 재인덱싱)
+    - 같은 section 안에서 나뉠 때는 앞 청크의 마지막 문장들(overlap 글자 이하)을 다음 청크 앞에 다시 넣는다.
+    - page/section은 청크가 시작하는 위치의 값이다.
+    """
+    size = max(1, chunk_size or settings.index_chunk_size)
+    overlap = min(settings.index_chunk_overlap if overlap is None else overlap, size // 2)
+
+    units: List[Tuple[str, str]] = []  # (앞 구분자, 문장)
+    length = 0
+    fresh = 0  # overlap으로 넘어온 게 아닌 새 문장 수
+    body = False  # 제목이 아닌 새 문장이 있는지
+    page: Optional[int] = None
+    section: Optional[str] = None
+
+    def render() -> str:
+        return "".join(sep + text for sep, text in units).strip()
+
+    def carry() -> List[Tuple[str, str]]:
+        kept: List[Tuple[str, str]] = []
+        total = 0
+        for sep, text in reversed(units):
+            total += len(text) + 1
+            if total > overlap:
+                break
+            kept.append((sep, text))
+        return kept[::-1]
+
+    for segment in segments:
+        if units and segment.section != section:
+            # 제목만 있는 청크(바로 하위 제목이 이어지는 경우)는 다음 section과 합치고,
+            # 앞 section에서 overlap으로 넘어온 문장만 남아 있으면 버린다.
+            if body:
+                yield Chunk(render(), page, section)
+            if body or not fresh:
+                units, length, fresh, body = [], 0, 0, False
+        sep = "\n"
+        for sentence in split_sentences(segment.text):
+            for part in _hard_split(sentence, size):
+                if units and length + len(part) + 1 > size:
+                    if fresh:
+                        yield Chunk(render(), page, section)
+                        units = carry()
+                        length = sum(len(text) + 1 for _, text in units)
+                        fresh, body = 0, False
+                    if length + len(part) + 1 > size:
+                        units, length = [], 0
+                    page, section = segment.page, segment.section
+                if not units:
+                    page, section = segment.page, segment.section
+                units.append((sep, part))
+                length += len(part) + 1
+                fresh += 1
+                body = body or not segment.heading
+                sep = " "
+    if fresh:
+        yield Chunk(render(), page, section)
+
+
+def chunk_document(fp: BinaryIO, mime_type: Optional[str], file_name: Optional[str]) -> Iterator[Chunk]:
+    """iter_segments() + chunk_segments()."""
+    return chunk_segments(iter_segments(fp, mime_type, file_name))
@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import re
+import zlib
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.core.config import settings
+
+# ------------------------------
+# Token counting (로컬 근사치, 외부 토크나이저 없이)
+# ------------------------------
+_HANGUL_RE = re.compile(r"[가-힣]")
+_WORD_RE = re.compile(r"[A-Za-z]+")
+_NUMBER_RE = re.compile(r"\d+")
+_SYMBOL_RE = re.compile(r"[^\sA-Za-z0-9가-힣]")
+
+
+def count_tokens(text: str) -> int:
+    """
+    BPE 토크나이저(cl100k/o200k 계열) 토큰 수의 빠른 근사치.
+    한글 1음절 ≈ 1토큰, 영단어 ≈ 4글자당 1토큰, 숫자 ≈ 3자리당 1토큰, 기호 1토큰.
+    """
+    if not text:
+        return 0
+    tokens = len(_HANGUL_RE.findall(text))
+    tokens += sum((len(w) + 3) // 4 for w in _WORD_RE.findall(text))
+    tokens += sum((len(n) + 2) // 3 for n in _NUMBER_RE.findall(text))
+    tokens += len(_SYMBOL_RE.findall(text))
+    return tokens
+
+
+def truncate_to_tokens(text: str, budget: int) -> str:
+    """budget 토큰 이하가 되는 가장 긴 앞부분 (글자 단위 이분 탐색)."""
+    if budget <= 0:
+        return ""
+    if count_tokens(text) <= budget:
+        return text
+    lo, hi = 0, len(text)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if count_tokens(text[:mid]) <= budget:
+            lo = mid
+        else:
+            hi = mid - 1
+    return text[:lo]
+
+
+# ------------------------------
+# Near-duplicate detection (MinHash over character shingles)
+# ------------------------------
+_MINHASH_PRIME = np.uint64(4294967311)  # 2^32 보다 큰 소수
+_minhash_params: Dict[int, tuple] = {}
+
+
+def _permutations(n: int) -> tuple:
+    params = _minhash_params.get(n)
+    if params is None:
+        rng = np.random.default_rng(20240501)
+        a = rng.integers(1, 2**32 - 1, size=(n, 1), dtype=np.uint64)
+        b = rng.integers(0, 2**32 - 1, size=(n, 1), dtype=np.uint64)
+        params = _minhash_params.setdefault(n, (a, b))
+    return params
+
+
+def minhash_signature(text: str, shingle_size: int, permutations: int) -> np.ndarray:
+    """공백을 정리한 글자 shingle 집합의 MinHash 서명 (한국어는 띄어쓰기가 흔들려서 글자 단위로 본다)."""
+    s = re.sub(r"\s+", " ", text or "").strip().lower()
+    if len(s) <= shingle_size:
+        shingles = {s}
+    else:
+        shingles = {s[i : i + shingle_size] for i in range(len(s) - shingle_size + 1)}
+    hashes = np.fromiter((zlib.crc32(sh.encode("utf-8")) for sh in shingles), dtype=np.uint64, count=len(shingles))
+    a, b = _permutations(permutations)
+    return ((a * hashes[None, :] + b) % _MINHASH_PRIME).min(axis=1)
+
+
+def estimated_jaccard(sig_a: np.ndarray, sig_b: np.ndarray) -> float:
+    return float(np.mean(sig_a == sig_b))
+
+
+# ------------------------------
+# Context packing
+# ------------------------------
+@dataclass
+class ContextBlock:
+    """프롬프트에 들어가는 하나의 문서 조각 (인접 청크가 합쳐졌을 수 있다)."""
+
+    document_id: Optional[str]
+    chunk_ids: List[int]
+    title: str
+    content: str
+    score: float
+    tokens: int = 0
+
+
+@dataclass
+class PackedContext:
+    blocks: List[ContextBlock] = field(default_factory=list)
+    tokens: int = 0  # 실제 프롬프트에 들어간 컨텍스트 토큰 수
+    raw_tokens: int = 0  # 검색 결과를 그대로 이어 붙였을 때의 토큰 수
+    duplicates: int = 0  # 거의 같은 내용이라 버린 청크 수
+    merged: int = 0  # 인접 청크와 합쳐진 청크 수
+    dropped: int = 0  # 예산을 넘어서 빠진 블록 수
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(self.raw_tokens - self.tokens, 0)
+
+    def render(self) -> str:
+        if not self.blocks:
+            return "No relevant documents were found for this user."
+        return _render(self.blocks)
+
+
+def _render(blocks: Sequence[ContextBlock]) -> str:
+    return "\n\n".join(f"[doc#{i} | {b.title}]\n{b.content}" for i, b in enumerate(blocks, start=1))
+
+
+def _overlap(left: str, right: str, max_chars: int = 600, min_chars: int = 20) -> int:
+    """left의 끝과 right의 시작이 겹치는 길이 (청킹 overlap 제거용)."""
+    limit = min(len(left), len(right), max_chars)
+    if limit < min_chars:
+        return 0
+    probe = right[:min_chars]
+    pos = left.rfind(probe, len(left) - limit)
+    while pos != -1:
+        size = len(left) - pos
+        if right.startswith(left[pos:]):
+            return size
+        pos = left.rfind(probe, len(left) - limit, pos + min_chars - 1)
+    return 0
+
+
+def _attr(hit: Any, name: str) -> Any:
+    return hit.get(name) if isinstance(hit, dict) else getattr(hit, name, None)
+
+
+def build_context(
+    hits: Sequence[Any],
+    budget_tokens: Optional[int] = None,
+    dedup_threshold: Optional[float] = None,
+) -> PackedContext:
+    """
+    검색 결과(SearchHit 또는 dict)를 LLM 프롬프트용 컨텍스트로 압축한다.
+
+    1) 점수 순으로 보면서 MinHash 추정 Jaccard가 dedup_threshold 이상인 청크는 버린다.
+    2) 같은 document_id의 연속된 chunk_id는 하나로 합치고 청킹 overlap을 잘라 낸다.
+    3) 블록을 점수(구성 청크 최고 점수) 순으로 토큰 예산 안에서 채운다.
+       첫 블록이 예산보다 크면 앞부분만 잘라서 넣는다.
+    """
+    budget = settings.context_token_budget if budget_tokens is None else budget_tokens
+    threshold = settings.context_dedup_threshold if dedup_threshold is None else dedup_threshold
+
+    packed = PackedContext()
+    raw_blocks = [
+        ContextBlock(
+            document_id=_attr(h, "document_id"),
+            chunk_ids=[_attr(h, "chunk_id")] if _attr(h, "chunk_id") is not None else [],
+            title=_attr(h, "title") or _attr(h, "original_file_name") or _attr(h, "id"),
+            content=_attr(h, "content") or "",
+            score=float(_attr(h, "score") or 0.0),
+        )
+        for h in hits
+    ]
+    packed.raw_tokens = count_tokens(_render(raw_blocks))
+
+    # 1) near-duplicate 제거
+    kept: List[ContextBlock] = []
+    signatures: List[np.ndarray] = []
+    for block in sorted(raw_blocks, key=lambda b: b.score, reverse=True):
+        if not block.content.strip():
+            packed.duplicates += 1
+            continue
+        sig = minhash_signature(block.content, settings.context_shingle_size, settings.context_minhash_permutations)
+        if any(estimated_jaccard(sig, other) >= threshold for other in signatures):
+            packed.duplicates += 1
+            continue
+        kept.append(block)
+        signatures.append(sig)
+
+    # 2) 인접 청크 병합
+    by_document: Dict[Optional[str], List[ContextBlock]] = {}
+    standalone: List[ContextBlock] = []
+    for block in kept:
+        if block.document_id and block.chunk_ids:
+            by_document.setdefault(block.document_id, []).append(block)
+        else:
+            standalone.append(block)
+
+    blocks: List[ContextBlock] = list(standalone)
+    for doc_blocks in by_document.values():
+        doc_blocks.sort(key=lambda b: b.chunk_ids[0])
+        current = doc_blocks[0]
+        for block in doc_blocks[1:]:
+            if block.chunk_ids[0] == current.chunk_ids[-1] + 1:
+                cut = _overlap(current.content, block.content)
+                current = ContextBlock(
+                    document_id=current.document_id,
+                    chunk_ids=current.chunk_ids + block.chunk_ids,
+                    title=current.title,
+                    content=current.content + "\n" + block.content[cut:].lstrip(),
+                    score=max(current.score, block.score),
+                )
+                packed.merged += 1
+            else:
+                blocks.append(current)
+                current = block
+        blocks.append(current)
+
+    # 3) 점수 순으로 예산 안에서 채우기
+    blocks.sort(key=lambda b: b.score, reverse=True)
+    header_tokens = 8  # "[doc#N | title]" 머리글 + 구분자 근사치
+    used = 0
+    for block in blocks:
+        block.tokens = count_tokens(block.content) + count_tokens(block.title) + header_tokens
+        if used + block.tokens <= budget:
+            packed.blocks.append(block)
+            used += block.tokens
+        elif not packed.blocks:
+            block.content = truncate_to_tokens(block.content, budget - count_tokens(block.title) - header_tokens)
+            block.tokens = budget
+            packed.blocks.append(block)
+            used = budget
+        else:
+            packed.dropped += 1
+
+    packed.tokens = count_tokens(packed.render()) if packed.blocks else 0
+    return packed
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Iterable, Optional, Sequence
+from uuid import UUID
+
+from sqlalchemy import Date, and_, cast, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.dashboard_rollup import DashboardVersion, QADailyCount, QAFailedQuestion, QAKeywordCount
+from app.models.qa_keyword import QAKetword
+from app.models.qa_log import QALog
+
+
+def _bump_stmt(owner_ids: Iterable[UUID]):
+    # 여러 소유자를 한 번에 올릴 때 행 잠금 순서를 고정한다.
+    rows = [{"owner_id": owner_id, "version": 1} for owner_id in sorted(set(owner_ids), key=str)]
+    stmt = pg_insert(DashboardVersion).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[DashboardVersion.owner_id],
+        set_={"version": DashboardVersion.version + 1, "updated_at": func.now()},
+    ).returning(DashboardVersion.version)
+
+
+def bump_dashboard_version(db: Session, *owner_ids: UUID) -> Optional[int]:
+    """
+    소유자 대시보드 버전을 올린다. 문서/QA 로그를 바꾸는 트랜잭션 안에서 호출하고 커밋은 호출자가 한다.
+    버전 행 잠금이 커밋까지 유지되므로 같은 소유자의 버전은 커밋 순서대로 매겨진다. (소유자 하나면 새 버전)
+    """
+    if not owner_ids:
+        return None
+    versions = db.execute(_bump_stmt(owner_ids)).scalars().all()
+    return versions[0] if len(versions) == 1 else None
+
+
+async def abump_dashboard_version(db: AsyncSession, *owner_ids: UUID) -> None:
+    """bump_dashboard_version()의 AsyncSession 버전."""
+    if owner_ids:
+        await db.execute(_bump_stmt(owner_ids))
+
+
+def dashboard_version(db: Session, owner_id: UUID) -> int:
+    return db.execute(
+        select(DashboardVersion.version).where(DashboardVersion.owner_id == owner_id)
+    ).scalar_one_or_none() or 0
+
+
+async def record_qa_rollups(
+    db: AsyncSession, log_ids: Sequence[UUID], created_from: Optional[datetime] = None
+) -> None:
+    """
+    방금 INSERT한 QA 로그들(owner_id가 있는 것)을 대시보드 집계에 더한다. 로그 수와 상관없이 문장 네 개.
+    로그 INSERT와 같은 트랜잭션에서 호출하고 커밋은 호출자가 한다.
+    날짜는 created_at::date (이전 대시보드 쿼리의 date(created_at)과 같은 DB 세션 시간대)로 나눈다.
+    바뀐 집계 행에는 소유자의 새 대시보드 버전을 남겨 since 증분 응답이 그 행만 돌려줄 수 있게 한다.
+    created_from(로그들의 가장 이른 created_at)을 주면 qa_logs 파티션 중 그 이후 것만 본다.
+    """
+    if not log_ids:
+        return
+    ids = list(log_ids)
+    match = [QALog.id.in_(ids), QALog.owner_id.isnot(None)]
+    if created_from is not None:
+        match.append(QALog.created_at >= created_from)
+    owner_ids = (await db.execute(select(QALog.owner_id).where(*match).distinct())).scalars().all()
+    if not owner_ids:
+        return
+    await abump_dashboard_version(db, *owner_ids)
+
+    logs = select(QALog).where(*match).subquery()
+    versions = DashboardVersion.__table__
+    day = cast(logs.c.created_at, Date)
+
+    # 집계 행은 (owner_id, 키) 순서로 잠가서 다른 프로세스의 writer와 교착하지 않게 한다.
+    daily = (
+        select(
+            logs.c.owner_id,
+            day,
+            func.count(),
+            func.count().filter(logs.c.cache_hit),
+            versions.c.version,
+        )
+        .join(versions, versions.c.owner_id == logs.c.owner_id)
+        .group_by(logs.c.owner_id, day, versions.c.version)
+        .order_by(logs.c.owner_id, day)
+    )
+    stmt = pg_insert(QADailyCount).from_select(["owner_id", "day", "count", "cache_hits", "version"], daily)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[QADailyCount.owner_id, QADailyCount.day],
+        set_={
+            "count": QADailyCount.count + stmt.excluded.count,
+            "cache_hits": QADailyCount.cache_hits + stmt.excluded.cache_hits,
+            "version": stmt.excluded.version,
+        },
+    )
+    await db.execute(stmt)
+
+    keywords = (
+        select(logs.c.owner_id, QAKetword.keyword, func.count(), versions.c.version)
+        .join(QAKetword, and_(QAKetword.qa_log_id == logs.c.id, QAKetword.created_at == logs.c.created_at))
+        .join(versions, versions.c.owner_id == logs.c.owner_id)
+        .group_by(logs.c.owner_id, QAKetword.keyword, versions.c.version)
+        .order_by(logs.c.owner_id, QAKetword.keyword)
+    )
+    stmt = pg_insert(QAKeywordCount).from_select(["owner_id", "keyword", "count", "version"], keywords)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[QAKeywordCount.owner_id, QAKeywordCount.keyword],
+        set_={"count": QAKeywordCount.count + stmt.excluded.count, "version": stmt.excluded.version},
+    )
+    await db.execute(stmt)
+
+    normalized = func.coalesce(logs.c.normalized_question, "")
+    failed = (
+        select(
+            logs.c.owner_id,
+            normalized,
+            func.count(),
+            func.min(logs.c.question),
+            func.max(logs.c.created_at),
+            versions.c.version,
+        )
+        .join(versions, versions.c.owner_id == logs.c.owner_id)
+        .where(logs.c.status == "NO_ANSWER")
+        .group_by(logs.c.owner_id, normalized, versions.c.version)
+        .order_by(logs.c.owner_id, normalized)
+    )
+    stmt = pg_insert(QAFailedQuestion).from_select(
+        ["owner_id", "normalized_question", "fail_count", "sample_question", "last_asked_at", "version"], failed
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[QAFailedQuestion.owner_id, QAFailedQuestion.normalized_question],
+        set_={
+            "fail_count": QAFailedQuestion.fail_count + stmt.excluded.fail_count,
+            "version": stmt.excluded.version,
+            "last_asked_at": func.greatest(QAFailedQuestion.last_asked_at, stmt.excluded.last_asked_at),
+            # 이전 구현의 MIN(question)과 같은 대표 질문을 유지한다.
+            "sample_question": func.least(QAFailedQuestion.sample_question, stmt.excluded.sample_question),
+        },
+    )
+    await db.execute(stmt)
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import logging
+import time
+from typing import Optional, Sequence
+from uuid import UUID
+
+from app.services.vector_store import get_vector_store
+
+logger = logging.getLogger(__name__)
+
+
+async def purge_documents(user_id: UUID, document_ids: Sequence[UUID]) -> None:
+    """
+    삭제된 문서들의 청크를 검색 인덱스에서 모두 지운다. (BackgroundTasks에서 호출, best-effort)
+    문서 수와 상관없이 id 조회와 삭제 요청을 문서 묶음 단위로 보낸다.
+    """
+    if not document_ids:
+        return
+    started = time.perf_counter()
+    try:
+        await get_vector_store().adelete_documents(user_id, list(document_ids))
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("Failed to purge search index for %d documents: %s", len(document_ids), exc)
+        return
+    logger.info(
+        "Purged search index for %d documents in %.0fms", len(document_ids), (time.perf_counter() - started) * 1000
+    )
+
+
+async def move_documents(user_id: UUID, document_ids: Sequence[UUID], group_id: Optional[UUID]) -> None:
+    """문서들의 청크 group_id를 바꾼다. (BackgroundTasks에서 호출, best-effort)"""
+    if not document_ids:
+        return
+    try:
+        await get_vector_store().aupdate_groups(user_id, list(document_ids), group_id)
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("Failed to update search group for %d documents: %s", len(document_ids), exc)
@@ -0,0 +1,437 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import random
+import socket
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple
+from uuid import UUID, uuid4
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.db import AsyncSessionLocal
+from app.models.document import Document, DocumentStatus
+from app.models.index_job import PRIORITY_BULK, PRIORITY_INTERACTIVE, IndexJob, IndexJobStatus
+from app.services.indexing import describe_error, record_index_result, run_indexing
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = (IndexJobStatus.QUEUED, IndexJobStatus.RUNNING)
+
+
+@dataclass(frozen=True)
+class LeasedJob:
+    id: UUID
+    document_id: UUID
+    user_id: UUID
+    priority: int
+    attempts: int
+    max_attempts: int
+    created_at: datetime
+
+    @property
+    def can_retry(self) -> bool:
+        return self.attempts < self.max_attempts
+
+
+# ------------------------------
+# Queue operations
+# ------------------------------
+def _enqueue_stmt(rows: List[Tuple[UUID, UUID]], priority: int):
+    stmt = pg_insert(IndexJob).values(
+        [
+            {
+                "id": uuid4(),
+                "document_id": document_id,
+                "user_id": user_id,
+                "status": IndexJobStatus.QUEUED,
+                "priority": priority,
+                "attempts": 0,
+                "max_attempts": settings.index_job_max_attempts,
+            }
+            for document_id, user_id in rows
+        ]
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[IndexJob.document_id],
+        index_where=IndexJob.status.in_(ACTIVE_STATUSES),
+        set_={
+            "priority": func.greatest(IndexJob.priority, stmt.excluded.priority),
+            "updated_at": func.now(),
+        },
+    ).returning(IndexJob.id)
+
+
+async def enqueue_index_job(
+    db: AsyncSession,
+    document_id: UUID,
+    user_id: UUID,
+    priority: int = PRIORITY_INTERACTIVE,
+) -> UUID:
+    """
+    문서 인덱싱 작업을 큐에 넣는다. 이미 대기/실행 중인 작업이 있으면 우선순위만 올린다.
+    커밋은 호출자가 한다. (Document.status 변경과 같은 트랜잭션으로 묶기 위해)
+    """
+    return (await db.execute(_enqueue_stmt([(document_id, user_id)], priority))).scalar_one()
+
+
+async def enqueue_index_jobs(
+    db: AsyncSession,
+    rows: List[Tuple[UUID, UUID]],
+    priority: int = PRIORITY_BULK,
+) -> List[UUID]:
+    """(document_id, user_id) 목록을 INSERT 한 번으로 큐에 넣는다. (일괄 업로드용, 커밋은 호출자)"""
+    if not rows:
+        return []
+    return list((await db.execute(_enqueue_stmt(rows, priority))).scalars())
+
+
+async def has_active_job(db: AsyncSession, document_id: UUID) -> bool:
+    stmt = select(IndexJob.id).where(
+        IndexJob.document_id == document_id,
+        IndexJob.status.in_(ACTIVE_STATUSES),
+    )
+    return (await db.execute(stmt.limit(1))).first() is not None
+
+
+async def lease_jobs(db: AsyncSession, owner: str, limit: int) -> List[LeasedJob]:
+    """
+    실행할 작업을 최대 limit개 가져온다. (SELECT ... FOR UPDATE SKIP LOCKED)
+    - 대기 중이고 run_after가 지난 작업
+    - 실행 중이지만 lease(visibility timeout)가 만료된 작업 (워커가 죽은 경우)
+    우선순위 높은 것, 오래된 것부터. 여러 워커 프로세스가 동시에 불러도 같은 작업을 가져가지 않는다.
+    """
+    now = func.now()
+    picked = (
+        select(IndexJob.id)
+        .where(
+            or_(
+                and_(IndexJob.status == IndexJobStatus.QUEUED, IndexJob.run_after <= now),
+                and_(IndexJob.status == IndexJobStatus.RUNNING, IndexJob.leased_until < now),
+            )
+        )
+        .order_by(IndexJob.priority.desc(), IndexJob.run_after)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .cte("picked")
+    )
+    stmt = (
+        update(IndexJob)
+        .where(IndexJob.id.in_(select(picked.c.id)))
+        .values(
+            status=IndexJobStatus.RUNNING,
+            attempts=IndexJob.attempts + 1,
+            lease_owner=owner,
+            leased_until=now + timedelta(seconds=settings.index_job_visibility_timeout),
+            started_at=now,
+            updated_at=now,
+        )
+        .returning(
+            IndexJob.id,
+            IndexJob.document_id,
+            IndexJob.user_id,
+            IndexJob.priority,
+            IndexJob.attempts,
+            IndexJob.max_attempts,
+            IndexJob.created_at,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    rows = (await db.execute(stmt)).all()
+    await db.commit()
+    return [LeasedJob(*row) for row in rows]
+
+
+async def extend_lease(db: AsyncSession, job_id: UUID, owner: str) -> bool:
+    """heartbeat: lease를 연장한다. 다른 워커가 가져갔으면(lease 만료 후) False."""
+    stmt = (
+        update(IndexJob)
+        .where(
+            IndexJob.id == job_id,
+            IndexJob.lease_owner == owner,
+            IndexJob.status == IndexJobStatus.RUNNING,
+        )
+        .values(leased_until=func.now() + timedelta(seconds=settings.index_job_visibility_timeout))
+        .execution_options(synchronize_session=False)
+    )
+    result = await db.execute(stmt)
+    await db.commit()
+    return result.rowcount == 1
+
+
+async def complete_job(db: AsyncSession, job_id: UUID, owner: str, chunk_count: int) -> bool:
+    """성공 처리. 그사이 lease를 잃어 다른 워커가 가져갔으면 아무것도 바꾸지 않고 False."""
+    stmt = (
+        update(IndexJob)
+        .where(IndexJob.id == job_id, IndexJob.lease_owner == owner)
+        .values(
+            status=IndexJobStatus.SUCCEEDED,
+            chunk_count=chunk_count,
+            leased_until=None,
+            last_error=None,
+            finished_at=func.now(),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    result = await db.execute(stmt)
+    await db.commit()
+    return result.rowcount == 1
+
+
+def retry_delay(attempts: int) -> float:
+    """지수 백오프 + jitter (base * 2^(n-1), 최대 retry_max, 50~100%)."""
+    delay = min(settings.index_job_retry_base_seconds * (2 ** max(attempts - 1, 0)), settings.index_job_retry_max_seconds)
+    return delay * (0.5 + random.random() / 2)
+
+
+async def fail_job(db: AsyncSession, job: LeasedJob, owner: str, error: str) -> bool:
+    """
+    실패 처리. 재시도 여유가 있으면(job.can_retry) 백오프 후 다시 대기열로 보내고, 아니면 FAILED로 끝낸다.
+    그사이 lease를 잃어 다른 워커가 가져갔으면 아무것도 바꾸지 않고 False.
+    """
+    retry = job.can_retry
+    values: Dict[str, Any] = {"leased_until": None, "last_error": error}
+    if retry:
+        values.update(
+            status=IndexJobStatus.QUEUED,
+            lease_owner=None,
+            run_after=func.now() + timedelta(seconds=retry_delay(job.attempts)),
+        )
+    else:
+        values.update(status=IndexJobStatus.FAILED, finished_at=func.now())
+    stmt = (
+        update(IndexJob)
+        .where(IndexJob.id == job.id, IndexJob.lease_owner == owner)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    result = await db.execute(stmt)
+    await db.commit()
+    return result.rowcount == 1
+
+
+async def _note_retry(job: LeasedJob, error: str) -> None:
+    """재시도 대기 중인 문서는 PROCESSING을 유지하고 마지막 오류만 남긴다."""
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(Document)
+            .where(Document.id == job.document_id)
+            .values(error_message=f"retrying ({job.attempts}/{job.max_attempts}): {error}"[:2000])
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+
+
+def queue_stats(db: Session, window_minutes: int = 60) -> Dict[str, Any]:
+    """상태별 작업 수, 가장 오래 기다린 작업, 최근 window 동안의 처리량."""
+    counts = dict(db.query(IndexJob.status, func.count()).group_by(IndexJob.status).all())
+    oldest_queued = (
+        db.query(func.min(IndexJob.created_at)).filter(IndexJob.status == IndexJobStatus.QUEUED).scalar()
+    )
+    since = datetime.now(timezone.utc) - timedelta(minutes=window_minutes)
+    finished = (
+        db.query(
+            IndexJob.status,
+            func.count(),
+            func.coalesce(func.sum(IndexJob.chunk_count), 0),
+            func.avg(func.extract("epoch", IndexJob.finished_at - IndexJob.started_at)),
+        )
+        .filter(IndexJob.finished_at >= since)
+        .group_by(IndexJob.status)
+        .all()
+    )
+    recent = {status: (count, chunks, avg_seconds) for status, count, chunks, avg_seconds in finished}
+    succeeded, chunks, avg_seconds = recent.get(IndexJobStatus.SUCCEEDED, (0, 0, None))
+    return {
+        "counts": {status: counts.get(status, 0) for status in (*ACTIVE_STATUSES, IndexJobStatus.SUCCEEDED, IndexJobStatus.FAILED)},
+        "oldest_queued_seconds": (
+            round((datetime.now(timezone.utc) - oldest_queued).total_seconds(), 1) if oldest_queued else None
+        ),
+        "window_minutes": window_minutes,
+        "succeeded": succeeded,
+        "failed": recent.get(IndexJobStatus.FAILED, (0, 0, None))[0],
+        "jobs_per_minute": round(succeeded / window_minutes, 2),
+        "chunks_per_minute": round(int(chunks) / window_minutes, 2),
+        "avg_job_seconds": round(float(avg_seconds), 2) if avg_seconds is not None else None,
+    }
+
+
+# ------------------------------
+# Worker
+# ------------------------------
+@dataclass
+class WorkerMetrics:
+    started_at: float = field(default_factory=time.monotonic)
+    leased: int = 0
+    succeeded: int = 0
+    retried: int = 0
+    failed: int = 0
+    lost_leases: int = 0
+    chunks: int = 0
+    busy_seconds: float = 0.0
+    in_flight: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        minutes = max((time.monotonic() - self.started_at) / 60, 1e-9)
+        return {
+            "leased": self.leased,
+            "succeeded": self.succeeded,
+            "retried": self.retried,
+            "failed": self.failed,
+            "lost_leases": self.lost_leases,
+            "in_flight": self.in_flight,
+            "chunks": self.chunks,
+            "jobs_per_minute": round(self.succeeded / minutes, 2),
+            "chunks_per_minute": round(self.chunks / minutes, 2),
+            "avg_job_seconds": round(self.busy_seconds / self.succeeded, 2) if self.succeeded else None,
+        }
+
+
+def default_worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class IndexWorker:
+    """
+    index_jobs 큐를 polling 하면서 run_indexing()을 실행하는 워커.
+
+    - 동시에 concurrency개까지 작업을 실행하고, 빈 슬롯만큼만 lease 한다.
+    - 실행 중에는 heartbeat로 lease를 연장한다. 워커가 죽으면 visibility timeout 후 다른 워커가 가져간다.
+    - lease를 잃으면(다른 워커가 가져감) 실행 중인 인덱싱을 취소하고, 작업/문서 상태와 통계는 새 주인에게 맡긴다.
+    - 실패하면 지수 백오프로 재시도하고, max_attempts를 넘으면 작업과 문서를 FAILED로 남긴다.
+    - API 프로세스 안(lifespan)에서도, `python -m app.workers.index_worker` 로 별도 프로세스로도 돌릴 수 있다.
+    """
+
+    def __init__(
+        self,
+        name: Optional[str] = None,
+        concurrency: Optional[int] = None,
+        poll_interval: Optional[float] = None,
+    ) -> None:
+        self.name = name or default_worker_name()
+        self.concurrency = max(1, concurrency or settings.index_worker_concurrency)
+        self.poll_interval = poll_interval or settings.index_worker_poll_interval
+        self.metrics = WorkerMetrics()
+        self._tasks: Set[asyncio.Task] = set()
+        self._wakeup = asyncio.Event()
+
+    def notify(self) -> None:
+        """새 작업이 들어왔음을 알려서 polling 대기 없이 바로 lease 하게 한다. (같은 프로세스일 때)"""
+        self._wakeup.set()
+
+    async def _heartbeat(self, job: LeasedJob, lost: asyncio.Event) -> None:
+        while True:
+            await asyncio.sleep(settings.index_job_heartbeat_interval)
+            try:
+                async with AsyncSessionLocal() as db:
+                    if not await extend_lease(db, job.id, self.name):
+                        lost.set()
+                        return
+            except Exception:  # noqa: BLE001
+                logger.warning("index worker %s: heartbeat failed for job %s", self.name, job.id, exc_info=True)
+
+    async def _run_owned(self, job: LeasedJob, lost: asyncio.Event) -> Optional[int]:
+        """run_indexing()을 실행하다가 lease를 잃으면 취소하고 None."""
+        indexing = asyncio.create_task(run_indexing(job.document_id))
+        lost_wait = asyncio.create_task(lost.wait())
+        try:
+            await asyncio.wait({indexing, lost_wait}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            lost_wait.cancel()
+        if indexing.done():
+            return indexing.result()
+        indexing.cancel()
+        await asyncio.gather(indexing, return_exceptions=True)
+        return None
+
+    def _lost_lease(self, job: LeasedJob) -> None:
+        self.metrics.lost_leases += 1
+        logger.warning("index worker %s: lost lease on job %s; left to the new owner", self.name, job.id)
+
+    async def _process(self, job: LeasedJob) -> None:
+        self.metrics.in_flight += 1
+        started = time.monotonic()
+        lost = asyncio.Event()
+        heartbeat = asyncio.create_task(self._heartbeat(job, lost))
+        try:
+            if job.attempts > job.max_attempts:
+                # lease가 만료되며 반복해서 되돌아온 작업 (워커를 죽이는 문서일 수 있음)
+                raise RuntimeError(f"lease expired {job.attempts - 1} times without completing")
+            chunk_count = await self._run_owned(job, lost)
+        except Exception as exc:  # noqa: BLE001
+            error = describe_error(exc)
+            logger.warning("index worker %s: job %s attempt %d failed: %s", self.name, job.id, job.attempts, error)
+            async with AsyncSessionLocal() as db:
+                owned = await fail_job(db, job, self.name, error)
+            if not owned:
+                # 다른 워커가 인덱싱 중인 문서를 FAILED로 덮어쓰지 않는다.
+                self._lost_lease(job)
+            elif job.can_retry:
+                self.metrics.retried += 1
+                await _note_retry(job, error)
+            else:
+                self.metrics.failed += 1
+                await record_index_result(job.document_id, DocumentStatus.FAILED, 0, error)
+        else:
+            if chunk_count is None:
+                self._lost_lease(job)
+                return
+            async with AsyncSessionLocal() as db:
+                owned = await complete_job(db, job.id, self.name, chunk_count)
+            if not owned:
+                self._lost_lease(job)
+                return
+            self.metrics.succeeded += 1
+            self.metrics.chunks += chunk_count
+            self.metrics.busy_seconds += time.monotonic() - started
+        finally:
+            heartbeat.cancel()
+            self.metrics.in_flight -= 1
+            self._wakeup.set()
+
+    def _spawn(self, job: LeasedJob) -> None:
+        task = asyncio.create_task(self._process(job), name=f"index-job:{job.id}")
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def run(self, stop: Optional[asyncio.Event] = None) -> None:
+        stop = stop or asyncio.Event()
+        logger.info("index worker %s started (concurrency=%d)", self.name, self.concurrency)
+        try:
+            while not stop.is_set():
+                free = self.concurrency - len(self._tasks)
+                jobs: List[LeasedJob] = []
+                if free > 0:
+                    try:
+                        async with AsyncSessionLocal() as db:
+                            jobs = await lease_jobs(db, self.name, free)
+                    except Exception:  # noqa: BLE001
+                        logger.exception("index worker %s: failed to lease jobs", self.name)
+                for job in jobs:
+                    self.metrics.leased += 1
+                    self._spawn(job)
+                if jobs and len(jobs) == free:
+                    continue  # 큐가 밀려 있으면 바로 다음 lease 시도 (슬롯이 비면 깨어난다)
+
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            if self._tasks:
+                # 종료 시에는 실행 중인 작업을 마무리한다. (lease가 남아 있어도 visibility timeout 후 회수된다)
+                await asyncio.gather(*self._tasks, return_exceptions=True)
+            logger.info("index worker %s stopped: %s", self.name, self.metrics.as_dict())
+
+
+# API 프로세스 안에서 도는 워커 (INDEX_WORKER_EMBEDDED=true 일 때 lifespan에서 설정)
+embedded_worker: Optional[IndexWorker] = None
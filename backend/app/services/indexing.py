@@ -1,11 +1,31 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import logging
-from typing import Iterable
+import tempfile
+import time
+from datetime import datetime
+from itertools import islice
+from typing import Any, BinaryIO, Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
 
-import httpx
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.v1.search_vector import _request_embeddings, pack_vector, unpack_vector
 from app.core.config import settings
+from app.core.db import AsyncSessionLocal
+from app.core.http_clients import N8N, get_async_client
+from app.models.document import Document, DocumentStatus
+from app.models.blob_object import ChunkEmbedding
+from app.models.document_chunk import DocumentChunk
+from app.services.answer_cache import abump_index_version
+from app.services.blob_storage import download_blob, get_blob_container_client
+from app.services.chunking import Chunk, chunk_document
+from app.services.dashboard_rollups import abump_dashboard_version
+from app.services.vector_store import get_vector_store
 
 logger = logging.getLogger(__name__)
 
@@ -20,13 +40,317 @@ async def trigger_n8n_indexing(docs: Iterable) -> None:
         logger.warning("N8N_INDEX_WEBHOOK_URL not set – skipping indexing trigger")
         return
 
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        for doc in docs:
+    client = get_async_client(N8N)
+    for doc in docs:
+        try:
+            # model_dump(mode="json") ensures UUID/datetime are stringified
+            payload = doc.model_dump(mode="json") if hasattr(doc, "model_dump") else doc
+            resp = await client.post(webhook, json=payload, timeout=10.0)
+            resp.raise_for_status()
+            logger.info("Triggered indexing for document %s", payload.get("id"))
+        except Exception as exc:
+            logger.exception("Failed to trigger indexing for %s: %s", payload.get("id"), exc)
+
+
+# ------------------------------
+# Native indexing (n8n 워크플로 대체)
+# ------------------------------
+class IndexingError(RuntimeError):
+    """문서 인덱싱 실패 (Document.error_message 로 남는다)."""
+
+
+async def embed_chunks(texts: List[str]) -> List[List[float]]:
+    """
+    청크를 index_embed_batch_size 개씩 묶어 embeddings 요청 하나로 보내고,
+    요청은 index_embed_concurrency 개까지 동시에 보낸다. 입력 순서대로 벡터를 돌려준다.
+    """
+    batch_size = max(1, settings.index_embed_batch_size)
+    semaphore = asyncio.Semaphore(max(1, settings.index_embed_concurrency))
+
+    async def _embed(batch: List[str]) -> List[List[float]]:
+        async with semaphore:
+            return await _request_embeddings(batch)
+
+    batches = [texts[i : i + batch_size] for i in range(0, len(texts), batch_size)]
+    results = await asyncio.gather(*(_embed(batch) for batch in batches))
+    return [vector for batch in results for vector in batch]
+
+
+def _download(blob_path: str) -> BinaryIO:
+    """원본을 index_spool_max_bytes 까지는 메모리, 넘으면 임시 파일에 받는다. (호출자가 닫는다)"""
+    spool = tempfile.SpooledTemporaryFile(max_size=settings.index_spool_max_bytes)
+    try:
+        container = get_blob_container_client()
+        for block in download_blob(container, blob_path):
+            spool.write(block)
+        spool.seek(0)
+    except BaseException:
+        spool.close()
+        raise
+    return spool
+
+
+async def record_index_result(
+    document_id: UUID,
+    status: DocumentStatus,
+    chunk_count: int,
+    error: Optional[str],
+) -> None:
+    """Document.status/chunk_count/last_indexed_at/error_message 갱신 + 답변 캐시 무효화."""
+    async with AsyncSessionLocal() as db:
+        doc = await db.get(Document, document_id)
+        if doc is None:
+            return
+        doc.status = status
+        doc.chunk_count = chunk_count
+        doc.last_indexed_at = datetime.utcnow()
+        doc.error_message = error
+        await abump_dashboard_version(db, doc.user_id)
+        # 인덱스 내용이 바뀌었으므로 이 사용자의 캐시된 답변을 무효화
+        await abump_index_version(db, doc.user_id)
+        await db.commit()
+
+
+# ------------------------------
+# Chunk manifest (증분 재인덱싱)
+# ------------------------------
+def embedding_model_version() -> str:
+    """manifest에 남기는 임베딩 모델 식별자. 바뀌면 모든 청크를 다시 임베딩한다."""
+    return settings.embedding_model_version or settings.azure_openai_embed_deployment or "default"
+
+
+def chunk_hash(chunk: Chunk) -> str:
+    digest = hashlib.sha256(chunk.text.encode("utf-8"))
+    digest.update(f"\x00{chunk.page}\x00{chunk.section or ''}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+async def _load_manifest(document_id: UUID) -> Dict[int, Tuple[str, str]]:
+    async with AsyncSessionLocal() as db:
+        rows = await db.execute(
+            select(DocumentChunk.chunk_id, DocumentChunk.content_hash, DocumentChunk.embedding_model).where(
+                DocumentChunk.document_id == document_id
+            )
+        )
+        return {chunk_id: (content_hash, model) for chunk_id, content_hash, model in rows}
+
+
+async def _save_manifest(
+    document_id: UUID,
+    entries: Dict[int, str],
+    model: str,
+    truncate_from: Optional[int] = None,
+) -> None:
+    async with AsyncSessionLocal() as db:
+        if entries:
+            stmt = pg_insert(DocumentChunk).values(
+                [
+                    {"document_id": document_id, "chunk_id": chunk_id, "content_hash": content_hash, "embedding_model": model}
+                    for chunk_id, content_hash in entries.items()
+                ]
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[DocumentChunk.document_id, DocumentChunk.chunk_id],
+                set_={
+                    "content_hash": stmt.excluded.content_hash,
+                    "embedding_model": stmt.excluded.embedding_model,
+                    "indexed_at": func.now(),
+                },
+            )
+            await db.execute(stmt)
+        if truncate_from is not None:
+            await db.execute(
+                delete(DocumentChunk).where(
+                    DocumentChunk.document_id == document_id,
+                    DocumentChunk.chunk_id >= truncate_from,
+                )
+            )
+        await db.commit()
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+async def _load_shared_embeddings(hashes: Iterable[str], model: str) -> Dict[str, List[float]]:
+    async with AsyncSessionLocal() as db:
+        rows = await db.execute(
+            update(ChunkEmbedding)
+            .where(ChunkEmbedding.content_hash.in_(list(hashes)), ChunkEmbedding.model == model)
+            .values(last_used_at=func.now())
+            .returning(ChunkEmbedding.content_hash, ChunkEmbedding.vector)
+            .execution_options(synchronize_session=False)
+        )
+        found = {content_hash: unpack_vector(data) for content_hash, data in rows}
+        await db.commit()
+        return found
+
+
+async def _store_shared_embeddings(vectors: Dict[str, List[float]], model: str) -> None:
+    if not vectors:
+        return
+    async with AsyncSessionLocal() as db:
+        stmt = pg_insert(ChunkEmbedding).values(
+            [
+                {"content_hash": content_hash, "model": model, "dims": len(vector), "vector": pack_vector(vector)}
+                for content_hash, vector in vectors.items()
+            ]
+        ).on_conflict_do_nothing(index_elements=[ChunkEmbedding.content_hash, ChunkEmbedding.model])
+        await db.execute(stmt)
+        await db.commit()
+
+
+async def clear_manifest(db: AsyncSession, document_id: UUID) -> None:
+    """다음 인덱싱을 전체 재인덱싱으로 만든다. (커밋은 호출자가 한다)"""
+    await db.execute(delete(DocumentChunk).where(DocumentChunk.document_id == document_id))
+
+
+async def run_indexing(document_id: UUID) -> int:
+    """
+    문서 하나를 인덱싱한다: blob 다운로드 → 구조 기반 추출/청킹(app.services.chunking) → 배치 임베딩 → bulk upsert.
+    추출부터 upsert까지 index_stream_chunks 청크 단위로 흘려보내서 큰 문서도 메모리가 일정하다.
+    document_chunks manifest와 비교해서 내용이 바뀐 청크만 임베딩/upsert 하고, 사라진 청크는 지운다.
+    성공하면 Document를 PROCESSED로 갱신하고 청크 수를 돌려준다. 실패는 예외로 올린다. (재시도 판단은 호출자 몫)
+    """
+    async with AsyncSessionLocal() as db:
+        doc = await db.get(Document, document_id)
+        if doc is None:
+            raise IndexingError(f"Document {document_id} not found")
+        meta: Dict[str, Any] = {
+            "user_id": doc.user_id,
+            "group_id": doc.group_id,
+            "title": doc.title,
+            "original_file_name": doc.original_file_name,
+            "source_path": doc.blob_path,
+            "mime_type": doc.mime_type,
+        }
+
+    started = time.perf_counter()
+    model = embedding_model_version()
+    store = get_vector_store()
+    manifest = await _load_manifest(document_id) if settings.index_incremental else {}
+    if not manifest:
+        # 처음 인덱싱(또는 manifest 없이 인덱싱된 문서/전체 재인덱싱 요청): 이전 청크를 모두 지우고 시작한다.
+        await store.adelete_documents(meta["user_id"], [document_id])
+    # 위치가 바뀐 같은 내용의 청크는 저장된 벡터를 재사용한다.
+    by_hash = {content_hash: chunk_id for chunk_id, (content_hash, m) in manifest.items() if m == model}
+    overwritten: Set[int] = set()  # 이번 실행에서 내용이 바뀐 위치 (그 위치의 옛 벡터는 더 이상 없다)
+    embedded = reused = shared = 0
+
+    spool = await asyncio.to_thread(_download, meta["source_path"])
+    try:
+        chunks = chunk_document(spool, meta["mime_type"], meta["original_file_name"])
+        window = max(1, settings.index_stream_chunks)
+        total = 0
+        while True:
+            # 추출/청킹은 CPU 작업이라 스레드에서, window 청크씩만 메모리에 둔다.
+            batch = await asyncio.to_thread(lambda: list(islice(chunks, window)))
+            if not batch:
+                break
+            hashes = [chunk_hash(chunk) for chunk in batch]
+            changed = [i for i, h in enumerate(hashes) if manifest.get(total + i) != (h, model)]
+
+            vectors: Dict[int, List[float]] = {}
+            moved = {
+                i: by_hash[hashes[i]]
+                for i in changed
+                if hashes[i] in by_hash and by_hash[hashes[i]] not in overwritten
+            }
+            if moved:
+                found = await asyncio.to_thread(
+                    store.get_vectors, meta["user_id"], [f"{document_id}_{old}" for old in moved.values()]
+                )
+                for i, old in moved.items():
+                    if f"{document_id}_{old}" in found:
+                        vectors[i] = found[f"{document_id}_{old}"]
+                reused += len(vectors)
+            missing = [i for i in changed if i not in vectors]
+            if missing and settings.index_share_embeddings:
+                # 다른 문서(다른 사용자가 올린 같은 파일 포함)에서 이미 임베딩한 같은 텍스트
+                text_hashes = {i: text_hash(batch[i].text) for i in missing}
+                found = await _load_shared_embeddings(set(text_hashes.values()), model)
+                for i in missing:
+                    if text_hashes[i] in found:
+                        vectors[i] = found[text_hashes[i]]
+                        shared += 1
+                missing = [i for i in missing if i not in vectors]
+            if missing:
+                vectors.update(zip(missing, await embed_chunks([batch[i].text for i in missing])))
+                embedded += len(missing)
+                if settings.index_share_embeddings:
+                    await _store_shared_embeddings({text_hashes[i]: vectors[i] for i in missing}, model)
+
+            if changed:
+                records = [
+                    {
+                        "id": f"{document_id}_{total + i}",
+                        "document_id": document_id,
+                        "user_id": meta["user_id"],
+                        "group_id": meta["group_id"],
+                        "chunk_id": total + i,
+                        "title": meta["title"],
+                        "content": batch[i].text,
+                        "source_path": meta["source_path"],
+                        "original_file_name": meta["original_file_name"],
+                        "page": batch[i].page,
+                        "section": batch[i].section,
+                        "embedding": vectors[i],
+                    }
+                    for i in changed
+                ]
+                await store.aupsert(meta["user_id"], records)
+                overwritten.update(total + i for i in changed)
+                # 검색 인덱스에 쓴 뒤에 manifest를 갱신한다. (중간에 죽으면 다음 실행에서 다시 임베딩될 뿐)
+                await _save_manifest(document_id, {total + i: hashes[i] for i in changed}, model)
+            total += len(batch)
+    finally:
+        spool.close()
+
+    vanished = sorted(chunk_id for chunk_id in manifest if chunk_id >= total)
+    if vanished:
+        await asyncio.to_thread(
+            store.delete_chunks, meta["user_id"], [f"{document_id}_{chunk_id}" for chunk_id in vanished]
+        )
+        await _save_manifest(document_id, {}, model, truncate_from=total)
+
+    if not total:
+        raise IndexingError("No extractable text in document")
+    await record_index_result(document_id, DocumentStatus.PROCESSED, total, None)
+
+    logger.info(
+        "run_indexing: %s %d chunks (%d embedded, %d reused, %d shared, %d unchanged, %d deleted) in %.0fms",
+        document_id,
+        total,
+        embedded,
+        reused,
+        shared,
+        total - embedded - reused - shared,
+        len(vanished),
+        (time.perf_counter() - started) * 1000,
+    )
+    return total
+
+
+def describe_error(exc: BaseException) -> str:
+    detail = getattr(exc, "detail", None) or str(exc) or type(exc).__name__
+    return f"indexing failed: {detail}"[:2000]
+
+
+_document_slots = asyncio.Semaphore(max(1, settings.index_max_concurrent_documents))
+
+
+async def index_document(document_id: UUID) -> int:
+    """
+    run_indexing()을 한 번 실행하고 실패하면 Document를 FAILED로 남긴다. 예외는 밖으로 던지지 않는다.
+    (INDEXING_BACKEND=native 일 때 BackgroundTasks에서 호출, 워커 수준 동시 실행 수 제한)
+    """
+    async with _document_slots:
+        try:
+            return await run_indexing(document_id)
+        except Exception as exc:  # noqa: BLE001
+            logger.exception("index_document: failed to index %s", document_id)
             try:
-                # model_dump(mode="json") ensures UUID/datetime are stringified
-                payload = doc.model_dump(mode="json") if hasattr(doc, "model_dump") else doc
-                resp = await client.post(webhook, json=payload)
-                resp.raise_for_status()
-                logger.info("Triggered indexing for document %s", payload.get("id"))
-            except Exception as exc:
-                logger.exception("Failed to trigger indexing for %s: %s", payload.get("id"), exc)
+                await record_index_result(document_id, DocumentStatus.FAILED, 0, describe_error(exc))
+            except Exception:  # noqa: BLE001
+                logger.exception("index_document: failed to record failure for %s", document_id)
+            return 0
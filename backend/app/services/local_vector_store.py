@@ -0,0 +1,459 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import cached_property
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+import numpy as np
+
+try:  # POSIX 전용. 없으면(Windows 개발 환경) 프로세스 간 잠금 없이 단일 writer로 동작한다.
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+from app.core.config import settings
+from app.services.bm25 import BM25Index
+from app.services.vector_store import CHUNK_META_FIELDS, HIT_FIELDS, VectorStore, is_hybrid, reciprocal_rank_fusion
+
+logger = logging.getLogger(__name__)
+
+VECTORS_FILE = "vectors.f32"  # generation이 없는 이전 형식
+META_FILE = "meta.json"
+LOCK_FILE = ".lock"
+# meta.json을 읽은 직후 다른 writer가 그 세대의 벡터 파일을 지웠을 때 다시 읽는 횟수
+LOAD_RETRIES = 3
+
+
+def _vectors_file(generation: int) -> str:
+    return f"vectors.{generation:08d}.f32"
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def _to_search_score(cosine: np.ndarray) -> np.ndarray:
+    # Azure AI Search의 cosine 점수(1 / (1 + (1 - cos)))와 같은 스케일로 맞춘다.
+    return 1.0 / (2.0 - cosine)
+
+
+def _group_rows(keys: List[Optional[str]]) -> Dict[str, np.ndarray]:
+    buckets: Dict[str, List[int]] = {}
+    for row, key in enumerate(keys):
+        if key:
+            buckets.setdefault(key, []).append(row)
+    return {key: np.asarray(rows, dtype=np.int64) for key, rows in buckets.items()}
+
+
+@dataclass
+class _UserIndex:
+    """한 사용자의 정규화된 벡터 행렬(memmap)과 행별 메타데이터/필터용 인덱스 배열."""
+
+    matrix: np.ndarray
+    rows: List[Dict[str, Any]]
+    stamp: Tuple[int, int] = (0, 0)  # meta.json (inode, mtime_ns). 교체되면 inode가 바뀐다.
+    generation: int = 0
+    by_document: Dict[str, np.ndarray] = field(default_factory=dict)
+    by_group: Dict[str, np.ndarray] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        self.by_document = _group_rows([r.get("document_id") for r in self.rows])
+        self.by_group = _group_rows([r.get("group_id") for r in self.rows])
+
+    @cached_property
+    def bm25(self) -> BM25Index:
+        """title + content 키워드 역색인. 하이브리드 검색이 처음 들어올 때 만든다."""
+        return BM25Index([f"{r.get('title') or ''} {r.get('content') or ''}" for r in self.rows])
+
+    @property
+    def dims(self) -> int:
+        return int(self.matrix.shape[1]) if self.matrix.ndim == 2 else 0
+
+    def candidate_rows(self, group_id: Optional[str], document_id: Optional[str]) -> Optional[np.ndarray]:
+        """필터에 맞는 행 번호 배열. 필터가 없으면 None(전체 행)."""
+        selected: Optional[np.ndarray] = None
+        if group_id is not None:
+            selected = self.by_group.get(group_id, np.empty(0, dtype=np.int64))
+        if document_id is not None:
+            doc_rows = self.by_document.get(document_id, np.empty(0, dtype=np.int64))
+            selected = doc_rows if selected is None else np.intersect1d(selected, doc_rows, assume_unique=True)
+        return selected
+
+
+def top_k_cosine(
+    matrix: np.ndarray,
+    queries: np.ndarray,
+    top_k: int,
+    rows: Optional[np.ndarray] = None,
+    block_rows: int = 65536,
+) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """
+    정규화된 행렬과 정규화된 질의 배치(B x D)의 cosine top-k.
+
+    - 행렬을 block_rows 단위로 잘라 (block x D) @ (D x B) 로 계산하므로 memmap 전체를 메모리에 올리지 않는다.
+    - 블록마다 argpartition으로 후보 k개만 남기고, 마지막에 한 번만 정렬한다.
+    - 질의별 (행 번호 배열, cosine 배열)을 점수 내림차순으로 돌려준다.
+    """
+    total = matrix.shape[0] if rows is None else rows.shape[0]
+    batch = queries.shape[0]
+    k = min(top_k, total)
+    if k <= 0:
+        empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32))
+        return [empty for _ in range(batch)]
+
+    best_idx = np.empty((0, batch), dtype=np.int64)
+    best_scores = np.empty((0, batch), dtype=np.float32)
+    for start in range(0, total, block_rows):
+        stop = min(start + block_rows, total)
+        if rows is None:
+            block = matrix[start:stop]
+            block_idx = np.arange(start, stop, dtype=np.int64)
+        else:
+            block_idx = rows[start:stop]
+            block = matrix[block_idx]
+        scores = block @ queries.T  # (block, B)
+
+        if scores.shape[0] > k:
+            part = np.argpartition(-scores, k - 1, axis=0)[:k]
+            scores = np.take_along_axis(scores, part, axis=0)
+            block_idx = block_idx[part]
+        else:
+            block_idx = np.repeat(block_idx[:, None], batch, axis=1)
+
+        best_idx = np.concatenate([best_idx, block_idx])
+        best_scores = np.concatenate([best_scores, scores])
+        if best_scores.shape[0] > k:
+            part = np.argpartition(-best_scores, k - 1, axis=0)[:k]
+            best_scores = np.take_along_axis(best_scores, part, axis=0)
+            best_idx = np.take_along_axis(best_idx, part, axis=0)
+
+    order = np.argsort(-best_scores, axis=0, kind="stable")
+    best_scores = np.take_along_axis(best_scores, order, axis=0)
+    best_idx = np.take_along_axis(best_idx, order, axis=0)
+    return [(best_idx[:, b], best_scores[:, b]) for b in range(batch)]
+
+
+class LocalVectorStore(VectorStore):
+    """
+    NumPy 기반 in-process 벡터 저장소 (테스트/소규모/오프라인 배포용).
+
+    - 사용자별로 <root>/<user_id>/vectors.<generation>.f32 (정규화된 float32 N x D, memmap)와
+      meta.json (행별 HIT_FIELDS + 벡터 파일 세대)을 둔다.
+    - 쓰기는 새 세대 벡터 파일을 다 쓴 뒤 meta.json을 os.replace 로 교체한다. meta.json 교체가
+      유일한 커밋 지점이라, 다른 프로세스의 reader는 항상 행 수와 맞는 벡터 파일을 연다.
+    - writer는 사용자 디렉터리의 .lock 파일을 fcntl.flock 으로 잠근다. (큐 워커가 여러 프로세스여도 한 번에 하나)
+    - 다른 프로세스가 쓴 변경은 meta.json (inode, mtime)을 보고 다음 검색 때 다시 읽는다.
+    """
+
+    name = "local"
+
+    def __init__(self, root: str | Path, block_rows: Optional[int] = None) -> None:
+        self.root = Path(root)
+        self.block_rows = block_rows or settings.local_vector_store_block_rows
+        self._indexes: Dict[str, _UserIndex] = {}
+        self._locks: Dict[str, threading.RLock] = {}
+        self._locks_guard = threading.Lock()
+
+    # ------------------------------
+    # storage
+    # ------------------------------
+    def _user_dir(self, user_id: UUID | str) -> Path:
+        return self.root / str(user_id)
+
+    def _lock(self, user_key: str) -> threading.RLock:
+        with self._locks_guard:
+            return self._locks.setdefault(user_key, threading.RLock())
+
+    @contextmanager
+    def _writing(self, user_key: str) -> Iterator[None]:
+        """사용자 인덱스 쓰기 잠금 (스레드 + 프로세스). 안에서 _load()는 최신 meta.json을 읽는다."""
+        with self._lock(user_key):
+            if fcntl is None:
+                yield
+                return
+            user_dir = self._user_dir(user_key)
+            user_dir.mkdir(parents=True, exist_ok=True)
+            with open(user_dir / LOCK_FILE, "a+b") as lock_file:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _load(self, user_key: str) -> Optional[_UserIndex]:
+        user_dir = self._user_dir(user_key)
+        meta_path = user_dir / META_FILE
+        for attempt in range(LOAD_RETRIES):
+            try:
+                st = meta_path.stat()
+            except FileNotFoundError:
+                self._indexes.pop(user_key, None)
+                return None
+            stamp = (st.st_ino, st.st_mtime_ns)
+
+            cached = self._indexes.get(user_key)
+            if cached is not None and cached.stamp == stamp:
+                return cached
+
+            try:
+                meta = json.loads(meta_path.read_text(encoding="utf-8"))
+                rows = meta.get("rows", [])
+                dims = int(meta.get("dims", 0))
+                generation = int(meta.get("generation", 0))
+                vectors_name = meta.get("vectors") or VECTORS_FILE
+                if rows and dims:
+                    matrix = np.memmap(user_dir / vectors_name, dtype="<f4", mode="r", shape=(len(rows), dims))
+                else:
+                    matrix = np.empty((0, dims), dtype=np.float32)
+            except FileNotFoundError:
+                # 읽는 사이 meta.json이 새 세대로 바뀌고 이전 벡터 파일이 지워졌다. 새 meta.json으로 다시 읽는다.
+                if attempt == LOAD_RETRIES - 1:
+                    raise
+                continue
+            index = _UserIndex(matrix=matrix, rows=rows, stamp=stamp, generation=generation)
+            self._indexes[user_key] = index
+            return index
+        return None
+
+    def _commit_meta(
+        self, user_key: str, rows: List[Dict[str, Any]], dims: int, generation: int, vectors_name: str
+    ) -> None:
+        user_dir = self._user_dir(user_key)
+        meta_tmp = user_dir / f"{META_FILE}.tmp"
+        meta_tmp.write_text(
+            json.dumps(
+                {"dims": dims, "generation": generation, "vectors": vectors_name, "rows": rows}, ensure_ascii=False
+            ),
+            encoding="utf-8",
+        )
+        os.replace(meta_tmp, user_dir / META_FILE)
+        self._indexes.pop(user_key, None)
+
+    def _write(self, user_key: str, matrix: np.ndarray, rows: List[Dict[str, Any]], dims: int) -> None:
+        """새 세대 벡터 파일을 쓰고 meta.json을 교체한다. _writing() 안에서만 호출한다."""
+        user_dir = self._user_dir(user_key)
+        user_dir.mkdir(parents=True, exist_ok=True)
+        current = self._indexes.get(user_key)
+        generation = (current.generation if current is not None else 0) + 1
+        vectors_name = _vectors_file(generation)
+
+        vectors_tmp = user_dir / f"{vectors_name}.tmp"
+        np.ascontiguousarray(matrix, dtype="<f4").tofile(vectors_tmp)
+        os.replace(vectors_tmp, user_dir / vectors_name)
+        self._commit_meta(user_key, rows, dims, generation, vectors_name)
+
+        # 이전 세대는 지운다. 이미 memmap으로 연 reader는 계속 읽을 수 있다. (POSIX unlink)
+        for path in user_dir.glob("vectors*.f32"):
+            if path.name != vectors_name:
+                try:
+                    path.unlink()
+                except OSError as exc:
+                    logger.warning("Failed to remove old local vectors %s: %s", path, exc)
+
+    def _rewrite(self, user_key: str, keep: np.ndarray, rows: List[Dict[str, Any]], index: _UserIndex) -> None:
+        matrix = np.asarray(index.matrix[keep]) if keep.size else np.empty((0, index.dims), dtype=np.float32)
+        self._write(user_key, matrix, rows, index.dims)
+
+    # ------------------------------
+    # VectorStore
+    # ------------------------------
+    def search_batch(
+        self,
+        query_vectors: Sequence[Sequence[float]],
+        user_id: UUID | str,
+        group_id: Optional[UUID] = None,
+        document_id: Optional[UUID] = None,
+        top_k: int = 5,
+        query_texts: Optional[Sequence[Optional[str]]] = None,
+        text_weight: float = 0.0,
+        vector_weight: float = 1.0,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        여러 질의 벡터를 한 번의 행렬 곱으로 검색한다.
+        query_texts가 있으면 질의별로 BM25 후보와 벡터 후보를 RRF로 합친다.
+        """
+        user_key = str(user_id)
+        with self._lock(user_key):
+            index = self._load(user_key)
+        if index is None or not index.rows or not len(query_vectors):
+            return [[] for _ in query_vectors]
+
+        queries = _normalize_rows(np.asarray(query_vectors, dtype=np.float32).reshape(len(query_vectors), -1))
+        if queries.shape[1] != index.dims:
+            raise ValueError(f"Query has {queries.shape[1]} dims, index for {user_key} has {index.dims}")
+
+        texts = list(query_texts) if query_texts is not None else [None] * len(query_vectors)
+        hybrid = [is_hybrid(text, text_weight) for text in texts]
+        candidates = max(top_k, settings.hybrid_candidates) if any(hybrid) else top_k
+
+        rows = index.candidate_rows(
+            str(group_id) if group_id is not None else None,
+            str(document_id) if document_id is not None else None,
+        )
+        results: List[List[Dict[str, Any]]] = []
+        vector_results = top_k_cosine(index.matrix, queries, candidates, rows=rows, block_rows=self.block_rows)
+        for b, (idx, cosine) in enumerate(vector_results):
+            if hybrid[b]:
+                text_idx, _ = index.bm25.top_k(texts[b], candidates, rows=rows)
+                ranked = reciprocal_rank_fusion(
+                    [idx.tolist(), text_idx.tolist()], [vector_weight, text_weight]
+                )[:top_k]
+            else:
+                ranked = list(zip(idx[:top_k].tolist(), _to_search_score(cosine[:top_k]).tolist()))
+
+            hits = []
+            for row, score in ranked:
+                hit = {f: index.rows[row].get(f) for f in HIT_FIELDS + CHUNK_META_FIELDS}
+                hit["score"] = float(score)
+                hits.append(hit)
+            results.append(hits)
+        return results
+
+    async def search(
+        self,
+        query_vector: Sequence[float],
+        user_id: UUID,
+        group_id: Optional[UUID] = None,
+        document_id: Optional[UUID] = None,
+        top_k: int = 5,
+        query_text: Optional[str] = None,
+        text_weight: float = 0.0,
+        vector_weight: float = 1.0,
+    ) -> List[Dict[str, Any]]:
+        results = await asyncio.to_thread(
+            self.search_batch,
+            [query_vector],
+            user_id,
+            group_id,
+            document_id,
+            top_k,
+            [query_text],
+            text_weight,
+            vector_weight,
+        )
+        return results[0]
+
+    def upsert(self, user_id: UUID, chunks: List[Dict[str, Any]]) -> None:
+        if not chunks:
+            return
+        user_key = str(user_id)
+        vectors = _normalize_rows(np.asarray([c["embedding"] for c in chunks], dtype=np.float32))
+        new_rows = []
+        for chunk in chunks:
+            row = {f: chunk.get(f) for f in HIT_FIELDS + CHUNK_META_FIELDS}
+            for key in ("document_id", "user_id", "group_id"):
+                if row[key] is not None:
+                    row[key] = str(row[key])
+            row["user_id"] = row["user_id"] or user_key
+            new_rows.append(row)
+
+        with self._writing(user_key):
+            index = self._load(user_key)
+            if index is not None and index.rows:
+                if index.dims != vectors.shape[1]:
+                    raise ValueError(f"Embedding has {vectors.shape[1]} dims, index for {user_key} has {index.dims}")
+                replaced = {row["id"] for row in new_rows}
+                keep = np.asarray([i for i, r in enumerate(index.rows) if r.get("id") not in replaced], dtype=np.int64)
+                matrix = np.concatenate([np.asarray(index.matrix[keep]), vectors])
+                rows = [index.rows[i] for i in keep.tolist()] + new_rows
+            else:
+                matrix, rows = vectors, new_rows
+            self._write(user_key, matrix, rows, int(vectors.shape[1]))
+
+    def delete_document(self, user_id: UUID, document_id: UUID) -> None:
+        try:
+            self._delete_documents(user_id, [document_id])
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Failed to delete local vectors for %s: %s", document_id, exc)
+
+    def _delete_documents(self, user_id: UUID, document_ids: Sequence[UUID]) -> None:
+        # 문서 수와 상관없이 파일은 한 번만 다시 쓴다.
+        user_key = str(user_id)
+        with self._writing(user_key):
+            index = self._load(user_key)
+            if index is None:
+                return
+            drop: set[int] = set()
+            for document_id in document_ids:
+                rows = index.by_document.get(str(document_id))
+                if rows is not None:
+                    drop.update(rows.tolist())
+            if not drop:
+                return
+            keep = np.asarray([i for i in range(len(index.rows)) if i not in drop], dtype=np.int64)
+            self._rewrite(user_key, keep, [index.rows[i] for i in keep.tolist()], index)
+
+    async def adelete_documents(self, user_id: UUID, document_ids: Sequence[UUID]) -> None:
+        await asyncio.to_thread(self._delete_documents, user_id, document_ids)
+
+    def delete_chunks(self, user_id: UUID, ids: Sequence[str]) -> None:
+        if not ids:
+            return
+        user_key = str(user_id)
+        drop = set(ids)
+        with self._writing(user_key):
+            index = self._load(user_key)
+            if index is None:
+                return
+            keep = np.asarray([i for i, r in enumerate(index.rows) if r.get("id") not in drop], dtype=np.int64)
+            if len(keep) == len(index.rows):
+                return
+            self._rewrite(user_key, keep, [index.rows[i] for i in keep.tolist()], index)
+
+    def get_vectors(self, user_id: UUID, ids: Sequence[str]) -> Dict[str, List[float]]:
+        user_key = str(user_id)
+        wanted = set(ids)
+        with self._lock(user_key):
+            index = self._load(user_key)
+            if index is None:
+                return {}
+            return {
+                r["id"]: np.asarray(index.matrix[i]).tolist()
+                for i, r in enumerate(index.rows)
+                if r.get("id") in wanted
+            }
+
+    def update_group(self, user_id: UUID, document_id: UUID, group_id: Optional[UUID]) -> None:
+        try:
+            self._update_groups(user_id, [document_id], group_id)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Failed to update local vector group for %s: %s", document_id, exc)
+
+    def _update_groups(self, user_id: UUID, document_ids: Sequence[UUID], group_id: Optional[UUID]) -> None:
+        user_key = str(user_id)
+        with self._writing(user_key):
+            index = self._load(user_key)
+            if index is None:
+                return
+            targets = [index.by_document[str(d)] for d in document_ids if str(d) in index.by_document]
+            if not targets:
+                return
+            rows = [dict(r) for r in index.rows]
+            for positions in targets:
+                for i in positions.tolist():
+                    rows[i]["group_id"] = str(group_id) if group_id else None
+            # 벡터는 그대로(같은 세대 파일), 메타데이터만 다시 쓴다.
+            vectors_name = _vectors_file(index.generation) if index.generation else VECTORS_FILE
+            self._commit_meta(user_key, rows, index.dims, index.generation, vectors_name)
+
+    async def aupdate_groups(self, user_id: UUID, document_ids: Sequence[UUID], group_id: Optional[UUID]) -> None:
+        await asyncio.to_thread(self._update_groups, user_id, document_ids, group_id)
+
+    def stats(self) -> Dict[str, Any]:
+        loaded = list(self._indexes.values())
+        return {
+            "backend": self.name,
+            "root": str(self.root),
+            "loaded_users": len(loaded),
+            "loaded_rows": sum(len(i.rows) for i in loaded),
+        }
@@ -0,0 +1,283 @@
+"""
+qa_logs / qa_keywords 월별 파티션 관리 (DB/schema/010_partition_qa_logs.sql)
+
+- ensure_partitions(): 이번 달부터 qa_log_partition_months_ahead 달 뒤까지 파티션을 미리 만든다.
+- apply_retention(): qa_log_retention_months 보다 오래된 달을 blob에 gzip JSONL로 보관한 뒤
+  qa_keywords 파티션을 지우고 qa_logs 파티션을 DETACH → DROP 한다. (DELETE/VACUUM 없음)
+- run_maintenance(): 둘을 advisory lock 안에서 실행한다. API lifespan의 주기 작업과
+  `python -m app.workers.qa_log_maintenance` 가 같이 쓴다. (여러 프로세스가 돌려도 한 곳만 실행)
+- check_partitions(): API 시작 때 한 번 파티션을 만들고 이번 달 파티션이 없으면 error 로그를 남긴다.
+
+대시보드 집계 테이블(qa_daily_counts 등)은 로그와 별개라 파티션을 지워도 남는다.
+"""
+from __future__ import annotations
+
+import asyncio
+import gzip
+import io
+import json
+import logging
+import re
+import tempfile
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from azure.storage.blob import ContainerClient
+from sqlalchemy import column, func, select, table, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.db import engine
+from app.models.qa_log import QALog
+from app.services.blob_storage import get_blob_container_client, upload_blob
+
+logger = logging.getLogger(__name__)
+
+LOG_TABLE = "qa_logs"
+KEYWORD_TABLE = "qa_keywords"
+# 파티션 관리는 프로세스 하나만 (pg_try_advisory_lock 키)
+MAINTENANCE_LOCK_KEY = 0x71616C6F67  # "qalog"
+ARCHIVE_FETCH_ROWS = 1000
+# 파티션 DDL은 부모 테이블을 잠시 배타 잠금한다. 긴 조회 뒤에 줄 서서 로그 INSERT를 막지 않도록 짧게 포기한다.
+DDL_LOCK_TIMEOUT = "5s"
+
+_PARTITION_RE = re.compile(r"^qa_logs_p(\d{4})(\d{2})$")
+
+
+@dataclass
+class ArchivedPartition:
+    month: date
+    blob_path: Optional[str]
+    rows: int
+
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(parent: str, month: date) -> str:
+    return f"{parent}_p{month:%Y%m}"
+
+
+def _bound(month: date) -> str:
+    return f"{month:%Y-%m-%d} 00:00:00+00"
+
+
+def _current_month(now: Optional[datetime] = None) -> date:
+    return month_start((now or datetime.now(timezone.utc)).date())
+
+
+def is_partitioned(db: Session) -> bool:
+    return bool(
+        db.execute(
+            text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:name)"),
+            {"name": LOG_TABLE},
+        ).scalar()
+    )
+
+
+def list_partitions(db: Session) -> List[date]:
+    """붙어 있는 qa_logs 월 파티션 (오래된 순)"""
+    names = db.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(:name)"
+        ),
+        {"name": LOG_TABLE},
+    ).scalars()
+    months = []
+    for name in names:
+        match = _PARTITION_RE.match(name)
+        if match:
+            months.append(date(int(match.group(1)), int(match.group(2)), 1))
+    return sorted(months)
+
+
+def ensure_partitions(db: Session, months_ahead: Optional[int] = None, now: Optional[datetime] = None) -> List[date]:
+    """이번 달 ~ months_ahead 달 뒤 파티션을 만든다. 새로 만든 달 목록을 돌려준다. 커밋은 호출자가 한다."""
+    ahead = settings.qa_log_partition_months_ahead if months_ahead is None else months_ahead
+    existing = set(list_partitions(db))
+    current = _current_month(now)
+    created = []
+    db.execute(text(f"SET LOCAL lock_timeout = '{DDL_LOCK_TIMEOUT}'"))
+    for offset in range(max(ahead, 0) + 1):
+        month = add_months(current, offset)
+        if month in existing:
+            continue
+        lower, upper = _bound(month), _bound(add_months(month, 1))
+        for parent in (LOG_TABLE, KEYWORD_TABLE):
+            db.execute(
+                text(
+                    f"CREATE TABLE IF NOT EXISTS {partition_name(parent, month)} PARTITION OF {parent} "
+                    f"FOR VALUES FROM ('{lower}') TO ('{upper}')"
+                )
+            )
+        created.append(month)
+    return created
+
+
+def expired_partitions(db: Session, retention_months: Optional[int] = None, now: Optional[datetime] = None) -> List[date]:
+    """보존 기간이 지난 달. (이번 달 포함 retention_months 달을 남긴다)"""
+    retention = settings.qa_log_retention_months if retention_months is None else retention_months
+    if not retention or retention <= 0:
+        return []
+    cutoff = add_months(_current_month(now), -(retention - 1))
+    return [month for month in list_partitions(db) if month < cutoff]
+
+
+def _archive_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def archive_partition(db: Session, container: ContainerClient, month: date) -> ArchivedPartition:
+    """
+    한 달치 로그(+키워드 배열)를 gzip JSONL 한 개로 blob에 올린다.
+    행은 서버 쪽 커서로 ARCHIVE_FETCH_ROWS씩 읽고, 압축 결과는 index_spool_max_bytes 까지만 메모리에 둔다.
+    """
+    columns = [c.name for c in QALog.__table__.columns]
+    logs = table(partition_name(LOG_TABLE, month), *[column(name) for name in columns])
+    keywords = table(partition_name(KEYWORD_TABLE, month), column("qa_log_id"), column("keyword"))
+    keyword_arrays = (
+        select(keywords.c.qa_log_id, func.array_agg(keywords.c.keyword).label("keywords"))
+        .group_by(keywords.c.qa_log_id)
+        .subquery()
+    )
+    stmt = select(logs, keyword_arrays.c.keywords).outerjoin(
+        keyword_arrays, keyword_arrays.c.qa_log_id == logs.c.id
+    )
+    blob_path = f"{settings.qa_log_archive_prefix.rstrip('/')}/{month:%Y/%m}.jsonl.gz"
+
+    rows = 0
+    with tempfile.SpooledTemporaryFile(max_size=settings.index_spool_max_bytes) as spool:
+        with gzip.GzipFile(fileobj=spool, mode="wb") as archive:
+            writer = io.TextIOWrapper(archive, encoding="utf-8")
+            result = db.execute(stmt.execution_options(stream_results=True, yield_per=ARCHIVE_FETCH_ROWS))
+            for row in result.mappings():
+                record = dict(row)
+                record["keywords"] = record["keywords"] or []
+                writer.write(json.dumps(record, ensure_ascii=False, default=_archive_default))
+                writer.write("\n")
+                rows += 1
+            writer.flush()
+            writer.detach()
+        if not rows:
+            return ArchivedPartition(month, None, 0)
+        spool.seek(0)
+        upload_blob(container, blob_path, spool, content_type="application/gzip")
+    return ArchivedPartition(month, blob_path, rows)
+
+
+def drop_partition(db: Session, month: date) -> None:
+    """
+    한 달치 파티션을 지운다. 커밋은 호출자가 한다.
+    qa_keywords 파티션이 qa_logs 파티션을 참조하므로 먼저 지우고, qa_logs 파티션은 FK 검사를 거쳐 DETACH 한 뒤 지운다.
+    """
+    keyword_partition = partition_name(KEYWORD_TABLE, month)
+    log_partition = partition_name(LOG_TABLE, month)
+    db.execute(text(f"SET LOCAL lock_timeout = '{DDL_LOCK_TIMEOUT}'"))
+    db.execute(text(f"DROP TABLE IF EXISTS {keyword_partition}"))
+    db.execute(text(f"ALTER TABLE {LOG_TABLE} DETACH PARTITION {log_partition}"))
+    db.execute(text(f"DROP TABLE {log_partition}"))
+
+
+def apply_retention(
+    db: Session,
+    container: Optional[ContainerClient] = None,
+    retention_months: Optional[int] = None,
+    archive: Optional[bool] = None,
+    now: Optional[datetime] = None,
+) -> List[ArchivedPartition]:
+    """
+    보존 기간이 지난 달을 오래된 순으로 보관하고 지운다. 달마다 커밋한다.
+    보관(업로드)이 실패하면 그 달은 지우지 않고 멈춘다. (다음 실행에서 다시 시도)
+    """
+    archive = settings.qa_log_archive_enabled if archive is None else archive
+    done = []
+    for month in expired_partitions(db, retention_months, now):
+        if archive:
+            archived = archive_partition(db, container or get_blob_container_client(), month)
+            db.commit()  # 긴 조회 트랜잭션과 DDL 트랜잭션을 나눈다
+        else:
+            archived = ArchivedPartition(month, None, 0)
+        drop_partition(db, month)
+        db.commit()
+        logger.info("qa_logs partition %s archived to %s (%d rows) and dropped", month, archived.blob_path, archived.rows)
+        done.append(archived)
+    return done
+
+
+def run_maintenance(
+    retention: bool = True,
+    retention_months: Optional[int] = None,
+    months_ahead: Optional[int] = None,
+    archive: Optional[bool] = None,
+) -> Dict[str, Any]:
+    """파티션 미리 만들기 + 보존 기간 적용. 다른 프로세스가 실행 중이면 건너뛴다."""
+    # 세션 단위 advisory lock은 커넥션에 붙으므로 커밋 사이에도 같은 커넥션을 쓴다.
+    with engine.connect() as conn, Session(bind=conn) as db:
+        if not is_partitioned(db):
+            logger.warning("qa_logs is not partitioned; apply DB/schema/010_partition_qa_logs.sql")
+            return {"skipped": "not partitioned"}
+        if not db.execute(select(func.pg_try_advisory_lock(MAINTENANCE_LOCK_KEY))).scalar():
+            return {"skipped": "locked"}
+        try:
+            created = ensure_partitions(db, months_ahead)
+            db.commit()
+            archived = apply_retention(db, retention_months=retention_months, archive=archive) if retention else []
+            return {
+                "created": [f"{month:%Y-%m}" for month in created],
+                "archived": [
+                    {"month": f"{item.month:%Y-%m}", "blob_path": item.blob_path, "rows": item.rows}
+                    for item in archived
+                ],
+                "partitions": [f"{month:%Y-%m}" for month in list_partitions(db)],
+            }
+        finally:
+            db.rollback()
+            db.execute(select(func.pg_advisory_unlock(MAINTENANCE_LOCK_KEY)))
+            db.commit()
+
+
+def check_partitions() -> None:
+    """
+    시작 시 점검. 주기 작업 설정(qa_log_maintenance_embedded)과 상관없이 lifespan에서 한 번 부른다.
+    이번 달 파티션이 없으면 QA 로그 INSERT가 모두 실패하므로 error로 남긴다.
+    """
+    try:
+        summary = run_maintenance(retention=False)
+        if summary.get("skipped") == "not partitioned":
+            return
+        if summary.get("created"):
+            logger.info("qa_logs partitions created on startup: %s", summary["created"])
+        with engine.connect() as conn, Session(bind=conn) as db:
+            months = list_partitions(db)
+        current = _current_month()
+        if current not in months:
+            logger.error(
+                "qa_logs has no partition for %s; qa log inserts will fail until "
+                "`python -m app.workers.qa_log_maintenance` succeeds",
+                f"{current:%Y-%m}",
+            )
+    except Exception:  # noqa: BLE001
+        logger.exception("qa_logs partition check failed on startup")
+
+
+async def maintenance_loop() -> None:
+    """API 프로세스 안에서 qa_log_maintenance_interval_seconds 마다 run_maintenance()를 돌린다. (lifespan에서 취소)"""
+    while True:
+        try:
+            summary = await asyncio.to_thread(run_maintenance)
+            if summary.get("created") or summary.get("archived"):
+                logger.info("qa_logs partition maintenance: %s", summary)
+        except Exception:  # noqa: BLE001
+            logger.exception("qa_logs partition maintenance failed")
+        await asyncio.sleep(settings.qa_log_maintenance_interval_seconds)
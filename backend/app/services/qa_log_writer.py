@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Set
+from uuid import UUID
+
+from sqlalchemy import DateTime, Integer, String, column, func, insert, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.db import AsyncSessionLocal
+from app.models.link import Link
+from app.models.qa_keyword import QAKetword
+from app.models.qa_log import QALog
+from app.services.dashboard_rollups import record_qa_rollups
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class QALogRecord:
+    """아직 DB에 쓰지 않은 QA 로그 한 건. created_at은 질문 시점으로 고정한다."""
+
+    user_id: UUID
+    question: str
+    answer: str
+    status: str
+    document_id: Optional[UUID] = None
+    link_id: Optional[str] = None
+    normalized_question: Optional[str] = None
+    model: Optional[str] = None
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    context_tokens_saved: Optional[int] = None
+    latency_ms: Optional[int] = None
+    cache_hit: bool = False
+    keywords: List[str] = field(default_factory=list)
+    id: UUID = field(default_factory=uuid.uuid4)
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+@dataclass
+class WriterMetrics:
+    written: int = 0
+    dropped: int = 0  # 큐가 가득 차서 버린 로그
+    failed: int = 0  # DB 오류로 버린 로그
+    flushes: int = 0
+    flush_seconds: float = 0.0
+    last_flush_size: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "flushes": self.flushes,
+            "avg_batch_size": round(self.written / self.flushes, 1) if self.flushes else None,
+            "avg_flush_ms": round(self.flush_seconds * 1000 / self.flushes, 1) if self.flushes else None,
+            "last_flush_size": self.last_flush_size,
+        }
+
+
+async def _touch_links(db: AsyncSession, records: Sequence[QALogRecord]) -> Dict[str, UUID]:
+    """링크 접근 카운트/시각을 링크별로 모아 UPDATE 한 번. 살아 있는 링크 id → 링크 소유자."""
+    hits: Dict[str, List[Any]] = defaultdict(lambda: [0, None])
+    for record in records:
+        if record.link_id:
+            hit = hits[record.link_id]
+            hit[0] += 1
+            hit[1] = max(hit[1], record.created_at) if hit[1] else record.created_at
+    if not hits:
+        return {}
+    touched = values(
+        column("id", String),
+        column("n", Integer),
+        column("at", DateTime(timezone=True)),
+        name="touched",
+    ).data([(link_id, n, at) for link_id, (n, at) in sorted(hits.items())])
+    rows = await db.execute(
+        update(Link)
+        .where(Link.id == touched.c.id)
+        .values(
+            access_count=Link.access_count + touched.c.n,
+            last_accessed_at=func.greatest(Link.last_accessed_at, touched.c.at),
+        )
+        .returning(Link.id, Link.user_id)
+        .execution_options(synchronize_session=False)
+    )
+    return {link_id: owner_id for link_id, owner_id in rows}
+
+
+async def write_qa_logs(db: AsyncSession, records: Sequence[QALogRecord]) -> None:
+    """
+    QA 로그 여러 건을 한 트랜잭션으로 쓴다. 건수와 상관없이 문장 수가 일정하다.
+    링크 갱신 → 로그/키워드 multi-row INSERT → 링크 소유자의 대시보드 집계 순서. 커밋은 호출자가 한다.
+    """
+    owners = await _touch_links(db, records)
+    log_rows = []
+    keyword_rows = []
+    for record in records:
+        # 그사이 지워진 링크면 FK 때문에 배치 전체가 실패하지 않도록 링크 없이 남긴다.
+        link_id = record.link_id if record.link_id in owners else None
+        log_rows.append(
+            {
+                "id": record.id,
+                "user_id": record.user_id,
+                "document_id": record.document_id,
+                "link_id": link_id,
+                "question": record.question,
+                "answer": record.answer,
+                "status": record.status,
+                "normalized_question": record.normalized_question,
+                "model": record.model,
+                "prompt_tokens": record.prompt_tokens,
+                "completion_tokens": record.completion_tokens,
+                "context_tokens_saved": record.context_tokens_saved,
+                "latency_ms": record.latency_ms,
+                "cache_hit": record.cache_hit,
+                "owner_id": owners.get(link_id) if link_id else None,
+                "created_at": record.created_at,
+            }
+        )
+        keyword_rows.extend(
+            {"qa_log_id": record.id, "keyword": kw, "created_at": record.created_at}
+            for kw in dict.fromkeys(record.keywords)
+        )
+
+    # 행 목록을 넘기면 SQLAlchemy가 INSERT ... VALUES (...), (...) 로 묶어 보낸다. (insertmanyvalues)
+    await db.execute(insert(QALog), log_rows)
+    if keyword_rows:
+        await db.execute(insert(QAKetword), keyword_rows)
+    # 대시보드는 집계 테이블만 읽는다.
+    await record_qa_rollups(
+        db,
+        [row["id"] for row in log_rows if row["owner_id"] is not None],
+        created_from=min(record.created_at for record in records),
+    )
+
+
+class QALogWriter:
+    """
+    QA 로그/키워드를 메모리 큐에 모았다가 배치로 쓰는 프로세스 단위 writer.
+
+    - batch_size건이 모이거나 첫 건 이후 flush_interval초가 지나면 한 트랜잭션으로 쓴다.
+    - 큐는 max_queue건으로 제한된다. put()은 자리가 날 때까지 기다리고(backpressure),
+      기다릴 수 없는 곳(취소된 스트림 등)은 submit()을 쓰며 가득 차면 버리고 dropped로 센다.
+    - 배치가 실패하면 한 건씩 다시 써서 문제 있는 로그만 버린다. (best-effort, 재시도 없음)
+    - aclose()는 큐에 남은 로그를 모두 쓰고 끝낸다. 시작 전/종료 후에는 한 건씩 바로 쓴다.
+    """
+
+    def __init__(
+        self,
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        max_queue: Optional[int] = None,
+    ) -> None:
+        self.batch_size = max(1, batch_size or settings.qa_log_batch_size)
+        self.flush_interval = flush_interval or settings.qa_log_flush_interval_seconds
+        self.max_queue = max(self.batch_size, max_queue or settings.qa_log_queue_max)
+        self.metrics = WriterMetrics()
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._direct: Set[asyncio.Task] = set()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._queue = asyncio.Queue(self.max_queue)
+            self._task = asyncio.create_task(self._run(), name="qa-log-writer")
+
+    async def aclose(self) -> None:
+        task, queue = self._task, self._queue
+        if task is None or queue is None:
+            return
+        self._task = None  # 이후 들어오는 로그는 바로 쓴다
+        await queue.put(None)
+        await task
+        # 종료 직전에 자리를 기다리던 put()이 sentinel 뒤에 넣은 로그
+        leftover = [item for item in _drain_nowait(queue) if item is not None]
+        if leftover:
+            await self._flush(leftover)
+        self._queue = None
+        if self._direct:
+            await asyncio.gather(*self._direct, return_exceptions=True)
+        logger.info("qa log writer stopped: %s", self.metrics.as_dict())
+
+    async def put(self, record: QALogRecord) -> None:
+        if self._task is None or self._queue is None:
+            await self._flush([record])
+            return
+        await self._queue.put(record)
+
+    def submit(self, record: QALogRecord) -> None:
+        """기다리지 않고 넣는다. (이벤트 루프 안에서만 호출)"""
+        if self._task is None or self._queue is None:
+            task = asyncio.get_running_loop().create_task(self._flush([record]))
+            self._direct.add(task)
+            task.add_done_callback(self._direct.discard)
+            return
+        try:
+            self._queue.put_nowait(record)
+        except asyncio.QueueFull:
+            self.metrics.dropped += 1
+            if self.metrics.dropped % 1000 == 1:
+                logger.warning("qa log writer: queue full, dropped %d logs so far", self.metrics.dropped)
+
+    async def _run(self) -> None:
+        queue = self._queue
+        assert queue is not None
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            first = await queue.get()
+            if first is None:
+                break
+            batch = [first]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[QALogRecord]) -> None:
+        started = time.monotonic()
+        try:
+            async with AsyncSessionLocal() as db:
+                await write_qa_logs(db, batch)
+                await db.commit()
+            self.metrics.written += len(batch)
+        except Exception:  # noqa: BLE001
+            if len(batch) == 1:
+                self.metrics.failed += 1
+                logger.exception("qa log writer: failed to write qa log %s", batch[0].id)
+            else:
+                logger.warning("qa log writer: batch of %d failed, retrying one by one", len(batch), exc_info=True)
+                for record in batch:
+                    await self._flush([record])
+                return
+        self.metrics.flushes += 1
+        self.metrics.flush_seconds += time.monotonic() - started
+        self.metrics.last_flush_size = len(batch)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue": self.max_queue,
+            "batch_size": self.batch_size,
+            "flush_interval_seconds": self.flush_interval,
+            **self.metrics.as_dict(),
+        }
+
+
+def _drain_nowait(queue: asyncio.Queue):
+    while True:
+        try:
+            yield queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+
+
+# 프로세스당 하나. lifespan에서 start()/aclose() 한다.
+qa_log_writer = QALogWriter()
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Tuple
+
+
+class StageSkipped(Exception):
+    """선행 stage가 실패해서 실행되지 않은 stage 표시용."""
+
+
+@dataclass(frozen=True)
+class Stage:
+    """
+    파이프라인의 한 단계.
+    run(ctx)는 초기 입력과 완료된 선행 stage 결과(이름 → 값)가 담긴 ctx를 받는다.
+    """
+
+    name: str
+    run: Callable[[Dict[str, Any]], Awaitable[Any]]
+    after: Tuple[str, ...] = ()
+
+
+@dataclass
+class StageRun:
+    results: Dict[str, Any] = field(default_factory=dict)
+    errors: Dict[str, BaseException] = field(default_factory=dict)
+    timings: Dict[str, float] = field(default_factory=dict)
+    total_ms: float = 0.0
+
+    def failed(self, name: str) -> bool:
+        return name in self.errors
+
+    def first_error(self) -> BaseException | None:
+        for exc in self.errors.values():
+            if not isinstance(exc, StageSkipped):
+                return exc
+        return None
+
+    def server_timing(self) -> str:
+        """HTTP Server-Timing 헤더 값 (브라우저 devtools에서 stage별 시간 확인용)"""
+        parts = [f"{name};dur={ms:.1f}" for name, ms in self.timings.items()]
+        parts.append(f"total;dur={self.total_ms:.1f}")
+        return ", ".join(parts)
+
+
+class StageGraph:
+    """
+    의존 관계(after)만 지키면서 나머지 stage는 동시에 실행하는 작은 DAG 실행기.
+
+    - 선행 stage가 실패하면 그 뒤의 stage는 StageSkipped로 건너뛴다.
+    - 서로 독립적인 stage는 실패와 무관하게 끝까지 실행된다.
+    - stage별 실행 시간(ms)을 기록한다. (선행 stage 대기 시간은 제외)
+    """
+
+    def __init__(self, stages: Iterable[Stage]) -> None:
+        self._stages = self._toposort(list(stages))
+
+    @staticmethod
+    def _toposort(stages: List[Stage]) -> List[Stage]:
+        by_name = {s.name: s for s in stages}
+        if len(by_name) != len(stages):
+            raise ValueError("Duplicate stage names in graph")
+        for s in stages:
+            missing = [d for d in s.after if d not in by_name]
+            if missing:
+                raise ValueError(f"Stage {s.name!r} depends on unknown stages: {missing}")
+
+        ordered: List[Stage] = []
+        state: Dict[str, int] = {}  # 1 = visiting, 2 = done
+
+        def visit(s: Stage) -> None:
+            mark = state.get(s.name)
+            if mark == 2:
+                return
+            if mark == 1:
+                raise ValueError(f"Cycle detected at stage {s.name!r}")
+            state[s.name] = 1
+            for d in s.after:
+                visit(by_name[d])
+            state[s.name] = 2
+            ordered.append(s)
+
+        for s in stages:
+            visit(s)
+        return ordered
+
+    async def run(self, ctx: Dict[str, Any]) -> StageRun:
+        run = StageRun(results=dict(ctx))
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def _run_stage(stage: Stage) -> Any:
+            for dep in stage.after:
+                try:
+                    await tasks[dep]
+                except BaseException as exc:  # noqa: BLE001
+                    if isinstance(exc, asyncio.CancelledError) and not tasks[dep].cancelled():
+                        raise
+                    skipped = StageSkipped(f"{stage.name} skipped: {dep} failed")
+                    run.errors[stage.name] = skipped
+                    raise skipped from exc
+
+            started = time.perf_counter()
+            try:
+                value = await stage.run(run.results)
+            except BaseException as exc:
+                run.errors[stage.name] = exc
+                raise
+            finally:
+                run.timings[stage.name] = (time.perf_counter() - started) * 1000
+            run.results[stage.name] = value
+            return value
+
+        started = time.perf_counter()
+        for stage in self._stages:
+            tasks[stage.name] = asyncio.create_task(_run_stage(stage), name=f"stage:{stage.name}")
+        try:
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+        except asyncio.CancelledError:
+            for task in tasks.values():
+                task.cancel()
+            raise
+        finally:
+            run.total_ms = (time.perf_counter() - started) * 1000
+        return run
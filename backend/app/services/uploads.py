@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import logging
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterable, List, Optional, Sequence
+from uuid import UUID
+
+from azure.storage.blob.aio import ContainerClient as AsyncContainerClient
+from fastapi import BackgroundTasks, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.document import Document, DocumentStatus
+from app.models.document_group import DocumentGroup
+from app.models.index_job import PRIORITY_BULK
+from app.schemas.document import DocumentRead
+from app.services import index_queue
+from app.services.blob_objects import acquire_blob_object
+from app.services.dashboard_rollups import abump_dashboard_version
+from app.services.blob_storage import UploadResult, UploadTooLarge, adelete_blob, upload_stream
+from app.services.index_queue import enqueue_index_jobs
+from app.services.indexing import index_document, trigger_n8n_indexing
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PendingUpload:
+    """blob은 올라갔고 Document 행은 아직 없는 업로드."""
+
+    doc_id: UUID
+    file_name: str
+    title: Optional[str]
+    content_type: Optional[str]
+    blob: UploadResult
+
+
+def safe_file_name(name: Optional[str]) -> str:
+    return Path(name or "upload.bin").name or "upload.bin"
+
+
+def max_upload_bytes() -> Optional[int]:
+    return settings.max_upload_size_mb * 1024 * 1024 if settings.max_upload_size_mb else None
+
+
+def too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"File too large (>{settings.max_upload_size_mb}MB)",
+    )
+
+
+async def validate_group(db: AsyncSession, user_id: UUID, group_id: Optional[UUID]) -> None:
+    if group_id:
+        group = await db.get(DocumentGroup, group_id)
+        if not group or group.user_id != user_id:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid group_id")
+
+
+async def upload_file(
+    container: AsyncContainerClient,
+    user_id: UUID,
+    chunks: AsyncIterable[bytes],
+    file_name: Optional[str],
+    content_type: Optional[str],
+    title: Optional[str] = None,
+) -> PendingUpload:
+    """업로드 스트림 하나를 blob으로 흘려보낸다. (블록 병렬 업로드, 크기 제한/sha256은 흐르는 동안 계산)"""
+    safe_name = safe_file_name(file_name)
+    doc_id = uuid.uuid4()
+    if settings.blob_dedup_enabled:
+        blob_path = f"objects/{doc_id}"
+    else:
+        blob_path = f"{user_id}/{doc_id}/original/{safe_name}"
+
+    try:
+        result = await upload_stream(container, blob_path, chunks, content_type=content_type, max_bytes=max_upload_bytes())
+    except UploadTooLarge as exc:
+        raise too_large() from exc
+    except RuntimeError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=str(exc),
+        ) from exc
+    return PendingUpload(doc_id, safe_name, title, content_type, result)
+
+
+async def register_uploads(
+    db: AsyncSession,
+    container: AsyncContainerClient,
+    user_id: UUID,
+    group_id: Optional[UUID],
+    uploads: Sequence[PendingUpload],
+) -> List[Document]:
+    """
+    올라간 blob들의 Document 행을 한 트랜잭션에서 만든다.
+    같은 내용(sha256)이 이미 있으면 방금 올린 blob은 커밋 뒤에 지우고 공유 blob을 참조한다.
+    """
+    if not uploads:
+        return []
+    documents: List[Document] = []
+    duplicates: List[str] = []
+    # 동시에 들어온 배치끼리 blob_objects 행을 같은 순서로 잠가서 교착을 피한다.
+    for upload in sorted(uploads, key=lambda u: u.blob.sha256):
+        blob_path = upload.blob.blob_path
+        if settings.blob_dedup_enabled:
+            shared_path, created = await acquire_blob_object(
+                db, upload.blob.sha256, blob_path, upload.blob.size_bytes, upload.content_type
+            )
+            if not created:
+                duplicates.append(blob_path)
+                blob_path = shared_path
+        documents.append(
+            Document(
+                id=upload.doc_id,
+                user_id=user_id,
+                title=upload.title or upload.file_name,
+                original_file_name=upload.file_name,
+                mime_type=upload.content_type,
+                size_bytes=upload.blob.size_bytes,
+                blob_path=blob_path,
+                content_hash=upload.blob.sha256,
+                source="upload",
+                group_id=group_id,
+                status=DocumentStatus.UPLOADED,
+            )
+        )
+
+    # SQLAlchemy 2.0은 같은 테이블의 add_all을 INSERT ... VALUES (...), (...) 한 번으로 보낸다.
+    db.add_all(documents)
+    await abump_dashboard_version(db, user_id)
+    try:
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        # 업로드마다 새 경로에 썼고 blob_objects 행도 롤백됐으므로 중복 여부와 상관없이 모두 지운다.
+        # (공유 blob은 u.blob.blob_path가 아니라 shared_path라 건드리지 않는다)
+        await _discard_blobs(container, [u.blob.blob_path for u in uploads], "rolled back")
+        raise
+
+    await _discard_blobs(container, duplicates, "duplicate")
+
+    await _reload(db, documents)
+    order = {upload.doc_id: i for i, upload in enumerate(uploads)}
+    return sorted(documents, key=lambda doc: order[doc.id])
+
+
+async def _discard_blobs(container: AsyncContainerClient, blob_paths: Sequence[str], reason: str) -> None:
+    """방금 올린 blob들을 지운다. 실패는 로그만 남긴다. (참조 없는 blob이 남을 뿐)"""
+    for path in blob_paths:
+        try:
+            await adelete_blob(container, path)
+        except Exception:  # noqa: BLE001
+            logger.warning("Failed to delete %s upload blob %s", reason, path, exc_info=True)
+
+
+async def _reload(db: AsyncSession, documents: Sequence[Document]) -> None:
+    """created_at/updated_at 등 서버가 채운 값을 문서 수와 상관없이 SELECT 한 번으로 다시 읽는다."""
+    ids = [doc.id for doc in documents]
+    await db.execute(select(Document).where(Document.id.in_(ids)).execution_options(populate_existing=True))
+
+
+async def start_indexing(
+    db: AsyncSession,
+    documents: Sequence[Document],
+    background_tasks: Optional[BackgroundTasks] = None,
+) -> None:
+    """업로드 직후 인덱싱: queue 모드는 bulk 우선순위 작업을 INSERT 한 번으로 넣는다."""
+    if not documents:
+        return
+    if settings.indexing_backend == "queue":
+        for doc in documents:
+            doc.status = DocumentStatus.PROCESSING
+        await enqueue_index_jobs(db, [(doc.id, doc.user_id) for doc in documents], PRIORITY_BULK)
+        await abump_dashboard_version(db, *{doc.user_id for doc in documents})
+        await db.commit()
+        await _reload(db, documents)
+        if index_queue.embedded_worker is not None:
+            index_queue.embedded_worker.notify()
+    elif settings.indexing_backend == "native" and background_tasks is not None:
+        for doc in documents:
+            doc.status = DocumentStatus.PROCESSING
+        await abump_dashboard_version(db, *{doc.user_id for doc in documents})
+        await db.commit()
+        await _reload(db, documents)
+        for doc in documents:
+            background_tasks.add_task(index_document, doc.id)
+    elif settings.indexing_backend == "n8n" and background_tasks is not None:
+        background_tasks.add_task(trigger_n8n_indexing, [DocumentRead.model_validate(doc) for doc in documents])
@@ -0,0 +1,482 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from app.core.http_clients import AZURE_SEARCH, get_async_client, get_sync_client
+
+logger = logging.getLogger(__name__)
+
+# 검색 결과/인덱스 문서에 담기는 필드 (Azure AI Search 인덱스 스키마와 동일)
+HIT_FIELDS = (
+    "id",
+    "document_id",
+    "user_id",
+    "group_id",
+    "chunk_id",
+    "title",
+    "content",
+    "source_path",
+    "original_file_name",
+)
+# /docs/search 페이지 크기와 $skip 상한 (Azure AI Search 제한)
+SEARCH_PAGE_SIZE = 1000
+SEARCH_MAX_SKIP = 100000
+# search.in 필터 하나에 넣는 문서 수
+SEARCH_FILTER_DOCUMENTS = 50
+# 삭제 후 남은 청크를 다시 확인하는 횟수와 간격 (인덱스 반영은 near real-time)
+SEARCH_PURGE_ROUNDS = 3
+SEARCH_REFRESH_SECONDS = 1.0
+
+# 구조 기반 청킹(app.services.chunking)이 붙이는 위치 정보. local 저장소는 항상 저장하고,
+# Azure는 인덱스 스키마에 필드가 있을 때(AZURE_SEARCH_CHUNK_METADATA)만 보낸다.
+CHUNK_META_FIELDS = ("page", "section")
+
+
+class VectorStore(ABC):
+    """
+    청크 벡터 저장소 인터페이스.
+
+    - search()는 HIT_FIELDS + "score" 를 담은 dict 목록을 점수 내림차순으로 돌려준다.
+      query_text와 text_weight > 0 이 주어지면 키워드(BM25) 검색과 벡터 검색 결과를 RRF로 합친
+      하이브리드 검색을 하고, 이때 score는 RRF 점수다.
+    - delete_document()/update_group()은 문서 하나의 청크를 지우거나 그룹을 바꾸는 동기 메서드다.
+    - adelete_documents()/aupdate_groups()는 여러 문서를 한 번에 처리하는 async 버전으로,
+      문서 삭제/그룹 이동 뒤 app.services.index_maintenance가 백그라운드에서 호출한다.
+    """
+
+    name: str = "base"
+
+    @abstractmethod
+    async def search(
+        self,
+        query_vector: Sequence[float],
+        user_id: UUID,
+        group_id: Optional[UUID] = None,
+        document_id: Optional[UUID] = None,
+        top_k: int = 5,
+        query_text: Optional[str] = None,
+        text_weight: float = 0.0,
+        vector_weight: float = 1.0,
+    ) -> List[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def delete_document(self, user_id: UUID, document_id: UUID) -> None:
+        ...
+
+    @abstractmethod
+    def update_group(self, user_id: UUID, document_id: UUID, group_id: Optional[UUID]) -> None:
+        ...
+
+    async def adelete_documents(self, user_id: UUID, document_ids: Sequence[UUID]) -> None:
+        """여러 문서의 청크를 모두 지운다. 기본 구현은 스레드풀에서 문서마다 delete_document()."""
+        def _run() -> None:
+            for document_id in document_ids:
+                self.delete_document(user_id, document_id)
+
+        await asyncio.to_thread(_run)
+
+    async def aupdate_groups(self, user_id: UUID, document_ids: Sequence[UUID], group_id: Optional[UUID]) -> None:
+        """여러 문서 청크의 group_id를 바꾼다. 기본 구현은 스레드풀에서 문서마다 update_group()."""
+        def _run() -> None:
+            for document_id in document_ids:
+                self.update_group(user_id, document_id, group_id)
+
+        await asyncio.to_thread(_run)
+
+    @abstractmethod
+    def delete_chunks(self, user_id: UUID, ids: Sequence[str]) -> None:
+        """청크 id(`{document_id}_{chunk_id}`) 목록을 지운다. 증분 재인덱싱에서 사라진 청크 정리용."""
+        ...
+
+    def get_vectors(self, user_id: UUID, ids: Sequence[str]) -> Dict[str, List[float]]:
+        """저장된 청크 벡터 (재인덱싱 때 위치만 바뀐 청크의 임베딩 재사용). 돌려줄 수 없는 id는 빠진다."""
+        return {}
+
+    @abstractmethod
+    def upsert(self, user_id: UUID, chunks: List[Dict[str, Any]]) -> None:
+        """청크(HIT_FIELDS + "embedding")를 저장한다. 같은 id는 덮어쓴다."""
+        ...
+
+    async def aupsert(self, user_id: UUID, chunks: List[Dict[str, Any]]) -> None:
+        """upsert()의 async 버전. 기본 구현은 스레드풀에서 upsert()를 실행한다."""
+        await asyncio.to_thread(self.upsert, user_id, chunks)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name}
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[Hashable]],
+    weights: Sequence[float],
+    k: Optional[int] = None,
+) -> List[Tuple[Hashable, float]]:
+    """
+    여러 랭킹(id 목록, 1등부터)을 weighted RRF로 합친다: score(d) = Σ w_i / (k + rank_i(d)).
+    (id, score)를 점수 내림차순으로 돌려준다. 동점이면 먼저 나온 랭킹 순서를 따른다.
+    """
+    k = settings.hybrid_rrf_k if k is None else k
+    fused: Dict[Hashable, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        if weight <= 0:
+            continue
+        for rank, doc_id in enumerate(ranking, start=1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + weight / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
+
+
+def is_hybrid(query_text: Optional[str], text_weight: float) -> bool:
+    return bool(settings.hybrid_search_enabled and query_text and query_text.strip() and text_weight > 0)
+
+
+class AzureSearchVectorStore(VectorStore):
+    """Azure AI Search REST API 기반 저장소 (기본값)."""
+
+    name = "azure"
+    api_version = "2023-11-01"
+    hybrid_api_version = "2024-07-01"  # vectorQueries[].weight 지원
+    _vectors_retrievable = True
+
+    @staticmethod
+    def fields() -> tuple:
+        return HIT_FIELDS + CHUNK_META_FIELDS if settings.azure_search_chunk_metadata else HIT_FIELDS
+
+    @staticmethod
+    def configured() -> bool:
+        return bool(
+            settings.azure_search_endpoint
+            and settings.azure_search_admin_key
+            and settings.azure_search_index_name
+        )
+
+    def _url(self, action: str, api_version: Optional[str] = None) -> str:
+        return (
+            f"{settings.azure_search_endpoint}/indexes/{settings.azure_search_index_name}"
+            f"/docs/{action}?api-version={api_version or self.api_version}"
+        )
+
+    @staticmethod
+    def _headers() -> Dict[str, str]:
+        return {
+            "Content-Type": "application/json",
+            "api-key": settings.azure_search_admin_key,
+        }
+
+    async def search(
+        self,
+        query_vector: Sequence[float],
+        user_id: UUID,
+        group_id: Optional[UUID] = None,
+        document_id: Optional[UUID] = None,
+        top_k: int = 5,
+        query_text: Optional[str] = None,
+        text_weight: float = 0.0,
+        vector_weight: float = 1.0,
+    ) -> List[Dict[str, Any]]:
+        filters = [f"user_id eq '{user_id}'"]
+        if group_id is not None:
+            filters.append(f"group_id eq '{group_id}'")
+        if document_id is not None:
+            filters.append(f"document_id eq '{document_id}'")
+
+        body: Dict[str, Any] = {
+            "filter": " and ".join(filters),
+            "select": ",".join(self.fields()),
+            "top": top_k,
+        }
+        api_version = self.api_version
+        if is_hybrid(query_text, text_weight):
+            # 텍스트 + 벡터 질의를 한 요청으로 보내면 Azure가 RRF로 합친다.
+            # 텍스트 쪽 가중치는 지정할 수 없어서 벡터 가중치를 text_weight 기준 상대값으로 준다.
+            body["search"] = query_text
+            body["searchFields"] = settings.hybrid_search_fields
+            if vector_weight > 0:
+                body["vectorQueries"] = [
+                    {
+                        "kind": "vector",
+                        "vector": list(query_vector),
+                        "fields": "embedding",
+                        "k": max(top_k, settings.hybrid_candidates),
+                        "weight": vector_weight / text_weight,
+                    }
+                ]
+            api_version = self.hybrid_api_version
+        else:
+            body["vectorQueries"] = [
+                {
+                    "kind": "vector",
+                    "vector": list(query_vector),
+                    "fields": "embedding",
+                    "k": top_k,
+                }
+            ]
+
+        client = get_async_client(AZURE_SEARCH)
+        resp = await client.post(
+            self._url("search", api_version), headers=self._headers(), json=body, timeout=30.0
+        )
+
+        if resp.status_code >= 400:
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=f"Azure Search error: {resp.status_code} {resp.text}",
+            )
+
+        hits: List[Dict[str, Any]] = []
+        for doc in resp.json().get("value", []):
+            hit = {field: doc.get(field) for field in self.fields()}
+            hit["score"] = float(doc.get("@search.score", 0.0))
+            hits.append(hit)
+        return hits
+
+    @staticmethod
+    def _documents_filter(document_ids: Sequence[UUID]) -> str:
+        return f"search.in(document_id, '{','.join(str(d) for d in document_ids)}', ',')"
+
+    @staticmethod
+    def _id_page(document_filter: str, skip: int) -> Dict[str, Any]:
+        return {"filter": document_filter, "select": "id", "top": SEARCH_PAGE_SIZE, "skip": skip}
+
+    def _document_chunk_ids(self, client, document_id: UUID) -> List[str]:
+        ids: List[str] = []
+        skip = 0
+        while True:
+            resp = client.post(
+                self._url("search"),
+                headers=self._headers(),
+                json=self._id_page(self._documents_filter([document_id]), skip),
+                timeout=30.0,
+            )
+            resp.raise_for_status()
+            page = [doc.get("id") for doc in resp.json().get("value", []) if doc.get("id")]
+            ids.extend(page)
+            if len(page) < SEARCH_PAGE_SIZE or skip + SEARCH_PAGE_SIZE > SEARCH_MAX_SKIP:
+                return ids
+            skip += SEARCH_PAGE_SIZE
+
+    async def _achunk_ids(self, client, document_ids: Sequence[UUID]) -> List[str]:
+        """문서들의 청크 id 전부. 필터 하나에 SEARCH_FILTER_DOCUMENTS개 문서씩 묶어 동시에 페이지를 넘긴다."""
+
+        async def _collect(batch: Sequence[UUID]) -> List[str]:
+            document_filter = self._documents_filter(batch)
+            ids: List[str] = []
+            skip = 0
+            while True:
+                resp = await client.post(
+                    self._url("search"), headers=self._headers(), json=self._id_page(document_filter, skip), timeout=30.0
+                )
+                resp.raise_for_status()
+                page = [doc.get("id") for doc in resp.json().get("value", []) if doc.get("id")]
+                ids.extend(page)
+                # $skip 상한을 넘는 나머지는 adelete_documents()의 다음 라운드가 줍는다.
+                if len(page) < SEARCH_PAGE_SIZE or skip + SEARCH_PAGE_SIZE > SEARCH_MAX_SKIP:
+                    return ids
+                skip += SEARCH_PAGE_SIZE
+
+        batches = [
+            document_ids[start : start + SEARCH_FILTER_DOCUMENTS]
+            for start in range(0, len(document_ids), SEARCH_FILTER_DOCUMENTS)
+        ]
+        results = await asyncio.gather(*(_collect(batch) for batch in batches))
+        return list(dict.fromkeys(chunk_id for ids in results for chunk_id in ids))
+
+    def _post_actions(self, client, actions: List[Dict[str, Any]]) -> None:
+        """/docs/index 배치를 차례로 보낸다. 없는 문서(404)는 실패로 치지 않는다."""
+        step = max(1, settings.index_upsert_batch_size)
+        for start in range(0, len(actions), step):
+            batch = actions[start : start + step]
+            resp = client.post(self._url("index"), headers=self._headers(), json={"value": batch}, timeout=30.0)
+            resp.raise_for_status()
+            failed = [r for r in resp.json().get("value", []) if not r.get("status") and r.get("statusCode") != 404]
+            if failed:
+                raise RuntimeError(
+                    f"Azure Search rejected {len(failed)}/{len(batch)} actions: {failed[0].get('errorMessage')}"
+                )
+
+    @staticmethod
+    def _action_batches(actions: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        step = max(1, settings.index_upsert_batch_size)
+        return [actions[start : start + step] for start in range(0, len(actions), step)]
+
+    async def _apost_actions(self, client, batches: List[List[Dict[str, Any]]]) -> None:
+        """/docs/index 배치들을 index_upsert_concurrency개까지 동시에 보낸다. 없는 문서(404)는 실패로 치지 않는다."""
+        semaphore = asyncio.Semaphore(settings.index_upsert_concurrency)
+
+        async def _post(batch: List[Dict[str, Any]]) -> None:
+            async with semaphore:
+                resp = await client.post(
+                    self._url("index"), headers=self._headers(), json={"value": batch}, timeout=60.0
+                )
+            # 일부 항목만 실패하면 207이 오므로 항목별 status로 가려낸다.
+            if resp.status_code >= 400:
+                raise RuntimeError(f"Azure Search index update failed: {resp.status_code} {resp.text[:500]}")
+            failed = [r for r in resp.json().get("value", []) if not r.get("status") and r.get("statusCode") != 404]
+            if failed:
+                raise RuntimeError(
+                    f"Azure Search rejected {len(failed)}/{len(batch)} actions: {failed[0].get('errorMessage')}"
+                )
+
+        await asyncio.gather(*(_post(batch) for batch in batches))
+
+    def delete_document(self, user_id: UUID, document_id: UUID) -> None:
+        if not self.configured():
+            logger.warning("Azure Search config missing, skipping index delete for %s", document_id)
+            return
+        try:
+            client = get_sync_client(AZURE_SEARCH)
+            ids = self._document_chunk_ids(client, document_id)
+            self._post_actions(client, [{"@search.action": "delete", "id": doc_id} for doc_id in ids])
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Failed to delete search documents for %s: %s", document_id, exc)
+
+    def update_group(self, user_id: UUID, document_id: UUID, group_id: Optional[UUID]) -> None:
+        if not self.configured():
+            logger.warning("Azure Search config missing, skipping index update for %s", document_id)
+            return
+        try:
+            client = get_sync_client(AZURE_SEARCH)
+            ids = self._document_chunk_ids(client, document_id)
+            self._post_actions(client, self._group_actions(ids, group_id))
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Failed to update search group for %s: %s", document_id, exc)
+
+    @staticmethod
+    def _group_actions(ids: Sequence[str], group_id: Optional[UUID]) -> List[Dict[str, Any]]:
+        value = str(group_id) if group_id else None
+        return [{"@search.action": "merge", "id": doc_id, "group_id": value} for doc_id in ids]
+
+    async def adelete_documents(self, user_id: UUID, document_ids: Sequence[UUID]) -> None:
+        if not document_ids:
+            return
+        if not self.configured():
+            logger.warning("Azure Search config missing, skipping index delete for %d documents", len(document_ids))
+            return
+        client = get_async_client(AZURE_SEARCH)
+        for attempt in range(SEARCH_PURGE_ROUNDS):
+            ids = await self._achunk_ids(client, document_ids)
+            if not ids:
+                return
+            if attempt:
+                # 삭제는 약 1초 뒤 검색에 반영되므로 방금 지운 id가 다시 보일 수 있다. (delete는 멱등)
+                logger.info("Search index still has %d chunks for deleted documents, retrying", len(ids))
+            await self._apost_actions(
+                client, self._action_batches([{"@search.action": "delete", "id": doc_id} for doc_id in ids])
+            )
+            await asyncio.sleep(SEARCH_REFRESH_SECONDS)
+        remaining = await self._achunk_ids(client, document_ids)
+        if remaining:
+            raise RuntimeError(f"{len(remaining)} search chunks left after deleting {len(document_ids)} documents")
+
+    async def aupdate_groups(self, user_id: UUID, document_ids: Sequence[UUID], group_id: Optional[UUID]) -> None:
+        if not document_ids:
+            return
+        if not self.configured():
+            logger.warning("Azure Search config missing, skipping index update for %d documents", len(document_ids))
+            return
+        client = get_async_client(AZURE_SEARCH)
+        ids = await self._achunk_ids(client, document_ids)
+        await self._apost_actions(client, self._action_batches(self._group_actions(ids, group_id)))
+
+    def delete_chunks(self, user_id: UUID, ids: Sequence[str]) -> None:
+        if not ids:
+            return
+        if not self.configured():
+            raise RuntimeError("Azure Search configuration is missing")
+        self._post_actions(get_sync_client(AZURE_SEARCH), [{"@search.action": "delete", "id": doc_id} for doc_id in ids])
+
+    def get_vectors(self, user_id: UUID, ids: Sequence[str]) -> Dict[str, List[float]]:
+        # embedding 필드가 retrievable이 아닌 인덱스에서는 400이 나므로 한 번 실패하면 더 묻지 않는다.
+        if not ids or not self.configured() or not self._vectors_retrievable:
+            return {}
+        client = get_sync_client(AZURE_SEARCH)
+        vectors: Dict[str, List[float]] = {}
+        for start in range(0, len(ids), 200):
+            batch = ids[start : start + 200]
+            resp = client.post(
+                self._url("search"),
+                headers=self._headers(),
+                json={
+                    "filter": f"search.in(id, '{','.join(batch)}', ',')",
+                    "select": "id,embedding",
+                    "top": len(batch),
+                },
+                timeout=30.0,
+            )
+            if resp.status_code == 400:
+                logger.info("Azure Search index does not return embeddings; chunk vectors will not be reused")
+                self._vectors_retrievable = False
+                return {}
+            resp.raise_for_status()
+            for doc in resp.json().get("value", []):
+                if doc.get("id") and doc.get("embedding"):
+                    vectors[doc["id"]] = doc["embedding"]
+        return vectors
+
+    @classmethod
+    def _upsert_batches(cls, chunks: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """/docs/index 한 번에 최대 index_upsert_batch_size 문서, 요청 크기 index_upsert_max_bytes 이하로 나눈다."""
+        batches: List[List[Dict[str, Any]]] = []
+        current: List[Dict[str, Any]] = []
+        current_bytes = 0
+        for chunk in chunks:
+            doc = {"@search.action": "mergeOrUpload"}
+            for key in (*cls.fields(), "embedding"):
+                value = chunk.get(key)
+                doc[key] = str(value) if key in ("document_id", "user_id", "group_id") and value is not None else value
+            size = len(json.dumps(doc, ensure_ascii=False).encode("utf-8"))
+            if current and (
+                len(current) >= settings.index_upsert_batch_size
+                or current_bytes + size > settings.index_upsert_max_bytes
+            ):
+                batches.append(current)
+                current, current_bytes = [], 0
+            current.append(doc)
+            current_bytes += size
+        if current:
+            batches.append(current)
+        return batches
+
+    def upsert(self, user_id: UUID, chunks: List[Dict[str, Any]]) -> None:
+        if not chunks:
+            return
+        if not self.configured():
+            raise RuntimeError("Azure Search configuration is missing")
+        client = get_sync_client(AZURE_SEARCH)
+        for batch in self._upsert_batches(chunks):
+            self._post_actions(client, batch)
+
+    async def aupsert(self, user_id: UUID, chunks: List[Dict[str, Any]]) -> None:
+        if not self.configured():
+            raise RuntimeError("Azure Search configuration is missing")
+        await self._apost_actions(get_async_client(AZURE_SEARCH), self._upsert_batches(chunks))
+
+
+_store: Optional[VectorStore] = None
+_store_lock = threading.Lock()
+
+
+def get_vector_store() -> VectorStore:
+    """settings.vector_store_backend ("azure" | "local")에 맞는 저장소 싱글턴."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                backend = settings.vector_store_backend.lower()
+                if backend == "local":
+                    from app.services.local_vector_store import LocalVectorStore
+
+                    _store = LocalVectorStore(settings.local_vector_store_dir)
+                elif backend == "azure":
+                    _store = AzureSearchVectorStore()
+                else:
+                    raise ValueError(f"Unknown VECTOR_STORE_BACKEND: {settings.vector_store_backend!r}")
+    return _store
@@ -0,0 +1,109 @@
+"""
+로컬(NumPy memmap) 벡터 저장소와 Azure AI Search 검색 지연을 비교한다.
+
+    python -m app.workers.bench_vector_store --rows 20000 --dims 1536 --queries 200
+
+로컬 저장소는 임시 디렉터리에 랜덤 벡터로 만든다.
+Azure 설정(AZURE_SEARCH_*)과 --azure-user-id 가 있으면 같은 횟수만큼 실제 인덱스도 측정한다.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+import uuid
+from typing import Awaitable, Callable, List
+
+import numpy as np
+
+from app.core.http_clients import http_clients
+from app.services.local_vector_store import LocalVectorStore
+from app.services.vector_store import AzureSearchVectorStore
+
+
+def _summary(name: str, samples_ms: List[float]) -> str:
+    samples = sorted(samples_ms)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    return (
+        f"{name:<14} n={len(samples):<5} mean={statistics.fmean(samples):8.2f}ms "
+        f"p50={statistics.median(samples):8.2f}ms p95={p95:8.2f}ms"
+    )
+
+
+async def _time(fn: Callable[[], Awaitable[object]], repeat: int) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+async def _main(args: argparse.Namespace) -> None:
+    rng = np.random.default_rng(42)
+    user_id = uuid.uuid4()
+    group_ids = [uuid.uuid4() for _ in range(args.groups)]
+    vectors = rng.standard_normal((args.rows, args.dims), dtype=np.float32)
+    queries = rng.standard_normal((args.queries, args.dims), dtype=np.float32)
+
+    with tempfile.TemporaryDirectory() as root:
+        store = LocalVectorStore(root)
+        chunks = [
+            {
+                "id": f"chunk-{i}",
+                "document_id": str(uuid.UUID(int=i // args.chunks_per_doc)),
+                "group_id": str(group_ids[(i // args.chunks_per_doc) % len(group_ids)]),
+                "chunk_id": i % args.chunks_per_doc,
+                "content": f"chunk {i}",
+                "embedding": vectors[i],
+            }
+            for i in range(args.rows)
+        ]
+        started = time.perf_counter()
+        store.upsert(user_id, chunks)
+        print(f"local build: {args.rows} x {args.dims} in {(time.perf_counter() - started) * 1000:.1f}ms")
+
+        await store.search(queries[0], user_id, top_k=args.top_k)  # memmap warm-up
+        it = iter(range(10**9))
+        print(_summary("local", await _time(
+            lambda: store.search(queries[next(it) % len(queries)], user_id, top_k=args.top_k), args.queries
+        )))
+        print(_summary("local+group", await _time(
+            lambda: store.search(queries[next(it) % len(queries)], user_id, group_id=group_ids[0], top_k=args.top_k),
+            args.queries,
+        )))
+
+        started = time.perf_counter()
+        store.search_batch(queries, user_id, top_k=args.top_k)
+        batch_ms = (time.perf_counter() - started) * 1000
+        print(f"local batch    n={len(queries):<5} total={batch_ms:8.2f}ms per-query={batch_ms / len(queries):8.2f}ms")
+
+    if args.azure_user_id and AzureSearchVectorStore.configured():
+        azure = AzureSearchVectorStore()
+        azure_queries = rng.standard_normal((args.queries, args.azure_dims or args.dims), dtype=np.float32)
+        try:
+            await azure.search(azure_queries[0].tolist(), args.azure_user_id, top_k=args.top_k)
+            it = iter(range(10**9))
+            print(_summary("azure", await _time(
+                lambda: azure.search(azure_queries[next(it) % len(azure_queries)].tolist(), args.azure_user_id, top_k=args.top_k),
+                args.queries,
+            )))
+        finally:
+            await http_clients.aclose()
+    else:
+        print("azure: skipped (set AZURE_SEARCH_* and pass --azure-user-id)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark local vs Azure AI Search vector store latency")
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--dims", type=int, default=1536)
+    parser.add_argument("--chunks-per-doc", type=int, default=20)
+    parser.add_argument("--groups", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--azure-user-id", type=uuid.UUID, default=None)
+    parser.add_argument("--azure-dims", type=int, default=None, help="embedding dims of the Azure index (default: --dims)")
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,56 @@
+"""
+index_jobs 큐를 처리하는 인덱싱 워커.
+
+    python -m app.workers.index_worker --concurrency 4
+
+여러 프로세스/호스트에서 동시에 띄워도 된다. (작업은 SELECT ... FOR UPDATE SKIP LOCKED 로 나눠 가진다)
+SIGTERM/SIGINT를 받으면 새 작업을 더 가져오지 않고 실행 중인 작업을 마친 뒤 종료한다.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import signal
+
+from app.core.config import settings
+from app.core.db import async_engine
+from app.core.http_clients import http_clients
+from app.services.index_queue import IndexWorker
+
+
+async def _main(args: argparse.Namespace) -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:  # Windows
+            pass
+
+    worker = IndexWorker(name=args.name, concurrency=args.concurrency, poll_interval=args.poll_interval)
+
+    async def _report() -> None:
+        while True:
+            await asyncio.sleep(args.report_interval)
+            logging.getLogger(__name__).info("index worker %s metrics: %s", worker.name, worker.metrics.as_dict())
+
+    reporter = asyncio.create_task(_report())
+    try:
+        await worker.run(stop)
+    finally:
+        reporter.cancel()
+        await http_clients.aclose()
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Process queued document indexing jobs")
+    parser.add_argument("--name", default=None, help="lease owner name (default: hostname:pid)")
+    parser.add_argument("--concurrency", type=int, default=settings.index_worker_concurrency)
+    parser.add_argument("--poll-interval", type=float, default=settings.index_worker_poll_interval)
+    parser.add_argument("--report-interval", type=float, default=60.0, help="seconds between metrics log lines")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main(args))
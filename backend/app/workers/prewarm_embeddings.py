@@ -0,0 +1,35 @@
+"""
+qa_logs 상위 질문으로 질문 임베딩 캐시를 미리 채운다.
+
+    python -m app.workers.prewarm_embeddings --limit 500
+
+EMBEDDING_CACHE_PERSIST=true 이면 Postgres(query_embeddings)에 저장되어
+모든 API 워커가 공유한다.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+
+from app.api.v1.search_vector import prewarm_embedding_cache
+from app.core.config import settings
+from app.core.http_clients import http_clients
+
+
+async def _main(limit: int, batch_size: int) -> None:
+    try:
+        warmed = await prewarm_embedding_cache(limit=limit, batch_size=batch_size)
+        print(f"embedded {warmed} questions")
+    finally:
+        await http_clients.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prewarm the query embedding cache from qa_logs")
+    parser.add_argument("--limit", type=int, default=settings.embedding_cache_prewarm_limit)
+    parser.add_argument("--batch-size", type=int, default=16)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main(args.limit, args.batch_size))
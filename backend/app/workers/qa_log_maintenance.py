@@ -0,0 +1,34 @@
+"""
+qa_logs 월별 파티션 관리: 다음 달 파티션을 미리 만들고, 보존 기간이 지난 달을 blob에 보관한 뒤 떼어낸다.
+
+    python -m app.workers.qa_log_maintenance --retention-months 12
+
+cron 등으로 하루 한 번 정도 돌리면 된다. API 프로세스도 같은 작업을 주기적으로 하므로
+(QA_LOG_MAINTENANCE_EMBEDDED=true) 별도로 돌리지 않아도 된다. 동시에 돌면 advisory lock으로 하나만 실행된다.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+
+from app.core.config import settings
+from app.services.qa_log_partitions import run_maintenance
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create upcoming qa_logs partitions and archive expired ones")
+    parser.add_argument("--retention-months", type=int, default=settings.qa_log_retention_months)
+    parser.add_argument("--months-ahead", type=int, default=settings.qa_log_partition_months_ahead)
+    parser.add_argument("--no-archive", action="store_true", help="drop expired partitions without exporting them")
+    parser.add_argument("--no-retention", action="store_true", help="only create upcoming partitions")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    summary = run_maintenance(
+        retention=not args.no_retention,
+        retention_months=args.retention_months,
+        months_ahead=args.months_ahead,
+        archive=False if args.no_archive else None,
+    )
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
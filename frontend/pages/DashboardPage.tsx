@@ -81,6 +81,11 @@ const DashboardPage: React.FC = () => {
     return data.daily_counts.reduce((sum, item) => sum + item.count, 0);
   }, [data]);
 
+  const cacheHits = useMemo(() => {
+    if (!data) return 0;
+    return data.daily_counts.reduce((sum, item) => sum + (item.cache_hits ?? 0), 0);
+  }, [data]);
+
   if (loading) return <div className="p-6 text-gray-400">로딩 중...</div>;
   if (error || !data) return <div className="p-6 text-red-400">{error ?? '데이터가 없습니다.'}</div>;
 
@@ -94,6 +99,9 @@ const DashboardPage: React.FC = () => {
         <div className="flex items-center gap-2">
           <span className="text-purple-200">💬 총 대화수</span>
           <span className="font-semibold text-white">{totalConversations.toLocaleString()}</span>
+          <span className="text-xs text-purple-300/70 ml-4">
+            ⚡ 답변 캐시 {cacheHits.toLocaleString()} hit / {(totalConversations - cacheHits).toLocaleString()} miss
+          </span>
         </div>
         <div className="flex items-center gap-4">
           {[
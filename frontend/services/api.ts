@@ -66,6 +66,28 @@ export const apiClient = {
     if (resp.status === 204) return undefined as T;
     return resp.json() as Promise<T>;
   },
+  // 목록 API는 한 페이지씩 주고 다음 페이지 커서를 X-Next-Cursor 헤더에 담는다. 끝까지 따라가서 합친다.
+  async requestAll<T>(path: string): Promise<T[]> {
+    const headers: Record<string, string> = { 'Accept': 'application/json' };
+    if (this.token) {
+      headers['Authorization'] = `Bearer ${this.token}`;
+    }
+    const items: T[] = [];
+    let cursor: string | null = null;
+    do {
+      const url = new URL(`${BASE_URL}${path}`);
+      url.searchParams.set('limit', '1000');
+      if (cursor) url.searchParams.set('cursor', cursor);
+      const resp = await fetch(url.toString(), { headers });
+      if (!resp.ok) {
+        const text = await resp.text();
+        throw new Error(`API ${resp.status}: ${text}`);
+      }
+      items.push(...((await resp.json()) as T[]));
+      cursor = resp.headers.get('X-Next-Cursor');
+    } while (cursor);
+    return items;
+  },
 };
 
 export const getApiBase = () => BASE_URL;
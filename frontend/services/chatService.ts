@@ -37,7 +37,7 @@ export const chatService = {
   },
 
   async listLogs(): Promise<ChatLog[]> {
-    return apiClient.request<ChatLog[]>('/api/v1/chat/logs');
+    return apiClient.requestAll<ChatLog>('/api/v1/chat/logs');
   },
 
   async clearLogs(): Promise<void> {
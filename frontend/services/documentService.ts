@@ -9,7 +9,7 @@ export interface UploadDocumentParams {
 
 export const documentService = {
   async list(): Promise<Document[]> {
-    return apiClient.request<Document[]>('/api/v1/documents/');
+    return apiClient.requestAll<Document>('/api/v1/documents/');
   },
 
   async upload({ file, title, group_id }: UploadDocumentParams): Promise<Document> {
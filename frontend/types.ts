@@ -98,6 +98,7 @@ export interface DashboardDocumentSummary {
 export interface DashboardDailyCount {
   date: string;
   count: number;
+  cache_hits: number;
 }
 
 export interface DashboardFailedQuestion {